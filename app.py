@@ -3,13 +3,38 @@ Sophia's PSAT/SHSAT Vocabulary Trainer - Root App for Vercel
 """
 
 import os
+import json
+import base64
+import codecs
+import hashlib
 import random
 import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, date, timedelta
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash
+import click
+from flask import (Flask, Response, abort, render_template, request, redirect, url_for, jsonify, flash, session,
+                   has_request_context, stream_with_context)
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import NullPool
 from dotenv import load_dotenv
+from quiz_queue import QuizPriorityQueue
+from distractor_index import DistractorIndex
+from similarity_index import SimilarityIndex
+from event_log import WriteBehindBuffer
+from stats_cache import MASTERY_BUCKETS, DashboardStatsCache
+from learner_cache import LearnerCaches
+from word_snapshot import WordBankSnapshot
+from word_import import PARSERS, chunked, detect_format, parse_words
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to the in-process lock only
+    fcntl = None
 
 # Load environment variables
 load_dotenv()
@@ -24,38 +49,230 @@ database_url = os.environ.get('DATABASE_URL', 'sqlite:////tmp/vocab_trainer.db')
 if database_url and database_url.startswith('postgres://'):
     database_url = database_url.replace('postgres://', 'postgresql://', 1)
 
+def engine_profile(database_url):
+    """Connection pool profile from DATABASE_POOL_PROFILE, or picked from the environment"""
+    profile = os.environ.get('DATABASE_POOL_PROFILE', 'auto').lower()
+    if profile != 'auto':
+        return profile
+    if database_url.startswith('sqlite'):
+        return 'sqlite'
+    if os.environ.get('VERCEL') or os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
+        return 'serverless'
+    return 'server'
+
+def engine_options(profile):
+    """SQLAlchemy engine options for a pool profile (server, serverless or sqlite)"""
+    # server: a sized QueuePool with pre-ping and recycling; serverless: NullPool, so a frozen instance
+    # keeps nothing open (pair it with PgBouncer or a pooled URL); sqlite: the default pool
+    if profile == 'server':
+        return {
+            'pool_size': int(os.environ.get('DATABASE_POOL_SIZE', 5)),
+            'max_overflow': int(os.environ.get('DATABASE_MAX_OVERFLOW', 10)),
+            'pool_timeout': 30,
+            'pool_pre_ping': True,
+            'pool_recycle': 300,
+        }
+    if profile == 'serverless':
+        return {'poolclass': NullPool}
+    if profile == 'sqlite':
+        return {}
+    raise ValueError(f"Unknown DATABASE_POOL_PROFILE {profile!r} (expected server, serverless, sqlite or auto)")
+
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {
-    'pool_pre_ping': True,
-    'pool_recycle': 300,
+app.config['DATABASE_POOL_PROFILE'] = engine_profile(database_url)
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(app.config['DATABASE_POOL_PROFILE'])
+
+# SQLite tuning applied to every connection (set SQLITE_TUNED=false on filesystems without shared memory, e.g. NFS)
+app.config['SQLITE_TUNED'] = os.environ.get('SQLITE_TUNED', 'true').lower() == 'true'
+app.config['SQLITE_PRAGMAS'] = {
+    'journal_mode': 'WAL',  # Readers never block the writer and vice versa
+    'synchronous': os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL'),  # Durable across app crashes; WAL makes it safe
+    'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # ms to wait for the write lock
+    'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE', 20000)),  # Negative: KiB rather than pages
 }
 
+def configure_sqlite(engine, pragmas):
+    """Apply pragmas to every new SQLite connection, and honour begin_write()"""
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+    @event.listens_for(engine, 'begin')
+    def begin(conn):
+        # pysqlite otherwise opens a deferred transaction just before the first write
+        if conn.get_execution_options().get('sqlite_begin') == 'IMMEDIATE':
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+# Keep quiz candidates and distractor pools in in-process indexes (disable on short-lived serverless instances)
+app.config['QUIZ_PRIORITY_QUEUE'] = os.environ.get('QUIZ_PRIORITY_QUEUE', 'true').lower() == 'true'
+
+# Serve quiz word text and definitions from an in-process snapshot instead of loading VocabularyWord rows
+app.config['WORD_SNAPSHOT'] = os.environ.get('WORD_SNAPSHOT', 'true').lower() == 'true'
+
+# Where the word snapshot is saved so new instances can map it instead of querying every word
+app.config['WORD_SNAPSHOT_PATH'] = os.environ.get('WORD_SNAPSHOT_PATH', '/tmp/vocab_word_snapshot.bin')
+
+# Seconds a word write waits before the snapshot file is rewritten, so a burst of writes shares one
+# save (each rewrites the whole file); 0 saves in the request
+app.config['WORD_SNAPSHOT_SAVE_DELAY'] = float(os.environ.get('WORD_SNAPSHOT_SAVE_DELAY', 5.0))
+
+# Where the Expert-mode similarity index is saved between cold starts
+app.config['SIMILARITY_INDEX_PATH'] = os.environ.get('SIMILARITY_INDEX_PATH', '/tmp/vocab_similarity_index.json')
+
+# Review events are buffered in memory and bulk-inserted in the background
+app.config['REVIEW_EVENT_FLUSH_SIZE'] = int(os.environ.get('REVIEW_EVENT_FLUSH_SIZE', 50))
+app.config['REVIEW_EVENT_FLUSH_INTERVAL'] = float(os.environ.get('REVIEW_EVENT_FLUSH_INTERVAL', 5.0))
+# Events kept for retry while the database rejects writes; the oldest beyond this are dropped
+app.config['REVIEW_EVENT_MAX_BUFFER'] = int(os.environ.get('REVIEW_EVENT_MAX_BUFFER', 10000))
+# Flush at the end of each answer request: a frozen serverless instance never runs the background flush
+app.config['REVIEW_EVENT_FLUSH_PER_REQUEST'] = os.environ.get(
+    'REVIEW_EVENT_FLUSH_PER_REQUEST',
+    str(app.config['DATABASE_POOL_PROFILE'] == 'serverless')).lower() == 'true'
+
+# Answers append profile deltas; this many pending deltas are folded into the profile row at once
+app.config['PROFILE_FOLD_SIZE'] = int(os.environ.get('PROFILE_FOLD_SIZE', 20))
+
+# Optional file for sharing warm dashboard statistics between processes
+app.config['DASHBOARD_STATS_PATH'] = os.environ.get('DASHBOARD_STATS_PATH')
+
+class PendingEngine:
+    """Engine options waiting for first use, standing in for the engine in Flask-SQLAlchemy's registry"""
+
+    def __init__(self, bind_key, options, app):
+        self.bind_key = bind_key
+        self.options = options
+        self.app = app  # The app these options belong to
+
+class LazySQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy that creates its engines on first use, so requests like /health skip the driver import"""
+    # Overrides the private _make_engine() hook (Flask-SQLAlchemy is pinned to 3.1); with
+    # SQLALCHEMY_RECORD_QUERIES on, engines are created at once for init_app()'s query recorder
+
+    def __init__(self, *args, **kwargs):
+        self._engine_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _make_engine(self, bind_key, options, app):
+        if app.config.get('SQLALCHEMY_RECORD_QUERIES'):
+            return self._create_engine(bind_key, options, app)
+        return PendingEngine(bind_key, options, app)
+
+    def _create_engine(self, bind_key, options, app):
+        engine = super()._make_engine(bind_key, options, app)
+        if engine.dialect.name == 'sqlite' and app.config.get('SQLITE_TUNED'):
+            configure_sqlite(engine, app.config['SQLITE_PRAGMAS'])
+        return engine
+
+    @property
+    def engines(self):
+        engines = super().engines
+        if any(isinstance(engine, PendingEngine) for engine in engines.values()):
+            with self._engine_lock:
+                for key, pending in engines.items():
+                    if isinstance(pending, PendingEngine):
+                        engines[key] = self._create_engine(key, pending.options, pending.app)
+        return engines
+
+def running_flask_cli():
+    """True when loaded by the `flask` command rather than a WSGI server"""
+    script = sys.argv[0] if sys.argv else ''
+    return os.path.basename(script) == 'flask' or script.endswith(os.path.join('flask', '__main__.py'))
+
 # Initialize database
-db = SQLAlchemy(app)
-migrate = Migrate(app, db)
+db = LazySQLAlchemy(app)
+# Flask-Migrate pulls in Alembic (over 100 ms of imports); only the `flask db` commands need it
+if running_flask_cli():
+    from flask_migrate import Migrate
+    migrate = Migrate(app, db)
+
+def database_identity(url):
+    """Unsigned 64-bit id of a database URL, recorded in saved word snapshots (password left out, SQLite paths absolute)"""
+    url = make_url(url)
+    if url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:':
+        url = url.set(database=os.path.abspath(url.database))
+    digest = hashlib.sha256(url.render_as_string(hide_password=True).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'little')
+
+def learner_stats_path(user_id):
+    """Per-learner file for DASHBOARD_STATS_PATH (stats.json -> stats-<id>.json), or None"""
+    path = app.config['DASHBOARD_STATS_PATH']
+    if not path:
+        return None
+    root, ext = os.path.splitext(path)
+    return f"{root}-{user_id}{ext}"
+
+# Word selection and dashboard caches are per learner; the similarity index and word snapshot
+# only use word content
+quiz_queues = LearnerCaches(lambda user_id: QuizPriorityQueue())
+distractor_indexes = LearnerCaches(lambda user_id: DistractorIndex())
+similarity_index = SimilarityIndex(app.config['SIMILARITY_INDEX_PATH'])
+word_bank = WordBankSnapshot(app.config['WORD_SNAPSHOT_PATH'], database_identity(database_url))
+dashboard_stats = LearnerCaches(lambda user_id: DashboardStatsCache(lambda: word_bank_stats(user_id),
+                                                                    learner_stats_path(user_id)))
 
 # Database Models
 class VocabularyWord(db.Model):
-    """Model for vocabulary words with adaptive learning features"""
+    """Model for vocabulary words (content shared by every learner; review state is in UserWordState)"""
+    # Text columns are deferred: each route undefers what it renders (WORD_TEXT, QUIZ_TEXT)
     id = db.Column(db.Integer, primary_key=True)
     word = db.Column(db.String(100), nullable=False, unique=True)
-    definition = db.Column(db.Text, nullable=False)
-    synonyms = db.Column(db.Text, default='')  # Comma-separated list
-    antonyms = db.Column(db.Text, default='')  # Comma-separated list
-    example_sentence = db.Column(db.Text, default='')  # Example usage
-    date_added = db.Column(db.Date, default=date.today)
+    definition = db.deferred(db.Column(db.Text, nullable=False), group='text')
+    synonyms = db.deferred(db.Column(db.Text, default=''), group='text')  # Comma-separated list
+    antonyms = db.deferred(db.Column(db.Text, default=''), group='text')  # Comma-separated list
+    example_sentence = db.deferred(db.Column(db.Text, default=''), group='text')  # Example usage
+    date_added = db.Column(db.Date, nullable=False, default=date.today,
+                           server_default=db.text('CURRENT_DATE'))  # Indexed with id below
+
+    # Composite index matching the word list date sort orders, so keyset pages are index range scans
+    __table_args__ = (
+        db.Index('ix_vocabulary_word_date_added_id', date_added, id),
+    )
+
+# Loader options naming the deferred text each kind of page renders:
+# word cards, the print list and the edit form show all of it; quizzes only the definition
+WORD_TEXT = db.Load(VocabularyWord).undefer_group('text')
+QUIZ_TEXT = db.undefer(VocabularyWord.definition)
+
+class UserWordState(db.Model):
+    """One learner's adaptive learning state for one word (a row per learner and word)"""
+    __tablename__ = 'user_word_state'
+    user_id = db.Column(db.Integer, db.ForeignKey('user_profile.id', ondelete='CASCADE'), primary_key=True)
+    word_id = db.Column(db.Integer, db.ForeignKey('vocabulary_word.id', ondelete='CASCADE'),
+                        primary_key=True, index=True)
     times_reviewed = db.Column(db.Integer, default=0)
     times_correct = db.Column(db.Integer, default=0)
     last_reviewed = db.Column(db.DateTime)
-    mastery_level = db.Column(db.Integer, default=0)  # 0-100
+    mastery_level = db.Column(db.Integer, nullable=False, default=0)  # 0-100, indexed below
 
     # Adaptive learning fields
     difficulty_score = db.Column(db.Float, default=50.0)  # 0-100, dynamically calculated
     streak = db.Column(db.Integer, default=0)  # Consecutive correct answers
     last_response_time = db.Column(db.Float)  # Seconds to answer
     review_interval = db.Column(db.Integer, default=1)  # Days until next review (spaced repetition)
-    next_review_date = db.Column(db.Date)
+    next_review_date = db.Column(db.Date)  # Indexed below
+    mastery_change = db.Column(db.Integer, default=0)  # Mastery gained (or lost) by the last answer
+
+    # Per-learner indexes: due-date lookups, recent reviews, and the mastery sort of the word list
+    __table_args__ = (
+        db.Index('ix_user_word_state_user_id_next_review_date', user_id, next_review_date),
+        db.Index('ix_user_word_state_user_id_last_reviewed', user_id, last_reviewed),
+        db.Index('ix_user_word_state_user_id_mastery_level', user_id, mastery_level.desc(), word_id),
+    )
+
+    # Review state columns, as stored on vocabulary_word before there were several learners
+    STATE_COLUMNS = ('times_reviewed', 'times_correct', 'last_reviewed', 'mastery_level', 'difficulty_score',
+                     'streak', 'last_response_time', 'review_interval', 'next_review_date', 'mastery_change')
+
+    @classmethod
+    def initial_values(cls):
+        """Column defaults of a word nobody has reviewed yet"""
+        return {name: cls.__table__.c[name].default.arg
+                for name in cls.STATE_COLUMNS if cls.__table__.c[name].default is not None}
 
     def get_accuracy(self):
         """Calculate accuracy percentage"""
@@ -64,28 +281,36 @@ class VocabularyWord(db.Model):
         return int((self.times_correct / self.times_reviewed) * 100)
 
     def calculate_difficulty(self):
-        """Calculate difficulty based on community performance"""
-        if self.times_reviewed < 3:
+        """Calculate difficulty based on the learner's performance"""
+        return self.difficulty_for(self.times_reviewed, self.times_correct, self.last_response_time)
+
+    @staticmethod
+    def difficulty_for(times_reviewed, times_correct, last_response_time):
+        """Difficulty from raw review counters (shared by ORM objects and column-only queries)"""
+        if times_reviewed < 3:
             return 50.0  # Default for new words
 
-        accuracy = self.get_accuracy()
+        accuracy = int((times_correct / times_reviewed) * 100)
         # Inverse relationship: lower accuracy = higher difficulty
         base_difficulty = 100 - accuracy
 
         # Adjust based on response time (if available)
-        if self.last_response_time:
-            if self.last_response_time > 10:  # Slow response
+        if last_response_time:
+            if last_response_time > 10:  # Slow response
                 base_difficulty += 10
-            elif self.last_response_time < 3:  # Fast response
+            elif last_response_time < 3:  # Fast response
                 base_difficulty -= 10
 
         return max(10, min(100, base_difficulty))
 
+    # Fibonacci-like sequence of review intervals in days, indexed by streak
+    REVIEW_INTERVALS = [1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
+
     def update_spaced_repetition(self, correct):
         """Update spaced repetition interval based on performance"""
         if correct:
             # Fibonacci-like sequence for increasing intervals
-            intervals = [1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
+            intervals = self.REVIEW_INTERVALS
             current_idx = min(self.streak, len(intervals) - 1)
             self.review_interval = intervals[current_idx]
         else:
@@ -94,15 +319,138 @@ class VocabularyWord(db.Model):
 
         self.next_review_date = date.today() + timedelta(days=self.review_interval)
 
+    @classmethod
+    def difficulty_expression(cls, times_reviewed=None, times_correct=None, last_response_time=None):
+        """SQL version of calculate_difficulty(); pass counter expressions for the difficulty after an update"""
+        times_reviewed = cls.times_reviewed if times_reviewed is None else times_reviewed
+        times_correct = cls.times_correct if times_correct is None else times_correct
+        last_response_time = cls.last_response_time if last_response_time is None else last_response_time
+
+        accuracy = (times_correct * 100) // times_reviewed
+        base_difficulty = 100 - accuracy + db.case(
+            (last_response_time > 10, 10),  # Slow response
+            (db.and_(last_response_time != 0, last_response_time < 3), -10),  # Fast response
+            else_=0
+        )
+        return db.case(
+            (times_reviewed < 3, 50.0),  # Default for new words
+            (base_difficulty < 10, 10),
+            (base_difficulty > 100, 100),
+            else_=base_difficulty
+        )
+
+    @classmethod
+    def due_condition(cls, today=None):
+        """SQL filter for words due for review: never reviewed, or next_review_date has arrived"""
+        today = today or date.today()
+        return db.or_(cls.last_reviewed.is_(None),
+                      cls.next_review_date.is_(None),
+                      cls.next_review_date <= today)
+
+    @classmethod
+    def answer_values(cls, correct, response_time, now=None):
+        """SET expressions applying one answer in a single UPDATE (the SQL form of apply_answer)"""
+        # Each expression reads the row's pre-update values, so concurrent answers to a word stack
+        now = now or datetime.now()
+        if correct:
+            streak = cls.streak + 1
+            gained = cls.mastery_level + 10 + streak * 2  # Bonus for streaks
+            mastery = db.case((gained > 100, 100), else_=gained)
+            # Interval for the new streak, as in update_spaced_repetition()
+            intervals = cls.REVIEW_INTERVALS
+            review_interval = db.case(*[(streak == i, days) for i, days in enumerate(intervals[:-1])],
+                                      else_=intervals[-1])
+            next_review_date = db.case(*[(streak == i, now.date() + timedelta(days=days))
+                                         for i, days in enumerate(intervals[:-1])],
+                                       else_=now.date() + timedelta(days=intervals[-1]))
+        else:
+            streak = 0
+            mastery = db.case((cls.mastery_level < 5, 0), else_=cls.mastery_level - 5)
+            review_interval = 1
+            next_review_date = now.date() + timedelta(days=1)
+
+        return {
+            'times_reviewed': cls.times_reviewed + 1,
+            'times_correct': cls.times_correct + (1 if correct else 0),
+            'last_reviewed': now,
+            'last_response_time': response_time,
+            'streak': streak,
+            'mastery_level': mastery,
+            'mastery_change': mastery - cls.mastery_level,
+            'review_interval': review_interval,
+            'next_review_date': next_review_date,
+            'difficulty_score': cls.difficulty_expression(
+                cls.times_reviewed + 1, cls.times_correct + (1 if correct else 0), db.literal(response_time)),
+        }
+
+    @classmethod
+    def priority_expression(cls, current_difficulty, today=None):
+        """SQL version of the quiz selection priority (same weights as the original Python scoring)"""
+        today = today or date.today()
+
+        # 1. Spaced repetition: never reviewed, or next_review_date has arrived
+        needs_review = db.case((cls.due_condition(today), 1), else_=0)
+        # 2. Difficulty match: How close is word difficulty to user's level?
+        difficulty_match = 100 - db.func.abs(cls.difficulty_expression() - current_difficulty)
+        # 3. Mastery gap: Lower mastery = higher priority
+        mastery_gap = 100 - cls.mastery_level
+        # 4. Recent mistakes: Boost if recently answered incorrectly
+        mistake_boost = db.case((db.and_(cls.streak == 0, cls.times_reviewed > 0), 50), else_=0)
+
+        return (
+            (needs_review * 100) +  # Highest weight for spaced repetition
+            (difficulty_match * 0.5) +  # Medium weight for difficulty matching
+            (mastery_gap * 0.3) +  # Lower weight for mastery
+            mistake_boost
+        )
+
 class QuizHistory(db.Model):
     """Model for quiz history"""
     id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)  # Learner who took the quiz, indexed with date_taken below
     date_taken = db.Column(db.DateTime, default=datetime.now)
     score = db.Column(db.Integer)
     total_questions = db.Column(db.Integer)
     difficulty_level = db.Column(db.String(20))  # Easy, Medium, Hard, Expert
     avg_response_time = db.Column(db.Float)
 
+    # A learner's most recent quizzes (progress page)
+    __table_args__ = (
+        db.Index('ix_quiz_history_user_id_date_taken', user_id, date_taken),
+    )
+
+class ReviewEvent(db.Model):
+    """Append-only log of every quiz answer"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer)  # Learner who answered
+    word_id = db.Column(db.Integer, nullable=False, index=True)  # No FK: events outlive deleted words
+    answer_id = db.Column(db.Integer)
+    correct = db.Column(db.Boolean, nullable=False)
+    response_time = db.Column(db.Float)
+    timestamp = db.Column(db.DateTime, default=datetime.now, index=True)
+    difficulty_level = db.Column(db.String(20))  # Mode the question was answered in
+
+def write_review_events(rows):
+    """Bulk-insert buffered review events (one executemany per flush)"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(ReviewEvent.__table__.insert(), rows)
+
+review_events = WriteBehindBuffer(write_review_events,
+                                  flush_size=app.config['REVIEW_EVENT_FLUSH_SIZE'],
+                                  flush_interval=app.config['REVIEW_EVENT_FLUSH_INTERVAL'],
+                                  max_rows=app.config['REVIEW_EVENT_MAX_BUFFER'])
+
+def log_review_events(events):
+    """Buffer answer events, flushing before the response when REVIEW_EVENT_FLUSH_PER_REQUEST is on"""
+    review_events.extend(events)
+    if app.config['REVIEW_EVENT_FLUSH_PER_REQUEST']:
+        try:
+            review_events.flush()
+        except Exception as e:
+            # The rows stay buffered; the next request (or the background thread) retries them
+            app.logger.warning(f"Could not flush review events: {e}")
+
 class UserProfile(db.Model):
     """Model for user gamification profile"""
     id = db.Column(db.Integer, primary_key=True)
@@ -149,13 +497,130 @@ class UserProfile(db.Model):
         self.confidence_score = (alpha * performance) + ((1 - alpha) * self.confidence_score)
         self.confidence_score = max(0, min(100, self.confidence_score))
 
+    def apply_answer(self, correct, xp):
+        """Apply one quiz answer's effect on confidence, difficulty and XP; returns True on level up"""
+        if correct:
+            # Update user confidence (increase)
+            self.update_confidence(min(100, self.confidence_score + 5))
+
+            # Adjust difficulty upward if doing well
+            if self.confidence_score > 70:
+                self.current_difficulty = min(100, self.current_difficulty + 2)
+        else:
+            # Update user confidence (decrease)
+            self.update_confidence(max(0, self.confidence_score - 10))
+
+            # Adjust difficulty downward if struggling
+            if self.confidence_score < 30:
+                self.current_difficulty = max(10, self.current_difficulty - 5)
+            else:
+                self.current_difficulty = max(10, self.current_difficulty - 2)
+
+        self.experience_points += xp
+        new_level = self.calculate_level()
+        if new_level > self.level:
+            self.level = new_level
+            return True
+        return False
+
+class ProfileDelta(db.Model):
+    """Append-only effect of one answer on a learner's profile, folded into it by fold_profile_deltas()"""
+    id = db.Column(db.Integer, primary_key=True)
+    profile_id = db.Column(db.Integer, nullable=False, index=True)
+    correct = db.Column(db.Boolean, nullable=False)
+    xp = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
 class Milestone(db.Model):
     """Model for learning milestones"""
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     target_date = db.Column(db.Date, nullable=False)
     target_words = db.Column(db.Integer, nullable=False)
-    
+
+class SchemaVersion(db.Model):
+    """Single-row stamp of the schema version initialize_database() last brought the database to"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False)
+    migrated_at = db.Column(db.DateTime, default=datetime.now)
+
+class WordBankVersion(db.Model):
+    """Single-row counter bumped in the same transaction as every change to word content"""
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+def word_bank_version():
+    """The current word bank version, or None before the database is initialized"""
+    return db.session.query(WordBankVersion.version).filter(WordBankVersion.id == 1).scalar()
+
+def bump_word_bank_version():
+    """Advance the word bank version as part of the session's transaction; returns the new version"""
+    version = db.session.execute(db.update(WordBankVersion)
+                                 .where(WordBankVersion.id == 1)
+                                 .values(version=WordBankVersion.version + 1)
+                                 .returning(WordBankVersion.version)).scalar()
+    if version is None:
+        version = ensure_word_bank_version() + 1
+        db.session.get(WordBankVersion, 1).version = version
+    return version
+
+def ensure_word_bank_version():
+    """Create the version row (at a random start, unlike any other database) if missing; returns the version"""
+    row = db.session.get(WordBankVersion, 1)
+    if row is None:
+        row = WordBankVersion(id=1, version=random.getrandbits(48))
+        db.session.add(row)
+        db.session.flush()
+    return row.version
+
+class LearnerStateVersion(db.Model):
+    """Per-learner counter bumped in the same transaction as every batch of answers"""
+    user_id = db.Column(db.Integer, db.ForeignKey('user_profile.id', ondelete='CASCADE'), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False)
+
+def bump_learner_state_version(user_id):
+    """Advance a learner's state version as part of the session's transaction; returns the new version"""
+    version = db.session.execute(db.update(LearnerStateVersion)
+                                 .where(LearnerStateVersion.user_id == user_id)
+                                 .values(version=LearnerStateVersion.version + 1)
+                                 .returning(LearnerStateVersion.version)).scalar()
+    if version is None:
+        version = 1
+        db.session.add(LearnerStateVersion(user_id=user_id, version=version))
+        db.session.flush()
+    return version
+
+def cache_versions(user_id):
+    """(word bank version, learner state version) in one query: what a learner's in-process indexes must reflect"""
+    word_bank = db.select(WordBankVersion.version).where(WordBankVersion.id == 1).scalar_subquery()
+    learner = db.select(LearnerStateVersion.version).where(LearnerStateVersion.user_id == user_id).scalar_subquery()
+    versions = db.session.query(word_bank, learner).one()
+    return versions[0], versions[1] or 0
+
+def word_bank_advanced(version):
+    """Mark every cached quiz index current at a word bank version this process wrote (and applied to them)"""
+    for queue in quiz_queues.values():
+        queue.advance(0, version)
+    for index in distractor_indexes.values():
+        index.advance(0, version)
+
+# Bump whenever initialize_database() gains a migration step, so deployed databases re-run it
+SCHEMA_VERSION = 7
+
+def schema_is_current():
+    """True if the database is stamped with SCHEMA_VERSION or newer (one primary key read)"""
+    try:
+        with db.engine.connect() as conn:
+            version = conn.execute(db.select(SchemaVersion.version).where(SchemaVersion.id == 1)).scalar()
+    except Exception:
+        return False  # No schema_version table yet
+    return version is not None and version >= SCHEMA_VERSION
+
+def stamp_schema_version():
+    """Record that the database is at SCHEMA_VERSION"""
+    db.session.merge(SchemaVersion(id=1, version=SCHEMA_VERSION, migrated_at=datetime.now()))
+    db.session.commit()
+
 # Routes
 @app.route('/health')
 def health():
@@ -177,8 +642,9 @@ def home():
 @app.route('/vocabulary')
 def vocabulary_index():
     """Vocabulary trainer dashboard"""
-    total_words = VocabularyWord.query.count()
-    words_today = VocabularyWord.query.filter_by(date_added=date.today()).count()
+    stats = dashboard_stats[get_user_profile().id].get()
+    total_words = stats['total_words']
+    words_today = stats['words_today']
 
     # Calculate progress from Sept 3, 2025
     start_date = date(2025, 9, 3)
@@ -190,8 +656,7 @@ def vocabulary_index():
     milestones = Milestone.query.order_by(Milestone.target_date).all()
     
     # Calculate average mastery
-    words = VocabularyWord.query.all()
-    avg_mastery = sum(w.mastery_level for w in words) / len(words) if words else 0
+    avg_mastery = stats['mastery_sum'] / total_words if total_words else 0
     
     return render_template('vocabulary/index.html', 
                          total_words=total_words,
@@ -212,7 +677,7 @@ def add_word():
 
         if word and definition:
             # Check if word already exists
-            existing = VocabularyWord.query.filter_by(word=word).first()
+            existing = db.session.query(VocabularyWord.id).filter_by(word=word).first()
             if existing:
                 flash(f'The word "{word}" already exists!', 'warning')
             else:
@@ -221,11 +686,17 @@ def add_word():
                     definition=definition,
                     synonyms=synonyms,
                     antonyms=antonyms,
-                    example_sentence=example_sentence,
-                    next_review_date=date.today() + timedelta(days=1)
+                    example_sentence=example_sentence
                 )
                 db.session.add(new_word)
+                db.session.flush()
+                add_word_states(word_ids=[new_word.id])
+                version = bump_word_bank_version()
+                # Detach the new word so the caches below read it without a reload after commit
+                db.session.expunge(new_word)
                 db.session.commit()
+                words_added([new_word], version)
+                update_similarity_index(new_word.id, new_word, version)
                 flash(f'Successfully added "{word}"!', 'success')
                 return redirect(url_for('view_words'))
         else:
@@ -233,26 +704,278 @@ def add_word():
 
     return render_template('vocabulary/add_word.html')
 
+def words_added(words, version):
+    """Push newly added words, committed at word bank `version`, into the caches"""
+    entries = [quiz_queue_entry(UserWordState(word_id=word.id, **UserWordState.initial_values()))
+               for word in words]
+    for queue in quiz_queues.values():
+        for entry in entries:
+            queue.update(*entry)
+    for index in distractor_indexes.values():
+        for word in words:
+            index.update(word.id, 0)
+    for stats in dashboard_stats.values():
+        for word in words:
+            stats.word_added(0, word.date_added == date.today())
+    word_bank_advanced(version)
+    word_bank.update([(word.id, word.word, word.definition) for word in words], version)
+    save_word_bank_later()
+
+# Words per transaction in bulk imports: one existing-word query and one multi-row INSERT each
+IMPORT_CHUNK_SIZE = 1000
+
+def import_words(records, chunk_size=IMPORT_CHUNK_SIZE):
+    """Bulk-insert word records one chunk per transaction, skipping words already present; returns counts"""
+    # A parse error stops the import; chunks before it stay committed
+    counts = {'inserted': 0, 'skipped': 0, 'invalid': 0}
+    max_length = VocabularyWord.__table__.c.word.type.length
+    seen = set()
+    dialect = db.engine.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        # Imported here: the PostgreSQL dialect module alone adds ~45 ms to cold starts
+        from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        upsert = sqlite_insert if dialect == 'sqlite' else postgresql_insert
+        insert = upsert(VocabularyWord).on_conflict_do_nothing(index_elements=['word'])
+    else:
+        insert = db.insert(VocabularyWord)  # The existing-word query alone guards against duplicates
+    insert = insert.returning(VocabularyWord.id)
+
+    try:
+        for chunk in chunked(records, chunk_size):
+            rows = []
+            for record in chunk:
+                if not record['word'] or not record['definition'] or len(record['word']) > max_length:
+                    counts['invalid'] += 1
+                elif record['word'] in seen:
+                    counts['skipped'] += 1
+                else:
+                    seen.add(record['word'])
+                    rows.append(record)
+            if not rows:
+                continue
+
+            db.session.commit()  # End any read transaction so each chunk gets its own write transaction
+            begin_write()
+            existing = set(db.session.scalars(
+                db.select(VocabularyWord.word).where(VocabularyWord.word.in_([row['word'] for row in rows]))))
+            rows = [row for row in rows if row['word'] not in existing]
+            word_ids = db.session.scalars(insert, rows).all() if rows else []
+            if word_ids:
+                add_word_states(word_ids=word_ids)
+                bump_word_bank_version()
+            db.session.commit()
+            counts['inserted'] += len(word_ids)
+            counts['skipped'] += len(existing) + len(rows) - len(word_ids)
+    finally:
+        if counts['inserted']:
+            # Rebuilt on next use, as after restoring words (also when a later chunk
+            # fails to parse); the similarity index notices the new words from the
+            # word bank version
+            quiz_queues.invalidate()
+            distractor_indexes.invalidate()
+            dashboard_stats.invalidate()
+            word_bank.invalidate()
+    return counts
+
+@app.route('/vocabulary/import_words', methods=['POST'])
+def import_words_upload():
+    """Import an uploaded word list (CSV, JSON Lines or Anki-style TSV)"""
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        flash('Please choose a file to import!', 'error')
+        return redirect(url_for('add_word'))
+    try:
+        file_format = detect_format(upload.filename)
+        stream = codecs.iterdecode(upload.stream, 'utf-8-sig')  # Decoded line by line as it is parsed
+        counts = import_words(parse_words(stream, file_format))
+    except (ValueError, UnicodeDecodeError) as e:
+        db.session.rollback()
+        flash(f'Could not import {upload.filename}: {e}', 'error')
+        return redirect(url_for('add_word'))
+
+    flash(f"Imported {counts['inserted']} words from {upload.filename} "
+          f"({counts['skipped']} already added or repeated, {counts['invalid']} invalid)", 'success')
+    return redirect(url_for('view_words'))
+
+@app.cli.command('import-words')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(sorted(PARSERS)),
+              help='File format (default: from the extension)')
+@click.option('--chunk-size', default=IMPORT_CHUNK_SIZE, show_default=True, help='Words per transaction')
+def import_words_command(path, file_format, chunk_size):
+    """Import a word list: CSV with a header row, JSON Lines, or Anki-style TSV"""
+    initialize_database_once()
+    try:
+        file_format = file_format or detect_format(path)
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            counts = import_words(parse_words(stream, file_format), chunk_size)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Inserted {counts['inserted']}, skipped {counts['skipped']} (already added or repeated), "
+               f"{counts['invalid']} invalid")
+
+# Keyset ordering for each word list sort mode: (column, descending)
+WORD_SORTS = {
+    'date_desc': [(VocabularyWord.date_added, True), (VocabularyWord.id, True)],
+    'date_asc': [(VocabularyWord.date_added, False), (VocabularyWord.id, False)],
+    'alpha': [(VocabularyWord.word, False), (VocabularyWord.id, False)],
+    'mastery': [(UserWordState.mastery_level, True), (UserWordState.word_id, False)],
+}
+
+def learner_words(user_id):
+    """(word, state) rows for every word, with the given learner's state for it"""
+    learner = UserWordState.user_id == user_id
+    if db.engine.dialect.name == 'sqlite':
+        # Without ANALYZE statistics SQLite takes user_id = ? to be selective and reads the
+        # learner's states first, then sorts them all; likely() marks it as matching most rows,
+        # so date and alphabetical pages walk the word indexes and stop at the LIMIT instead
+        learner = db.func.likely(learner)
+    return (db.session.query(VocabularyWord, UserWordState)
+            .join(UserWordState, UserWordState.word_id == VocabularyWord.id)
+            .filter(learner))
+
+def encode_cursor(row, sort_by):
+    """Opaque cursor holding the sort key of the last (word, state) row on a page"""
+    word, state = row
+    values = [getattr(state if column.class_ is UserWordState else word, column.key)
+              for column, _ in WORD_SORTS[sort_by]]
+    values = [v.isoformat() if isinstance(v, date) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+def decode_cursor(cursor, sort_by):
+    """Sort key values from a cursor; raises ValueError if it is malformed, truncated or for another sort"""
+    columns = [column for column, _ in WORD_SORTS[sort_by]]
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError
+        values = [date.fromisoformat(v) if column.key == 'date_added' else v for column, v in zip(columns, values)]
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor") from None
+    if not all(isinstance(v, column.type.python_type) and not isinstance(v, bool)
+               for column, v in zip(columns, values)):
+        raise ValueError("Invalid cursor")
+    return values
+
+def words_query(user_id, sort_by, cursor=None):
+    """A learner's (word, state) rows in sort order, starting after the cursor if one is given"""
+    order = WORD_SORTS[sort_by]
+    query = learner_words(user_id)
+    if cursor:
+        values = decode_cursor(cursor, sort_by)
+        # Rows strictly after the cursor in (k1, k2, ...) lexicographic order
+        conditions = []
+        for i, ((column, descending), value) in enumerate(zip(order, values)):
+            after = column < value if descending else column > value
+            conditions.append(db.and_(*[c == v for (c, _), v in zip(order[:i], values[:i])], after))
+        # The redundant bound on the leading column lets the index seek straight to the cursor
+        (first, descending), first_value = order[0], values[0]
+        query = query.filter(first <= first_value if descending else first >= first_value,
+                             db.or_(*conditions))
+    return (query.options(WORD_TEXT)
+            .order_by(*[column.desc() if descending else column.asc() for column, descending in order]))
+
+def words_page(user_id, sort_by, cursor=None, limit=50):
+    """One keyset page of (word, state) rows; returns (rows, next_cursor), ValueError for a bad cursor"""
+    words = words_query(user_id, sort_by, cursor).limit(limit + 1).all()
+    next_cursor = encode_cursor(words[limit - 1], sort_by) if len(words) > limit else None
+    return words[:limit], next_cursor
+
 @app.route('/vocabulary/words')
 def view_words():
-    """View all vocabulary words"""
+    """View vocabulary words, one keyset page at a time"""
     sort_by = request.args.get('sort', 'date_desc')
-    
-    if sort_by == 'date_asc':
-        words = VocabularyWord.query.order_by(VocabularyWord.date_added.asc()).all()
-    elif sort_by == 'alpha':
-        words = VocabularyWord.query.order_by(VocabularyWord.word.asc()).all()
-    elif sort_by == 'mastery':
-        words = VocabularyWord.query.order_by(VocabularyWord.mastery_level.desc()).all()
-    else:  # date_desc
-        words = VocabularyWord.query.order_by(VocabularyWord.date_added.desc()).all()
-    
-    return render_template('vocabulary/view_words.html', words=words, sort_by=sort_by)
+    if sort_by not in WORD_SORTS:
+        sort_by = 'date_desc'
+
+    user_id = get_user_profile().id
+    try:
+        words, next_cursor = words_page(user_id, sort_by, request.args.get('cursor'))
+    except ValueError:
+        abort(400)  # A tampered or truncated cursor; serving page 1 again would repeat words
+
+    return render_template('vocabulary/view_words.html',
+                         words=words,
+                         sort_by=sort_by,
+                         next_cursor=next_cursor,
+                         total_words=dashboard_stats[user_id].get()['total_words'])
+
+def iter_words(user_id, sort_by, batch_size=500):
+    """A learner's (word, state) rows in sort order, streamed batch_size rows at a time"""
+    yield from words_query(user_id, sort_by).yield_per(batch_size)
+
+def stream_page(template_name, buffer_size=100, **context):
+    """Render a template as a streamed response, sent as it is generated"""
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(buffer_size)  # Send chunks of ~buffer_size template events, not single tokens
+    return Response(stream_with_context(stream), mimetype='text/html')
+
+@app.route('/vocabulary/words/all')
+def view_all_words():
+    """View every word on one page, streamed so memory stays flat"""
+    sort_by = request.args.get('sort', 'date_desc')
+    if sort_by not in WORD_SORTS:
+        sort_by = 'date_desc'
+
+    user_id = get_user_profile().id
+    return stream_page('vocabulary/view_words.html',
+                       words=iter_words(user_id, sort_by),
+                       sort_by=sort_by,
+                       next_cursor=None,
+                       show_all=True,
+                       total_words=dashboard_stats[user_id].get()['total_words'])
+
+@app.route('/vocabulary/words/print')
+def print_words():
+    """Printable list of every word, streamed"""
+    sort_by = request.args.get('sort', 'alpha')
+    if sort_by not in WORD_SORTS:
+        sort_by = 'alpha'
+
+    user_id = get_user_profile().id
+    return stream_page('vocabulary/print_words.html',
+                       words=iter_words(user_id, sort_by),
+                       total_words=dashboard_stats[user_id].get()['total_words'],
+                       today=date.today())
+
+@app.route('/vocabulary/api/words')
+def words_api():
+    """JSON page of words for lazy loading (keyset paginated)"""
+    sort_by = request.args.get('sort', 'date_desc')
+    if sort_by not in WORD_SORTS:
+        return jsonify({'error': f'Unknown sort "{sort_by}"'}), 400
+    limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+
+    try:
+        words, next_cursor = words_page(get_user_profile().id, sort_by, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    return jsonify({
+        'words': [{
+            'id': w.id,
+            'word': w.word,
+            'definition': w.definition,
+            'synonyms': w.synonyms,
+            'antonyms': w.antonyms,
+            'example_sentence': w.example_sentence,
+            'date_added': w.date_added.isoformat() if w.date_added else None,
+            'mastery_level': state.mastery_level,
+            'accuracy': state.get_accuracy(),
+            'times_reviewed': state.times_reviewed,
+            'streak': state.streak
+        } for w, state in words],
+        'html': ''.join(render_template('vocabulary/_word_card.html', word=w, state=state) for w, state in words),
+        'next_cursor': next_cursor
+    })
 
 @app.route('/vocabulary/edit_word/<int:word_id>', methods=['GET', 'POST'])
 def edit_word(word_id):
     """Edit an existing vocabulary word"""
-    word = VocabularyWord.query.get_or_404(word_id)
+    word = db.session.get(VocabularyWord, word_id, options=[WORD_TEXT]) or abort(404)
+    state = db.session.get(UserWordState, (get_user_profile().id, word_id))
 
     if request.method == 'POST':
         word.word = request.form.get('word', '').strip()
@@ -262,40 +985,120 @@ def edit_word(word_id):
         word.example_sentence = request.form.get('example_sentence', '').strip()
 
         if word.word and word.definition:
+            version = bump_word_bank_version()
+            db.session.flush()
+            db.session.expunge(word)  # As in add_word: no reload after commit
             db.session.commit()
+            word_bank_advanced(version)  # Text only: the quiz indexes hold no word text
+            word_bank.update([(word.id, word.word, word.definition)], version)
+            save_word_bank_later()
+            update_similarity_index(word.id, word, version)
             flash(f'Successfully updated "{word.word}"!', 'success')
             return redirect(url_for('view_words'))
         else:
             flash('Word and definition are required!', 'error')
 
-    return render_template('vocabulary/edit_word.html', word=word)
+    return render_template('vocabulary/edit_word.html', word=word, state=state)
 
 @app.route('/vocabulary/delete_word/<int:word_id>')
 def delete_word(word_id):
     """Delete a vocabulary word - with protection for important words"""
     word = VocabularyWord.query.get_or_404(word_id)
+    # Every learner's counters for the word, to take out of their cached statistics
+    states = {row.user_id: (row.mastery_level, row.times_reviewed, row.times_correct)
+              for row in db.session.query(UserWordState.user_id, UserWordState.mastery_level,
+                                          UserWordState.times_reviewed, UserWordState.times_correct)
+                                   .filter(UserWordState.word_id == word_id)}
 
     # Optional: Add protection for high-mastery words
-    if word.mastery_level >= 80:
-        flash(f'Are you sure you want to delete "{word.word}"? It has {word.mastery_level}% mastery!', 'warning')
+    mastery_level = states.get(get_user_profile().id, (0,))[0]
+    if mastery_level >= 80:
+        flash(f'Are you sure you want to delete "{word.word}"? It has {mastery_level}% mastery!', 'warning')
 
     word_name = word.word
+    added_today = word.date_added == date.today()
+    UserWordState.query.filter_by(word_id=word_id).delete(synchronize_session=False)
     db.session.delete(word)
+    version = bump_word_bank_version()
     db.session.commit()
+    for user_id, stats in dashboard_stats.items():
+        if user_id in states:
+            stats.word_deleted(*states[user_id], added_today)
+        else:
+            stats.invalidate()
+    for queue in quiz_queues.values():
+        queue.discard(word_id)
+    for index in distractor_indexes.values():
+        index.discard(word_id)
+    word_bank_advanced(version)
+    word_bank.discard(word_id, version)
+    save_word_bank_later()
+    update_similarity_index(word_id, version=version)
     flash(f'Deleted "{word_name}"', 'info')
     return redirect(url_for('view_words'))
 
-@app.route('/vocabulary/quiz')
-def quiz():
-    """Start an adaptive vocabulary quiz"""
-    # Get or create user profile
-    user = UserProfile.query.first()
-    if not user:
-        user = UserProfile()
-        db.session.add(user)
-        db.session.commit()
-
-    # Check streak
+def begin_write():
+    """Start the session's transaction as a write transaction (BEGIN IMMEDIATE on SQLite)"""
+    # Without it pysqlite reads outside a transaction, so two answers could read the same counters
+    db.session.connection(execution_options={'sqlite_begin': 'IMMEDIATE'})
+
+def get_user_profile():
+    """The current learner's profile (picked on the learners page, else the first, created if none)"""
+    user_id = session.get('user_id') if has_request_context() else None
+    user = db.session.get(UserProfile, user_id) if user_id else None
+    if user is None:
+        user = UserProfile.query.order_by(UserProfile.id).first() or add_learner()
+    return user
+
+def add_learner(username="Sophia"):
+    """Create a learner profile with a fresh state for every word"""
+    user = UserProfile(username=username)
+    db.session.add(user)
+    db.session.flush()
+    add_word_states(user_id=user.id)
+    db.session.commit()
+    return user
+
+def add_word_states(user_id=None, word_ids=None):
+    """Insert the missing (learner, word) state rows in one INSERT ... SELECT"""
+    pairs = (db.select(UserProfile.id, VocabularyWord.id)
+             .select_from(UserProfile)
+             .join(VocabularyWord, db.true())
+             .where(~db.exists().where(UserWordState.user_id == UserProfile.id,
+                                       UserWordState.word_id == VocabularyWord.id)))
+    if user_id is not None:
+        pairs = pairs.where(UserProfile.id == user_id)
+    if word_ids is not None:
+        pairs = pairs.where(VocabularyWord.id.in_(word_ids))
+    # Column defaults (mastery 0, interval 1, ...) are rendered into the SELECT
+    db.session.execute(db.insert(UserWordState).from_select(['user_id', 'word_id'], pairs))
+
+@app.route('/vocabulary/learners', methods=['GET', 'POST'])
+def learners():
+    """List learners, and add a new one"""
+    if request.method == 'POST':
+        username = request.form.get('username', '').strip()
+        if username:
+            user = add_learner(username)
+            session['user_id'] = user.id
+            flash(f'Welcome, {username}!', 'success')
+            return redirect(url_for('vocabulary_index'))
+        flash('Please enter a name!', 'error')
+
+    return render_template('vocabulary/learners.html',
+                         learners=UserProfile.query.order_by(UserProfile.username, UserProfile.id).all(),
+                         current_id=get_user_profile().id)
+
+@app.route('/vocabulary/learners/<int:user_id>')
+def switch_learner(user_id):
+    """Make another learner the current one for this browser"""
+    user = UserProfile.query.get_or_404(user_id)
+    session['user_id'] = user.id
+    flash(f'Now studying as {user.username}', 'info')
+    return redirect(url_for('vocabulary_index'))
+
+def update_study_streak(user):
+    """Advance the daily study streak the first time the learner studies today"""
     if user.last_study_date != date.today():
         if user.last_study_date == date.today() - timedelta(days=1):
             user.current_streak += 1
@@ -305,84 +1108,333 @@ def quiz():
         user.longest_streak = max(user.longest_streak, user.current_streak)
         db.session.commit()
 
-    # Adaptive word selection based on user's current difficulty level
-    all_words = VocabularyWord.query.all()
-
-    if len(all_words) < 4:
-        flash('You need at least 4 words to start a quiz!', 'warning')
-        return redirect(url_for('vocabulary_index'))
-
-    # Calculate each word's priority score for selection
-    word_priorities = []
-    for word in all_words:
-        # Factors for word selection:
-        # 1. Spaced repetition: Is it time to review?
-        days_since_review = (date.today() - word.last_reviewed.date()).days if word.last_reviewed else 999
-        needs_review = days_since_review >= word.review_interval
-
-        # 2. Difficulty match: How close is word difficulty to user's level?
-        word.difficulty_score = word.calculate_difficulty()
-        difficulty_match = 100 - abs(word.difficulty_score - user.current_difficulty)
-
-        # 3. Mastery gap: Lower mastery = higher priority
-        mastery_gap = 100 - word.mastery_level
-
-        # 4. Recent mistakes: Boost if recently answered incorrectly
-        mistake_boost = 50 if word.streak == 0 and word.times_reviewed > 0 else 0
+def profile_view(user=None):
+    """An unsaved copy of the learner's profile with pending answer deltas applied"""
+    user = user or get_user_profile()
+    pending = (ProfileDelta.query.filter_by(profile_id=user.id)
+               .order_by(ProfileDelta.id).all())
+    view = UserProfile(**{column.key: getattr(user, column.key)
+                          for column in UserProfile.__table__.columns})
+    for delta in pending:
+        view.apply_answer(delta.correct, delta.xp)
+    view.pending_deltas = len(pending)
+    return view
+
+def fold_profile_deltas(profile_id):
+    """Fold a learner's pending answer deltas into their UserProfile row in one write transaction"""
+    db.session.commit()  # End any read transaction so the fold gets its own write transaction
+    begin_write()
+    user = UserProfile.query.filter_by(id=profile_id).with_for_update().one_or_none()
+    if user is None:
+        db.session.rollback()
+        return 0
+    deltas = (ProfileDelta.query.filter_by(profile_id=profile_id)
+              .order_by(ProfileDelta.id).all())
+    for delta in deltas:
+        user.apply_answer(delta.correct, delta.xp)
+    if deltas:
+        # Only the rows applied above: under READ COMMITTED a delta with a lower id can commit meanwhile
+        ProfileDelta.query.filter(ProfileDelta.id.in_([delta.id for delta in deltas])).delete(
+            synchronize_session=False)
+    db.session.commit()
+    return len(deltas)
 
-        # Calculate priority score
-        priority = (
-            (needs_review * 100) +  # Highest weight for spaced repetition
-            (difficulty_match * 0.5) +  # Medium weight for difficulty matching
-            (mastery_gap * 0.3) +  # Lower weight for mastery
-            mistake_boost
-        )
+def fold_profile_deltas_if_due(user):
+    """Fold once enough deltas are pending (PROFILE_FOLD_SIZE)"""
+    if user.pending_deltas >= app.config['PROFILE_FOLD_SIZE']:
+        fold_profile_deltas(user.id)
 
-        word_priorities.append((word, priority))
+@app.route('/vocabulary/quiz')
+def quiz():
+    """Start an adaptive vocabulary quiz (questions are loaded from the session API)"""
+    user = get_user_profile()
+    update_study_streak(user)
+    user = profile_view(user)
 
-    # Sort by priority and select top words for quiz pool
-    word_priorities.sort(key=lambda x: x[1], reverse=True)
-    quiz_pool = [w[0] for w in word_priorities[:min(20, len(word_priorities))]]
+    if count_words() < 4:
+        flash('You need at least 4 words to start a quiz!', 'warning')
+        return redirect(url_for('vocabulary_index'))
 
-    # Select question word with some randomness to avoid predictability
-    if random.random() < 0.8:  # 80% chance to pick from top priority
-        question_word = quiz_pool[0]
-    else:  # 20% chance for variety
-        question_word = random.choice(quiz_pool[:5])
+    return render_template('vocabulary/quiz.html',
+                         user=user,
+                         difficulty=get_difficulty_level(user.confidence_score))
+
+@app.route('/vocabulary/api/quiz/session')
+def quiz_session():
+    """Build a whole adaptive quiz in one pass and return it as JSON"""
+    count = max(1, min(request.args.get('count', 10, type=int), 20))
+
+    user = get_user_profile()
+    update_study_streak(user)
+    user = profile_view(user)
+
+    # Only the top-priority quiz pool is loaded, never the learner's full word state
+    versions = cache_versions(user.id)
+    quiz_pool = get_quiz_pool(user.id, user.current_difficulty, versions)
+    # The queue holds a state per word, so it gives the count without scanning the word table
+    word_count = len(quiz_queues[user.id]) if app.config['QUIZ_PRIORITY_QUEUE'] else count_words()
+    if word_count < 4:
+        return jsonify({'error': 'You need at least 4 words to start a quiz!'}), 400
+
+    # Select question words with some randomness to avoid predictability
+    question_words = []
+    remaining = list(quiz_pool)
+    while remaining and len(question_words) < count:
+        if random.random() < 0.8:  # 80% chance to pick from top priority
+            question_words.append(remaining.pop(0))
+        else:  # 20% chance for variety
+            question_words.append(remaining.pop(random.randrange(min(5, len(remaining)))))
 
     # Adaptive difficulty for wrong answers
     difficulty_level = get_difficulty_level(user.confidence_score)
+    distractor_sets = select_session_distractors(user.id, [word for word, _ in question_words],
+                                                 difficulty_level, versions)
+
+    questions = []
+    for (question_word, state), distractors in zip(question_words, distractor_sets):
+        options = [question_word] + distractors
+        random.shuffle(options)
+        questions.append({
+            'id': question_word.id,
+            'word': question_word.word,
+            'streak': state.streak,
+            'options': [{'id': w.id, 'definition': w.definition} for w in options]
+        })
 
-    # Create multiple choice options with adaptive difficulty
-    options = [question_word]
-
-    # Get distractor words based on difficulty
-    other_words = [w for w in all_words if w.id != question_word.id]
+    return jsonify({
+        'difficulty': difficulty_level,
+        'user': {
+            'level': user.level,
+            'xp': user.experience_points,
+            'current_streak': user.current_streak,
+            'confidence': user.confidence_score
+        },
+        'questions': questions
+    })
 
-    if difficulty_level == "Expert":
+def select_quiz_pool(user_id, current_difficulty, limit=20):
+    """Return a learner's top-priority quiz candidates as (word, state) rows, scored and sorted by the database"""
+    priority = UserWordState.priority_expression(current_difficulty)
+    return (learner_words(user_id)
+            .options(QUIZ_TEXT)
+            .order_by(priority.desc(), UserWordState.word_id)
+            .limit(limit)
+            .all())
+
+def quiz_queue_entry(state):
+    """Priority queue inputs for a learner's word state (accepts ORM objects or column-only rows)"""
+    difficulty = UserWordState.difficulty_for(state.times_reviewed, state.times_correct,
+                                              state.last_response_time)
+    mastery_gap = 100 - state.mastery_level
+    mistake_boost = 50 if state.streak == 0 and state.times_reviewed > 0 else 0
+    # Never-reviewed words are always due
+    next_due = state.next_review_date if state.last_reviewed else None
+    return state.word_id, difficulty, mastery_gap * 0.3 + mistake_boost, next_due
+
+def get_quiz_pool(user_id, current_difficulty, versions, limit=20):
+    """A learner's quiz pool as (word, state) rows, from their priority queue (or SQL when disabled)"""
+    if not app.config['QUIZ_PRIORITY_QUEUE']:
+        return select_quiz_pool(user_id, current_difficulty, limit)
+
+    quiz_queue = quiz_queues[user_id]
+    if not quiz_queue.is_fresh(versions):
+        # Imported here: NumPy costs ~60 ms of startup and only queue rebuilds use it
+        from scoring import HAVE_NUMPY, ScoringColumns
+
+        rows = (db.session.query(*(getattr(UserWordState, f) for f in ScoringColumns.FIELDS))
+                .filter(UserWordState.user_id == user_id).all())
+        if HAVE_NUMPY:
+            # Score the whole word bank in one vectorized pass
+            entries = ScoringColumns.from_rows(rows).queue_entries()
+        else:
+            entries = (quiz_queue_entry(row) for row in rows)
+        quiz_queue.rebuild(entries, date.today(), versions)
+
+    word_ids = quiz_queue.top(current_difficulty, date.today(), limit)
+    if app.config['WORD_SNAPSHOT']:
+        # Only the learner's state rows are loaded; the words come from the snapshot
+        words = word_bank_snapshot().lookup(word_ids)
+        rows = {state.word_id: (words[state.word_id], state) for state in
+                UserWordState.query.filter(UserWordState.user_id == user_id, UserWordState.word_id.in_(word_ids))
+                if state.word_id in words}
+    else:
+        rows = {word.id: (word, state) for word, state in
+                learner_words(user_id).options(QUIZ_TEXT).filter(UserWordState.word_id.in_(word_ids))}
+    return [rows[word_id] for word_id in word_ids if word_id in rows]
+
+def word_bank_snapshot():
+    """The word bank snapshot, kept current, loaded from the saved file or rebuilt (and saved)"""
+    version = word_bank_version()
+    if word_bank.is_current(version) or word_bank.load(version):
+        return word_bank
+    word_bank.rebuild(db.session.query(*(getattr(VocabularyWord, f) for f in WordBankSnapshot.FIELDS)), version)
+    save_word_bank()
+    return word_bank
+
+def save_word_bank():
+    """Persist the word snapshot so new instances start warm"""
+    try:
+        word_bank.save()
+    except OSError as e:
+        app.logger.warning(f"Could not save word snapshot: {e}")
+
+_word_bank_save_lock = threading.Lock()
+_word_bank_save_timer = None
+
+def save_word_bank_later():
+    """Save the word snapshot once, WORD_SNAPSHOT_SAVE_DELAY seconds after the first unsaved word write"""
+    # A save rewrites the whole file; one left behind by an exiting process is rebuilt from its version
+    global _word_bank_save_timer
+    if app.config['WORD_SNAPSHOT_SAVE_DELAY'] <= 0:
+        save_word_bank()
+        return
+    with _word_bank_save_lock:
+        if _word_bank_save_timer is None:
+            _word_bank_save_timer = threading.Timer(app.config['WORD_SNAPSHOT_SAVE_DELAY'], _save_word_bank_now)
+            _word_bank_save_timer.daemon = True
+            _word_bank_save_timer.start()
+
+def _save_word_bank_now():
+    global _word_bank_save_timer
+    with _word_bank_save_lock:
+        # Cleared first: a write from here on schedules another save, as this one may not include it
+        _word_bank_save_timer = None
+    save_word_bank()
+
+def select_session_distractors(user_id, question_words, difficulty_level, versions, count=3):
+    """Pick wrong-answer options for every question of a session with a single word query"""
+    question_ids = {w.id for w in question_words}
+    # Enough candidates that each question still has a full set after excluding itself
+    limit = 10 + len(question_ids)
+    use_index = app.config['QUIZ_PRIORITY_QUEUE']
+    distractor_index = distractor_indexes[user_id]
+    if use_index and not distractor_index.is_fresh(versions):
+        distractor_index.rebuild(db.session.query(UserWordState.word_id, UserWordState.mastery_level)
+                                 .filter(UserWordState.user_id == user_id), versions)
+
+    if difficulty_level in ("Expert", "Hard"):
         # Expert: Very similar meanings or commonly confused words
-        # Sort by similarity (you could implement semantic similarity here)
-        distractors = random.sample(other_words, min(3, len(other_words)))
-    elif difficulty_level == "Hard":
         # Hard: Mix of similar and different words
-        distractors = random.sample(other_words, min(3, len(other_words)))
+        sample_size = count * len(question_ids) + limit
+        if use_index:
+            candidate_ids = distractor_index.sample(sample_size)
+        else:
+            candidate_ids = [row.id for row in db.session.query(VocabularyWord.id)
+                             .order_by(db.func.random()).limit(sample_size)]
+        keep = len(candidate_ids)
     elif difficulty_level == "Medium":
         # Medium: Reasonably different words
-        distractors = sorted(other_words, key=lambda w: abs(w.mastery_level - 50))[:10]
-        distractors = random.sample(distractors, min(3, len(distractors)))
+        if use_index:
+            candidate_ids = distractor_index.closest_to(50, limit)
+        else:
+            candidate_ids = [row.word_id for row in db.session.query(UserWordState.word_id)
+                             .filter(UserWordState.user_id == user_id)
+                             .order_by(db.func.abs(UserWordState.mastery_level - 50), UserWordState.word_id)
+                             .limit(limit)]
+        keep = 10
     else:  # Easy
         # Easy: Very different, well-mastered words as distractors
-        distractors = sorted(other_words, key=lambda w: -w.mastery_level)[:10]
-        distractors = random.sample(distractors, min(3, len(distractors)))
-
-    options.extend(distractors)
-    random.shuffle(options)
-
-    return render_template('vocabulary/quiz.html',
-                         question_word=question_word,
-                         options=options,
-                         user=user,
-                         difficulty=difficulty_level)
+        if use_index:
+            candidate_ids = distractor_index.highest_mastery(limit)
+        else:
+            candidate_ids = [row.word_id for row in db.session.query(UserWordState.word_id)
+                             .filter(UserWordState.user_id == user_id)
+                             .order_by(UserWordState.mastery_level.desc(), UserWordState.word_id)
+                             .limit(limit)]
+        keep = 10
+
+    if difficulty_level in ("Expert", "Hard"):
+        ensure_similarity_index()
+
+    distractor_id_sets = []
+    for question_word in question_words:
+        others = [word_id for word_id in candidate_ids if word_id != question_word.id][:keep]
+        if difficulty_level == "Expert":
+            # Expert: the most confusable words
+            similar = similarity_index.similar(question_word.id, 5)
+            distractor_ids = random.sample(similar, min(count, len(similar)))
+        elif difficulty_level == "Hard":
+            # Hard: one or two confusable words, the rest random
+            similar = similarity_index.similar(question_word.id, 10)
+            distractor_ids = random.sample(similar, min(random.randint(1, 2), len(similar)))
+        else:
+            distractor_ids = []
+        others = [word_id for word_id in others if word_id not in distractor_ids]
+        distractor_ids += random.sample(others, min(count - len(distractor_ids), len(others)))
+        distractor_id_sets.append(distractor_ids)
+
+    # Load every chosen distractor in one query (or none, from the snapshot)
+    needed = {word_id for ids in distractor_id_sets for word_id in ids}
+    words = load_quiz_words(needed)
+    distractor_sets = [[words[word_id] for word_id in ids if word_id in words] for ids in distractor_id_sets]
+
+    short = [i for i, distractors in enumerate(distractor_sets) if len(distractors) < count]
+    if short:
+        # Chosen ids can be gone (a word deleted since an index was built), and Expert/Hard
+        # picks can come up short; top up from the mastery index so every question keeps
+        # its full set of options
+        spare_size = count * len(short) + limit
+        if use_index:
+            spare_ids = distractor_index.sample(spare_size)
+        else:
+            spare_ids = [row.word_id for row in db.session.query(UserWordState.word_id)
+                         .filter(UserWordState.user_id == user_id)
+                         .order_by(db.func.random()).limit(spare_size)]
+        spare = load_quiz_words(set(spare_ids) - set(words))
+        spare.update((word_id, words[word_id]) for word_id in spare_ids if word_id in words)
+        spare_ids = [word_id for word_id in spare_ids if word_id in spare]
+        for i in short:
+            distractors = distractor_sets[i]
+            taken = {w.id for w in distractors} | {question_words[i].id}
+            for word_id in spare_ids:
+                if len(distractors) >= count:
+                    break
+                if word_id not in taken:
+                    distractors.append(spare[word_id])
+                    taken.add(word_id)
+    return distractor_sets
+
+def load_quiz_words(word_ids):
+    """Quiz text of the given words by id, from the snapshot or in one query"""
+    if app.config['WORD_SNAPSHOT']:
+        return word_bank_snapshot().lookup(word_ids)
+    return {w.id: w for w in VocabularyWord.query.options(QUIZ_TEXT).filter(VocabularyWord.id.in_(word_ids))}
+
+def count_words():
+    """Number of words, as a bare COUNT (Query.count() wraps a subquery selecting every column)"""
+    return db.session.query(db.func.count(VocabularyWord.id)).scalar()
+
+def save_similarity_index():
+    """Persist the similarity index so cold starts can skip rebuilding it"""
+    try:
+        similarity_index.save()
+    except OSError as e:
+        app.logger.warning(f"Could not save similarity index: {e}")
+
+def ensure_similarity_index():
+    """Load the saved similarity index, or rebuild it if it was built at another word bank version"""
+    signature = word_bank_version()
+    if similarity_index.signature == signature:
+        return
+    if similarity_index.load() and similarity_index.signature == signature:
+        return
+    rows = db.session.query(VocabularyWord.id, VocabularyWord.word, VocabularyWord.definition,
+                            VocabularyWord.synonyms, VocabularyWord.antonyms)
+    similarity_index.fit(rows, signature)
+    save_similarity_index()
+
+def update_similarity_index(word_id, word=None, version=None):
+    """Apply an added/edited word (or a deletion when word is None) committed at word bank `version`"""
+    if similarity_index.signature is None and not similarity_index.load():
+        return  # Nothing built yet; the next Expert/Hard quiz builds it
+    # Only an index at the version just before this write is current afterwards; one that
+    # missed a write (another process wrote in between) is rebuilt on next use
+    signature = version if version is not None and similarity_index.signature == version - 1 else None
+    if word is None:
+        similarity_index.discard(word_id, signature)
+    else:
+        similarity_index.update(word.id, word.word, word.definition, word.synonyms, word.antonyms, signature)
+    save_similarity_index()
 
 def get_difficulty_level(confidence_score):
     """Get difficulty level based on confidence score"""
@@ -395,39 +1447,34 @@ def get_difficulty_level(confidence_score):
     else:
         return "Easy"
 
-@app.route('/vocabulary/quiz/check', methods=['POST'])
-def check_quiz():
-    """Check quiz answer with adaptive learning updates"""
-    word_id = request.form.get('word_id', type=int)
-    answer_id = request.form.get('answer_id', type=int)
-    response_time = request.form.get('response_time', type=float, default=5.0)
-
-    word = VocabularyWord.query.get_or_404(word_id)
-    user = UserProfile.query.first()
-    if not user:
-        user = UserProfile()
-        db.session.add(user)
-
-    # Update word statistics
-    word.times_reviewed += 1
-    word.last_reviewed = datetime.now()
-    word.last_response_time = response_time
-
+def record_answer(word_id, answer_id, response_time, events=None, user=None):
+    """Apply one quiz answer as an atomic UPDATE ... RETURNING plus a ProfileDelta; returns (state, result)"""
+    # (None, None) if the word doesn't exist; batches pass one profile_view() as user, and the review
+    # event is appended to events, if given, for the write-behind log once the transaction commits
     is_correct = (word_id == answer_id)
-
-    # Calculate XP and difficulty adjustments
+    now = datetime.now()
+    if user is None:
+        user = profile_view()
+
+    # Update the learner's word statistics
+    update_state = (db.update(UserWordState)
+                    .where(UserWordState.user_id == user.id, UserWordState.word_id == word_id)
+                    .values(**UserWordState.answer_values(is_correct, response_time, now))
+                    .returning(UserWordState)
+                    .execution_options(synchronize_session=False))
+    state = db.session.execute(update_state).scalar_one_or_none()
+    word = db.session.get(VocabularyWord, word_id, options=[QUIZ_TEXT])
+    if word is None:
+        return None, None
+    if state is None:
+        # The word was added while this learner was being created; give it a state now
+        add_word_states(user_id=user.id, word_ids=[word_id])
+        state = db.session.execute(update_state).scalar_one()
+
+    # Calculate XP bonuses (they depend on the word's new streak)
     base_xp = 10
     difficulty_bonus = 1.0
-
     if is_correct:
-        word.times_correct += 1
-        word.streak += 1
-
-        # Adaptive mastery increase based on streak
-        mastery_increase = 10 + (word.streak * 2)  # Bonus for streaks
-        word.mastery_level = min(word.mastery_level + mastery_increase, 100)
-
-        # XP calculation with bonuses
         if response_time < 3:
             difficulty_bonus = 1.5  # Fast response bonus
             message = "⚡ Lightning fast! Excellent! 🌟"
@@ -438,66 +1485,142 @@ def check_quiz():
             message = "Correct! Well done! ✨"
 
         # Streak bonus
-        if word.streak >= 3:
+        if state.streak >= 3:
             difficulty_bonus += 0.5
-            message += f" (🔥 {word.streak} streak!)"
-
-        # Update user confidence (increase)
-        user.update_confidence(min(100, user.confidence_score + 5))
-
-        # Adjust difficulty upward if doing well
-        if user.confidence_score > 70:
-            user.current_difficulty = min(100, user.current_difficulty + 2)
-
+            message += f" (🔥 {state.streak} streak!)"
     else:
-        word.streak = 0
-        word.mastery_level = max(word.mastery_level - 5, 0)
-        correct_word = VocabularyWord.query.get(word_id)
-        message = f"Not quite. The answer was: {correct_word.definition}"
-
+        message = f"Not quite. The answer was: {word.definition}"
         # Reduce XP for incorrect answers
         base_xp = 3
 
-        # Update user confidence (decrease)
-        user.update_confidence(max(0, user.confidence_score - 10))
-
-        # Adjust difficulty downward if struggling
-        if user.confidence_score < 30:
-            user.current_difficulty = max(10, user.current_difficulty - 5)
-        else:
-            user.current_difficulty = max(10, user.current_difficulty - 2)
-
-    # Update spaced repetition
-    word.update_spaced_repetition(is_correct)
-    word.difficulty_score = word.calculate_difficulty()
-
-    # Add experience points
-    level_up, xp_gained = user.add_experience(base_xp, difficulty_bonus)
+    # Update user confidence, difficulty and XP
+    difficulty_level = get_difficulty_level(user.confidence_score)
+    xp_gained = int(base_xp * difficulty_bonus * user.learning_rate)
+    level_up = user.apply_answer(is_correct, xp_gained)
+    db.session.add(ProfileDelta(profile_id=user.id, correct=is_correct, xp=xp_gained))
+    user.pending_deltas += 1
 
-    # Check for achievements
+    # Check for achievements (the quiz pages show their message as is)
     achievements = []
     if level_up:
-        achievements.append({"type": "level_up", "level": user.level})
-    if word.mastery_level >= 100 and is_correct:
-        achievements.append({"type": "word_mastered", "word": word.word})
-    if word.streak == 5:
-        achievements.append({"type": "streak_5", "word": word.word})
-
-    db.session.commit()
+        achievements.append({"type": "level_up", "level": user.level,
+                             "message": f"You reached Level {user.level}!"})
+    if state.mastery_level >= 100 and is_correct:
+        achievements.append({"type": "word_mastered", "word": word.word,
+                             "message": f'Mastered "{word.word}"!'})
+    if state.streak == 5:
+        achievements.append({"type": "streak_5", "word": word.word,
+                             "message": f'5 streak on "{word.word}"!'})
+
+    if events is not None:
+        events.append({
+            'user_id': user.id,
+            'word_id': word.id,
+            'answer_id': answer_id,
+            'correct': is_correct,
+            'response_time': response_time,
+            'timestamp': state.last_reviewed,
+            'difficulty_level': difficulty_level
+        })
 
-    return jsonify({
+    return state, {
         'correct': is_correct,
         'message': message,
-        'mastery_level': word.mastery_level,
+        'mastery_level': state.mastery_level,
         'correct_definition': word.definition,
         'xp_gained': xp_gained,
         'user_level': user.level,
         'user_xp': user.experience_points,
-        'streak': word.streak,
+        'streak': state.streak,
         'achievements': achievements,
         'confidence': user.confidence_score,
         'difficulty': get_difficulty_level(user.confidence_score)
-    })
+    }
+
+def answering_learner():
+    """profile_view() of the current learner, read inside a new write transaction (begin_write())"""
+    # Resolved first: creating the first learner commits, which would end the write transaction early
+    user = get_user_profile()
+    db.session.commit()
+    begin_write()
+    return profile_view(user)
+
+def refresh_word_indexes(user_id, states, state_version):
+    """Push a learner's new word states, committed at `state_version`, into their in-process quiz indexes"""
+    quiz_queue, distractor_index = quiz_queues[user_id], distractor_indexes[user_id]
+    for state in states:
+        quiz_queue.update(*quiz_queue_entry(state))
+        distractor_index.update(state.word_id, state.mastery_level)
+    quiz_queue.advance(1, state_version)
+    distractor_index.advance(1, state_version)
+
+@app.route('/vocabulary/quiz/check', methods=['POST'])
+def check_quiz():
+    """Check quiz answer with adaptive learning updates"""
+    word_id = request.form.get('word_id', type=int)
+    answer_id = request.form.get('answer_id', type=int)
+    response_time = request.form.get('response_time', type=float, default=5.0)
+
+    user = answering_learner()
+    events = []
+    state, result = record_answer(word_id, answer_id, response_time, events, user)
+    if state is None:
+        abort(404)
+    # Detach the returned row so reading it after commit doesn't reload it
+    db.session.expunge(state)
+    state_version = bump_learner_state_version(user.id)
+    db.session.commit()
+    refresh_word_indexes(user.id, [state], state_version)
+    log_review_events(events)
+    dashboard_stats[user.id].answers_recorded([(state.mastery_level - state.mastery_change,
+                                                state.mastery_level, result['correct'])])
+    fold_profile_deltas_if_due(user)
+
+    return jsonify(result)
+
+@app.route('/vocabulary/api/quiz/answers', methods=['POST'])
+def check_quiz_batch():
+    """Apply an ordered batch of quiz answers in a single transaction"""
+    payload = request.get_json(silent=True, force=True)
+    answers = payload.get('answers') if isinstance(payload, dict) else None
+    if not isinstance(answers, list) or not answers or len(answers) > 100:
+        return jsonify({'error': 'Expected an "answers" list of 1-100 answers'}), 400
+
+    try:
+        parsed = [(int(a['word_id']), int(a['answer_id']), float(a.get('response_time', 5.0)))
+                  for a in answers]
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return jsonify({'error': 'Each answer needs word_id, answer_id and response_time'}), 400
+    if not all(math.isfinite(response_time) for _, _, response_time in parsed):
+        return jsonify({'error': 'response_time must be a finite number of seconds'}), 400
+
+    user = answering_learner()
+
+    # Answers are applied in order so streaks, XP and confidence evolve exactly as one-by-one
+    results = []
+    events = []
+    answered = []
+    states = {}
+    for word_id, answer_id, response_time in parsed:
+        state, result = record_answer(word_id, answer_id, response_time, events, user)
+        if state is None:
+            results.append({'word_id': word_id, 'error': 'Word not found'})
+            continue
+        db.session.expunge(state)
+        states[word_id] = state
+        result['word_id'] = word_id
+        results.append(result)
+        answered.append((state.mastery_level - state.mastery_change, state.mastery_level, result['correct']))
+
+    state_version = bump_learner_state_version(user.id) if states else None
+    db.session.commit()
+    if states:
+        refresh_word_indexes(user.id, states.values(), state_version)
+    log_review_events(events)
+    dashboard_stats[user.id].answers_recorded(answered)
+    fold_profile_deltas_if_due(user)
+
+    return jsonify({'results': results})
 
 @app.route('/vocabulary/quiz/complete', methods=['POST'])
 def complete_quiz():
@@ -507,6 +1630,7 @@ def complete_quiz():
 
     if score is not None and total is not None:
         quiz_result = QuizHistory(
+            user_id=get_user_profile().id,
             score=score,
             total_questions=total,
             date_taken=datetime.now()
@@ -516,39 +1640,66 @@ def complete_quiz():
 
     return jsonify({'success': True})
 
+def word_bank_stats(user_id):
+    """A learner's word counts, review totals and mastery distribution from a single aggregate query"""
+    mastery = UserWordState.mastery_level
+
+    def count_where(condition):
+        return db.func.coalesce(db.func.sum(db.case((condition, 1), else_=0)), 0)
+
+    columns = [
+        db.func.count(UserWordState.word_id),
+        count_where(VocabularyWord.date_added == date.today()),
+        db.func.coalesce(db.func.sum(mastery), 0),
+        db.func.coalesce(db.func.sum(UserWordState.times_reviewed), 0),
+        db.func.coalesce(db.func.sum(UserWordState.times_correct), 0),
+        # Words by mastery level
+        *(count_where(db.and_(mastery >= lowest, mastery <= highest))
+          for _, lowest, highest in MASTERY_BUCKETS)
+    ]
+    row = (db.session.query(*columns)
+           .select_from(UserWordState)
+           .join(VocabularyWord, VocabularyWord.id == UserWordState.word_id)
+           .filter(UserWordState.user_id == user_id)
+           .one())
+    total_words, words_today, mastery_sum, total_reviews, total_correct = (int(v) for v in row[:5])
+
+    return {
+        'total_words': total_words,
+        'words_today': words_today,
+        'mastery_sum': mastery_sum,
+        'total_reviews': total_reviews,
+        'total_correct': total_correct,
+        'mastery_levels': {label: int(count) for (label, _, _), count in zip(MASTERY_BUCKETS, row[5:])}
+    }
+
 @app.route('/vocabulary/progress')
 def progress():
     """View learning progress"""
-    words = VocabularyWord.query.all()
-    
+    user_id = get_user_profile().id
+    stats = dashboard_stats[user_id].get()
+
     # Calculate statistics
-    total_reviews = sum(w.times_reviewed for w in words)
-    total_correct = sum(w.times_correct for w in words)
+    total_reviews = stats['total_reviews']
+    total_correct = stats['total_correct']
     overall_accuracy = (total_correct / total_reviews * 100) if total_reviews > 0 else 0
-    
-    # Words by mastery level
-    mastery_levels = {
-        'Learning (0-25%)': len([w for w in words if w.mastery_level <= 25]),
-        'Practicing (26-50%)': len([w for w in words if 25 < w.mastery_level <= 50]),
-        'Good (51-75%)': len([w for w in words if 50 < w.mastery_level <= 75]),
-        'Mastered (76-100%)': len([w for w in words if w.mastery_level > 75])
-    }
-    
+
     # Recent quiz history
-    recent_quizzes = QuizHistory.query.order_by(QuizHistory.date_taken.desc()).limit(10).all()
-    
+    recent_quizzes = (QuizHistory.query.filter_by(user_id=user_id)
+                      .order_by(QuizHistory.date_taken.desc()).limit(10).all())
+
     return render_template('vocabulary/progress.html',
-                         total_words=len(words),
+                         total_words=stats['total_words'],
                          total_reviews=total_reviews,
                          overall_accuracy=overall_accuracy,
-                         mastery_levels=mastery_levels,
+                         mastery_levels=stats['mastery_levels'],
                          recent_quizzes=recent_quizzes)
 
 @app.route('/vocabulary/milestones')
 def milestones():
     """View and manage milestones"""
     milestones = Milestone.query.order_by(Milestone.target_date).all()
-    total_words = VocabularyWord.query.count()
+    total_words = dashboard_stats[get_user_profile().id].get()['total_words']
 
     milestone_data = []
     for milestone in milestones:
@@ -594,7 +1745,7 @@ def add_milestone():
 def edit_milestone(milestone_id):
     """Edit an existing milestone"""
     milestone = Milestone.query.get_or_404(milestone_id)
-    total_words = VocabularyWord.query.count()
+    total_words = dashboard_stats[get_user_profile().id].get()['total_words']
 
     if request.method == 'POST':
         name = request.form.get('name', '').strip()
@@ -660,7 +1811,7 @@ def restore_words():
     """Restore the vocabulary words that were in the database before"""
     try:
         # Check if words already exist
-        existing_count = VocabularyWord.query.count()
+        existing_count = count_words()
         if existing_count > 0:
             return f"Database already has {existing_count} words. <a href='/vocabulary/words'>View words</a>"
 
@@ -684,24 +1835,38 @@ def restore_words():
         ]
 
         # Add each word to database
+        words = []
         for word_data in words_to_restore:
             word = VocabularyWord(
                 word=word_data["word"],
                 definition=word_data["definition"],
                 synonyms=word_data.get("synonyms", ""),
                 antonyms=word_data.get("antonyms", ""),
-                example_sentence="",
-                mastery_level=random.randint(0, 30),  # Some initial progress
-                times_reviewed=random.randint(0, 5),
-                times_correct=random.randint(0, 3),
-                streak=0,
-                difficulty_score=50.0,
-                review_interval=1,
-                next_review_date=date.today() + timedelta(days=1)
+                example_sentence=""
             )
             db.session.add(word)
+            words.append(word)
+        db.session.flush()
+
+        # Every learner starts with some initial progress on the restored words
+        for user_id, in db.session.query(UserProfile.id):
+            for word in words:
+                times_reviewed = random.randint(0, 5)
+                db.session.add(UserWordState(
+                    user_id=user_id,
+                    word_id=word.id,
+                    mastery_level=random.randint(0, 30),
+                    times_reviewed=times_reviewed,
+                    times_correct=random.randint(0, min(3, times_reviewed)),
+                    next_review_date=date.today() + timedelta(days=1)
+                ))
 
+        bump_word_bank_version()
         db.session.commit()
+        quiz_queues.invalidate()
+        distractor_indexes.invalidate()
+        dashboard_stats.invalidate()
+        word_bank.invalidate()
 
         return f"Successfully restored {len(words_to_restore)} vocabulary words! <a href='/vocabulary/words'>View words</a>"
     except Exception as e:
@@ -711,25 +1876,10 @@ def restore_words():
 def migrate_database():
     """Database migration - adds missing columns without deleting data"""
     try:
-        # Just add missing columns, don't drop tables
-        with db.engine.begin() as conn:
-            # Add missing columns if they don't exist
-            migration_commands = [
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS difficulty_score FLOAT DEFAULT 50.0",
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS streak INTEGER DEFAULT 0",
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS last_response_time FLOAT",
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS review_interval INTEGER DEFAULT 1",
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS next_review_date DATE",
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS synonyms TEXT DEFAULT ''",
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS antonyms TEXT DEFAULT ''",
-                "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS example_sentence TEXT DEFAULT ''"
-            ]
-
-            for cmd in migration_commands:
-                try:
-                    conn.execute(db.text(cmd))
-                except:
-                    pass  # Column already exists
+        # Just add missing tables and columns, don't drop tables
+        db.create_all()
+        add_missing_columns()
+        ensure_indexes()
 
         # Ensure UserProfile exists
         try:
@@ -743,6 +1893,10 @@ def migrate_database():
             db.session.add(default_user)
             db.session.commit()
 
+        migrate_word_state()
+        ensure_word_bank_version()
+        db.session.commit()
+
         return "Database migrated successfully! <a href='/vocabulary'>Go to vocabulary</a>"
     except Exception as e:
         return f"Database migration error: {str(e)}"
@@ -756,6 +1910,104 @@ def delete_milestone(milestone_id):
     flash(f'Deleted milestone "{milestone.name}"', 'info')
     return redirect(url_for('milestones'))
 
+def ensure_indexes():
+    """Create missing model indexes without blocking writes; raises RuntimeError if any fails"""
+    # PostgreSQL builds them CONCURRENTLY (rebuilding invalid leftovers); SQLite's build is brief
+    dialect = db.engine.dialect
+    postgres = dialect.name == 'postgresql'
+    created = []
+    failed = []
+
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        existing_tables = set(db.inspect(conn).get_table_names())
+        invalid = set()
+        if postgres:
+            invalid = {row[0] for row in conn.execute(db.text(
+                "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE NOT i.indisvalid"))}
+
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            for index in table.indexes:
+                ddl = str(db.schema.CreateIndex(index, if_not_exists=True).compile(dialect=dialect))
+                if postgres:
+                    ddl = ddl.replace('INDEX IF NOT EXISTS', 'INDEX CONCURRENTLY IF NOT EXISTS', 1)
+                try:
+                    if postgres and index.name in invalid:
+                        conn.execute(db.text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+                    conn.execute(db.text(ddl))
+                    created.append(index.name)
+                except Exception as e:
+                    app.logger.warning(f"Could not build index {index.name}: {e}")
+                    failed.append(index.name)
+
+    if failed:
+        raise RuntimeError(f"Index builds failed: {', '.join(failed)}")
+    return created
+
+# Columns introduced after their table was first created: table -> {column: type}
+COLUMNS_TO_ADD = {
+    'vocabulary_word': {
+        'synonyms': "TEXT DEFAULT ''",
+        'antonyms': "TEXT DEFAULT ''",
+        'example_sentence': "TEXT DEFAULT ''",
+    },
+    'quiz_history': {'user_id': "INTEGER"},
+    'review_event': {'user_id': "INTEGER"},
+}
+
+def add_missing_columns():
+    """ALTER TABLE ... ADD COLUMN for each missing COLUMNS_TO_ADD entry; raises RuntimeError if any stays missing"""
+    inspector = db.inspect(db.engine)
+    if_not_exists = 'IF NOT EXISTS ' if db.engine.dialect.name == 'postgresql' else ''
+    failed = []
+
+    for table_name, columns in COLUMNS_TO_ADD.items():
+        existing_columns = {c['name'] for c in inspector.get_columns(table_name)}
+        for column_name, column_type in columns.items():
+            if column_name in existing_columns:
+                continue
+            try:
+                with db.engine.begin() as conn:
+                    conn.execute(db.text(
+                        f"ALTER TABLE {table_name} ADD COLUMN {if_not_exists}{column_name} {column_type}"))
+            except Exception as e:
+                # Another process may have added it first; only a column still missing is a failure
+                if column_name not in {c['name'] for c in db.inspect(db.engine).get_columns(table_name)}:
+                    app.logger.warning(f"Could not add column {table_name}.{column_name}: {e}")
+                    failed.append(f"{table_name}.{column_name}")
+
+    if failed:
+        raise RuntimeError(f"Columns could not be added: {', '.join(failed)}")
+
+def migrate_word_state():
+    """Give every learner a state row per word, copying legacy vocabulary_word state to the first"""
+    legacy_columns = {c['name'] for c in db.inspect(db.engine).get_columns('vocabulary_word')}
+    copied = [name for name in UserWordState.STATE_COLUMNS if name in legacy_columns]
+    first_user_id = db.session.query(db.func.min(UserProfile.id)).scalar()
+
+    if copied and first_user_id is not None:
+        legacy_word = db.table('vocabulary_word', db.column('id'), *(db.column(name) for name in copied))
+        defaults = UserWordState.initial_values()
+        values = [db.func.coalesce(legacy_word.c[name], defaults[name]) if name in defaults else legacy_word.c[name]
+                  for name in copied]
+        rows = (db.select(db.literal(first_user_id), legacy_word.c.id, *values)
+                .where(~db.exists().where(UserWordState.user_id == first_user_id,
+                                          UserWordState.word_id == legacy_word.c.id)))
+        db.session.execute(db.insert(UserWordState).from_select(['user_id', 'word_id', *copied], rows))
+
+    add_word_states()
+    db.session.commit()
+
+def fill_missing_sort_keys():
+    """Backfill NULL word list sort keys in tables from before they were NOT NULL"""
+    db.session.execute(db.update(VocabularyWord).where(VocabularyWord.date_added.is_(None))
+                       .values(date_added=date.today()))
+    db.session.execute(db.update(UserWordState).where(UserWordState.mastery_level.is_(None))
+                       .values(mastery_level=0))
+    db.session.commit()
+
 # Initialize database and add default milestones
 def initialize_database():
     """Create tables and add default milestones with migration support - PRESERVES EXISTING DATA"""
@@ -763,37 +2015,11 @@ def initialize_database():
         # Create all tables (won't affect existing ones, won't delete data)
         db.create_all()
 
-        # Check if we need to migrate - PostgreSQL specific
-        with db.engine.begin() as conn:
-            # Check if new columns exist in PostgreSQL
-            check_column = """
-                SELECT column_name
-                FROM information_schema.columns
-                WHERE table_name = 'vocabulary_word'
-                AND column_name IN ('difficulty_score', 'streak', 'synonyms', 'antonyms', 'example_sentence')
-            """
-            result = conn.execute(db.text(check_column))
-            existing_columns = {row[0] for row in result}
-
-            # Add missing columns
-            columns_to_add = {
-                'difficulty_score': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS difficulty_score FLOAT DEFAULT 50.0",
-                'streak': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS streak INTEGER DEFAULT 0",
-                'last_response_time': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS last_response_time FLOAT",
-                'review_interval': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS review_interval INTEGER DEFAULT 1",
-                'next_review_date': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS next_review_date DATE",
-                'synonyms': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS synonyms TEXT DEFAULT ''",
-                'antonyms': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS antonyms TEXT DEFAULT ''",
-                'example_sentence': "ALTER TABLE vocabulary_word ADD COLUMN IF NOT EXISTS example_sentence TEXT DEFAULT ''"
-            }
-
-            for column_name, alter_cmd in columns_to_add.items():
-                try:
-                    conn.execute(db.text(alter_cmd))
-                    conn.commit()
-                except Exception as e:
-                    # Column might already exist, continue
-                    print(f"Column {column_name} migration note: {e}")
+        # Add columns introduced after the tables were first created
+        add_missing_columns()
+
+        # Indexes need the columns above, so they come last
+        ensure_indexes()
 
         # Ensure UserProfile exists
         try:
@@ -802,13 +2028,23 @@ def initialize_database():
                 db.session.add(default_user)
                 db.session.commit()
         except Exception as e:
-            print(f"UserProfile check: {e}")
+            app.logger.warning(f"UserProfile check: {e}")
             # Table might not exist, create it
             UserProfile.__table__.create(db.engine, checkfirst=True)
             default_user = UserProfile()
             db.session.add(default_user)
             db.session.commit()
 
+        # Review state moves from vocabulary_word to user_word_state, and every learner gets a row per word
+        migrate_word_state()
+
+        # Keyset pages compare sort keys, which a NULL never matches
+        fill_missing_sort_keys()
+
+        # Counter that word snapshots are validated against
+        ensure_word_bank_version()
+        db.session.commit()
+
         # Add default milestones if they don't exist
         try:
             if Milestone.query.count() == 0:
@@ -838,26 +2074,82 @@ def initialize_database():
         except:
             pass  # Milestones might already exist
 
+        # Only reached when every step above succeeded: a failed step leaves the
+        # database unstamped, so the next cold start runs the migration again
+        stamp_schema_version()
+
     except Exception as e:
         # In serverless, database might not be ready yet
-        print(f"Database initialization warning: {e}")
-        # Try a simpler approach - just create tables
+        db.session.rollback()
+        app.logger.warning(f"Database initialization incomplete, will retry on next start: {e}")
+        # Try a simpler approach - just create tables (and their indexes), without stamping
         try:
             db.create_all()
-        except:
-            pass
+            ensure_indexes()
+        except Exception as e:
+            app.logger.warning(f"Fallback table creation failed: {e}")
 
 # Track if database has been initialized
 _db_initialized = False
+_db_init_lock = threading.Lock()
+
+# Arbitrary application-wide key for the migration's PostgreSQL advisory lock ("vocab")
+DB_INIT_LOCK_KEY = 0x766f636162
+
+# Seconds between attempts while another process holds the migration lock
+DB_INIT_LOCK_POLL_INTERVAL = 0.1
+
+@contextmanager
+def polled_advisory_lock(conn, key, poll_interval=DB_INIT_LOCK_POLL_INTERVAL):
+    """Hold a session-level advisory lock, polling pg_try_advisory_lock() for it"""
+    # A waiter blocked in pg_advisory_lock() holds a snapshot that CREATE INDEX CONCURRENTLY waits on
+    while not conn.execute(db.text("SELECT pg_try_advisory_lock(:key)"), {'key': key}).scalar():
+        time.sleep(poll_interval)
+    try:
+        yield
+    finally:
+        conn.execute(db.text("SELECT pg_advisory_unlock(:key)"), {'key': key})
+
+@contextmanager
+def database_init_lock():
+    """Hold a lock shared by every process using this database while migrating"""
+    # PostgreSQL: a polled advisory lock; SQLite: an flock on a file next to the database
+    url = db.engine.url
+    if url.get_backend_name() == 'postgresql':
+        with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            with polled_advisory_lock(conn, DB_INIT_LOCK_KEY):
+                yield
+    elif url.get_backend_name() == 'sqlite' and url.database and url.database != ':memory:' and fcntl:
+        with open(f"{url.database}.init.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    else:
+        yield
+
+def initialize_database_once():
+    """Bring the database up to date once: one thread per process, one process at a time"""
+    global _db_initialized
+    if _db_initialized:
+        return
+    with _db_init_lock:
+        if _db_initialized:
+            return
+        # Fast path: an up-to-date database needs no DDL or default-row checks
+        if not schema_is_current():
+            with database_init_lock():
+                if not schema_is_current():
+                    initialize_database()
+        _db_initialized = True
 
 @app.before_request
 def ensure_database():
     """Ensure database is initialized before handling requests"""
-    global _db_initialized
     if not _db_initialized and request.endpoint not in ['health', 'debug']:
         try:
-            initialize_database()
-            _db_initialized = True
+            initialize_database_once()
         except Exception as e:
             app.logger.warning(f"Database initialization deferred: {e}")
             # Try simple table creation as fallback
@@ -869,6 +2161,6 @@ def ensure_database():
 # For local development, initialize immediately
 if __name__ == '__main__':
     with app.app_context():
-        initialize_database()
+        initialize_database_once()
     # Run on all interfaces for Tailscale access
     app.run(host='0.0.0.0', port=5005, debug=True)
\ No newline at end of file
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark: first-request latency with and without the schema version stamp
+
+Each run is a fresh process (like a serverless cold start) that times
+its first request to /vocabulary. "migrate" clears the schema_version
+stamp first, so ensure_database() runs the full initialize_database();
+"stamped" leaves it in place, so only the version read happens.
+
+Uses a temporary SQLite database unless BENCH_DATABASE_URL is set (e.g. a
+staging PostgreSQL database, where the difference is larger because every
+DDL statement is a network round trip).
+
+Usage: python benchmarks/bench_cold_start.py [runs]
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_RUNS = 10
+
+
+def first_request(clear_stamp):
+    from app import app, db, SchemaVersion
+
+    if clear_stamp:
+        with app.app_context():
+            db.create_all()
+            SchemaVersion.query.delete()
+            db.session.commit()
+            db.engine.dispose()
+
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.get('/vocabulary')
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.status_code
+    print(json.dumps({'ms': elapsed * 1000}))
+
+
+def run(env, mode):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), '--run', mode],
+                            env=env, cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])['ms']
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_RUNS
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = os.environ.get('BENCH_DATABASE_URL') or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        env = dict(os.environ, DATABASE_URL=database_url,
+                   SIMILARITY_INDEX_PATH=os.path.join(tmp, 'similarity.json'),
+                   WORD_SNAPSHOT_PATH=os.path.join(tmp, 'words.bin'))
+        run(env, 'stamped')  # Create and stamp the schema once
+
+        print(f"{'mode':>10} {'median ms':>10} {'min ms':>8}")
+        for mode in ('migrate', 'stamped'):
+            times = [run(env, mode) for _ in range(runs)]
+            print(f"{mode:>10} {statistics.median(times):>10.1f} {min(times):>8.1f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--run':
+        first_request(sys.argv[2] == 'migrate')
+    else:
+        main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes and rows fetched per endpoint, eager vs deferred word text
+
+VocabularyWord's text columns (definition, synonyms, antonyms,
+example_sentence) are deferred, and each route undefers only the text it
+renders. This seeds a temporary SQLite database with realistic text, then
+requests each endpoint twice: once with every query forced to load all the
+text (the old eager mapping) and once as the app runs now. For each it
+reports the rows SQLite returned, the bytes in them and the VocabularyWord
+objects hydrated. The word snapshot is turned off so the quiz routes run
+their word queries.
+
+Usage: python benchmarks/bench_column_loading.py [word_count]
+"""
+
+import os
+import sys
+import random
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_COUNT = 2000
+
+ENDPOINTS = [
+    ('GET', '/vocabulary'),
+    ('GET', '/vocabulary/progress'),
+    ('GET', '/vocabulary/quiz'),
+    ('GET', '/vocabulary/api/quiz/session'),
+    ('POST', '/vocabulary/quiz/check'),
+    ('GET', '/vocabulary/words'),
+    ('GET', '/vocabulary/words/print'),
+    ('GET', '/vocabulary/edit_word/1'),
+]
+
+
+def seed(count):
+    from app import db, VocabularyWord, add_learner, ensure_word_bank_version
+
+    rng = random.Random(1)
+    db.create_all()
+    db.session.execute(db.insert(VocabularyWord), [{
+        'word': f"word{i:06d}",
+        'definition': f"definition of word {i} " + "lorem ipsum " * rng.randint(2, 10),
+        'synonyms': ", ".join(f"syn{rng.randint(0, 999)}" for _ in range(rng.randint(1, 5))),
+        'antonyms': ", ".join(f"ant{rng.randint(0, 999)}" for _ in range(rng.randint(0, 3))),
+        'example_sentence': f"An example sentence using word{i:06d} " + "dolor sit amet " * rng.randint(1, 6),
+    } for i in range(count)])
+    add_learner()
+    ensure_word_bank_version()
+    db.session.commit()
+
+
+class Meter:
+    """Counts rows and bytes SQLite hands back, through each connection's row_factory"""
+
+    def __init__(self):
+        self.rows = self.bytes = self.objects = 0
+
+    def reset(self):
+        self.rows = self.bytes = self.objects = 0
+
+    def row_factory(self, cursor, row):
+        self.rows += 1
+        self.bytes += sum(len(v) if isinstance(v, (str, bytes)) else 8 if v is not None else 0 for v in row)
+        return row
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['SIMILARITY_INDEX_PATH'] = os.path.join(tmp, 'similarity.json')
+        os.environ['WORD_SNAPSHOT_PATH'] = os.path.join(tmp, 'words.bin')
+        os.environ['REVIEW_EVENT_FLUSH_SIZE'] = '1000000'  # Keep the event log out of the measurement
+        from sqlalchemy import event
+        from sqlalchemy.orm import Session
+        from app import app, db, VocabularyWord, WORD_TEXT
+
+        app.logger.disabled = True
+        app.config['WORD_SNAPSHOT'] = False
+        meter = Meter()
+        with app.app_context():
+            seed(count)
+            engine = db.engine
+        event.listen(engine, 'connect', lambda dbapi_connection, record: setattr(
+            dbapi_connection, 'row_factory', meter.row_factory))
+        engine.dispose()  # Reconnect so every connection has the row factory
+
+        def on_load(target, context):
+            meter.objects += 1
+
+        eager = [False]
+
+        def undefer_all_text(state):
+            # The old mapping: every query that loads VocabularyWord objects loads all of its text
+            if eager[0] and state.is_select and any(
+                    getattr(d.get('entity'), '__name__', None) == 'VocabularyWord'
+                    for d in state.statement.column_descriptions):
+                state.statement = state.statement.options(WORD_TEXT)
+
+        event.listen(VocabularyWord, 'load', on_load)
+        event.listen(Session, 'do_orm_execute', undefer_all_text)
+
+        client = app.test_client()
+
+        def request(method, url):
+            if method == 'POST':
+                response = client.post(url, data={'word_id': 2, 'answer_id': 3, 'response_time': 4.0})
+            else:
+                response = client.get(url)
+            response.get_data()  # Run streamed pages to the end so their queries finish
+            response.close()
+            return response
+
+        results = {}
+        for mode in ('eager', 'deferred'):
+            eager[0] = mode == 'eager'
+            for method, url in ENDPOINTS:
+                request(method, url)  # Warm up caches and templates
+                meter.reset()
+                assert request(method, url).status_code == 200, (mode, url)
+                results[mode, url] = (meter.rows, meter.bytes, meter.objects)
+
+        print(f"{count} words (word snapshot off)")
+        print(f"{'endpoint':<32} {'rows':>6} {'eager KB':>9} {'deferred KB':>12} {'saved':>6} {'objects':>8}")
+        for method, url in ENDPOINTS:
+            rows, eager_bytes, objects = results['eager', url]
+            _, deferred_bytes, _ = results['deferred', url]
+            # Pages under a KB read aggregates only; their bytes move with the answers recorded between passes
+            saved = f"{1 - deferred_bytes / eager_bytes:.0%}" if eager_bytes >= 1024 else '-'
+            print(f"{method + ' ' + url:<32} {rows:>6} {eager_bytes / 1024:>9.1f} {deferred_bytes / 1024:>12.1f} "
+                  f"{saved:>6} {objects:>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-request connection overhead of each engine pool profile
+
+Each simulated request checks out a connection, runs one small query and
+returns it, which is what a typical page does. The script reports the mean
+time per request and how many new database connections were opened.
+
+Runs against BENCH_DATABASE_URL if it is set (e.g. a local PostgreSQL).
+Otherwise it uses a SQLite file as a stand-in and simulates a network
+database with --latency: each round trip (query or pre-ping) sleeps that
+many milliseconds, and opening a connection sleeps three times that
+(TCP + TLS + auth handshakes).
+
+Usage: python benchmarks/bench_engine_profiles.py [--requests N] [--latency MS]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+from sqlalchemy import create_engine, event, text
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import engine_options
+
+PROFILES = ['server', 'serverless', 'sqlite']
+HANDSHAKE_ROUND_TRIPS = 3
+
+
+def make_engine(url, profile, latency):
+    engine = create_engine(url, **engine_options(profile))
+    stats = {'connects': 0}
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection, connection_record):
+        stats['connects'] += 1
+        time.sleep(latency * HANDSHAKE_ROUND_TRIPS)
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        time.sleep(latency)
+
+    if latency and engine.pool._pre_ping:
+        @event.listens_for(engine, 'engine_connect')
+        def on_checkout(connection):
+            time.sleep(latency)  # The pre-ping bypasses cursor events, so charge it here
+
+    return engine, stats
+
+
+def run_requests(engine, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1")).scalar()
+    return (time.perf_counter() - start) / count * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--latency', type=float, default=2.0, help='simulated round trip in ms (SQLite only)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = os.environ.get('BENCH_DATABASE_URL')
+        latency = 0.0 if url else args.latency / 1000
+        url = url or f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        profiles = [p for p in PROFILES if url.startswith('sqlite') or p != 'sqlite']
+
+        print(f"{args.requests} requests against {url.split('://')[0]}"
+              + (f" with {args.latency:.1f} ms simulated round trips" if latency else ""))
+        print(f"{'profile':>11} {'ms/request':>11} {'connections':>12}")
+        for profile in profiles:
+            engine, stats = make_engine(url, profile, latency)
+            ms = run_requests(engine, args.requests)
+            engine.dispose()
+            print(f"{profile:>11} {ms:>11.2f} {stats['connects']:>12}")
+
+
+if __name__ == '__main__':
+    main()
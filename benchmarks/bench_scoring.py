@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-row vs NumPy-vectorized quiz priority queue rebuild inputs
+
+A quiz priority queue rebuild turns every word state of a learner into a
+(word_id, difficulty, static_score, next_due) entry. This compares building
+them one row at a time with quiz_queue_entry() (the path used without
+NumPy) against ScoringColumns.queue_entries(), on synthetic word banks of
+column-only rows like the projected query the app runs.
+
+Usage: python benchmarks/bench_scoring.py [sizes...]
+"""
+
+import os
+import sys
+import random
+import timeit
+from collections import namedtuple
+from datetime import datetime, date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import quiz_queue_entry
+from scoring import HAVE_NUMPY, ScoringColumns
+
+DEFAULT_SIZES = [100, 300, 1000, 3000, 10000, 100000]
+
+Row = namedtuple('Row', ScoringColumns.FIELDS)
+
+
+def make_rows(count, seed=1):
+    """Column-only state rows with a spread of review state"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    rows = []
+    for i in range(count):
+        times_reviewed = rng.randint(0, 20)
+        last_reviewed = now - timedelta(days=rng.randint(0, 30)) if times_reviewed else None
+        rows.append(Row(
+            word_id=i + 1,
+            times_reviewed=times_reviewed,
+            times_correct=rng.randint(0, times_reviewed),
+            last_response_time=rng.choice([None, 1.5, 5.0, 12.0]),
+            mastery_level=rng.randint(0, 100),
+            streak=rng.randint(0, 4),
+            last_reviewed=last_reviewed,
+            next_review_date=(last_reviewed.date() + timedelta(days=rng.choice([1, 2, 3, 5, 8, 13])))
+            if last_reviewed else date.today() + timedelta(days=1),
+        ))
+    return rows
+
+
+def per_row(rows):
+    """The fallback rebuild path: one quiz_queue_entry() per row"""
+    return [quiz_queue_entry(row) for row in rows]
+
+
+def vectorized(rows):
+    """Array build plus vectorized difficulty and static score"""
+    return list(ScoringColumns.from_rows(rows).queue_entries())
+
+
+def best_of(func, repeat=5):
+    """Best wall time in milliseconds"""
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def main():
+    if not HAVE_NUMPY:
+        print("NumPy is not installed - pip install -r requirements-extras.txt to run this benchmark")
+        sys.exit(1)
+
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+
+    print(f"{'words':>8} {'per-row ms':>11} {'vectorized ms':>14} {'speedup':>8}")
+    crossover = None
+    for size in sizes:
+        rows = make_rows(size)
+        assert vectorized(rows) == per_row(rows)
+        row_ms = best_of(lambda: per_row(rows))
+        vector_ms = best_of(lambda: vectorized(rows))
+        if vector_ms >= row_ms:
+            crossover = None
+        elif crossover is None:
+            crossover = size
+        print(f"{size:>8} {row_ms:>11.2f} {vector_ms:>14.2f} {row_ms / vector_ms:>7.1f}x")
+
+    if crossover is None:
+        print("\nVectorized entries did not overtake the per-row path at the sizes tested")
+    else:
+        print(f"\nVectorized entries (including array build) are faster from {crossover} words up")
+
+
+if __name__ == '__main__':
+    main()
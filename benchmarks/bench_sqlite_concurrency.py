@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark: concurrent quiz readers and answer writers on SQLite
+
+Starts reader processes that load quiz sessions and writer processes that
+post answers to /vocabulary/quiz/check, all against one SQLite file, as
+gunicorn workers would. It runs once with SQLite's defaults
+(SQLITE_TUNED=false: rollback journal, no mmap, deferred transactions) and
+once tuned (WAL, synchronous=NORMAL, busy_timeout, mmap, cache size,
+BEGIN IMMEDIATE for answers). For each run it reports throughput, failed
+requests ("database is locked") and answers lost to overwrites.
+
+Usage: python benchmarks/bench_sqlite_concurrency.py [--readers N] [--writers N] [--seconds S]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import sqlite3
+import subprocess
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+WORDS = 500
+
+
+def seed():
+    from app import app, db, VocabularyWord, add_learner
+
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(VocabularyWord), [
+            {'word': f"word{i}", 'definition': f"definition {i}"} for i in range(WORDS)])
+        add_learner()
+
+
+def worker(role, seconds):
+    from app import app
+
+    app.logger.disabled = True
+    client = app.test_client()
+    client.get('/vocabulary')  # Startup work (schema check) outside the timed loop
+    rng = random.Random(os.getpid())
+    ok = failed = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if role == 'reader':
+            response = client.get('/vocabulary/api/quiz/session')
+        else:
+            response = client.post('/vocabulary/quiz/check', data={
+                'word_id': rng.randint(1, WORDS), 'answer_id': rng.randint(1, WORDS), 'response_time': 4.0})
+        if response.status_code == 200:
+            ok += 1
+        else:
+            failed += 1
+    print(json.dumps({'role': role, 'ok': ok, 'failed': failed}))
+
+
+def run_mode(tuned, readers, writers, seconds):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.db')
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{path}",
+                   SIMILARITY_INDEX_PATH=os.path.join(tmp, 'similarity.json'),
+                   WORD_SNAPSHOT_PATH=os.path.join(tmp, 'words.bin'),
+                   SQLITE_TUNED='true' if tuned else 'false',
+                   REVIEW_EVENT_FLUSH_SIZE='1000000')  # Keep the event log out of the measurement
+        script = os.path.abspath(__file__)
+        subprocess.run([sys.executable, script, '--seed'], env=env, cwd=ROOT, check=True)
+
+        roles = ['reader'] * readers + ['writer'] * writers
+        processes = [subprocess.Popen([sys.executable, script, '--worker', role, str(seconds)],
+                                      env=env, cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                                      text=True)
+                     for role in roles]
+        results = [json.loads(p.communicate()[0].strip().splitlines()[-1]) for p in processes]
+
+        with sqlite3.connect(path) as conn:
+            recorded = conn.execute("SELECT SUM(times_reviewed) FROM user_word_state").fetchone()[0] or 0
+
+    totals = {}
+    for role in ('reader', 'writer'):
+        totals[role] = {key: sum(r[key] for r in results if r['role'] == role) for key in ('ok', 'failed')}
+    totals['lost'] = totals['writer']['ok'] - recorded
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    print(f"{args.readers} readers + {args.writers} writers for {args.seconds:.0f} s")
+    print(f"{'mode':>8} {'reads/s':>8} {'writes/s':>9} {'failed':>7} {'lost':>5}")
+    for tuned in (False, True):
+        totals = run_mode(tuned, args.readers, args.writers, args.seconds)
+        failed = totals['reader']['failed'] + totals['writer']['failed']
+        print(f"{'tuned' if tuned else 'default':>8} {totals['reader']['ok'] / args.seconds:>8.0f} "
+              f"{totals['writer']['ok'] / args.seconds:>9.0f} {failed:>7} {totals['lost']:>5}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--seed':
+        seed()
+    elif len(sys.argv) > 3 and sys.argv[1] == '--worker':
+        worker(sys.argv[2], float(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark: peak memory of the full word listing, buffered vs streamed
+
+Seeds a temporary SQLite database, then renders every word in a fresh
+process per mode and reports how much the peak RSS grew during the
+request:
+
+  buffered  the old view_words(): .all() plus render_template() of the whole page
+  streamed  /vocabulary/words/all (yield_per + streamed template)
+  print     /vocabulary/words/print (yield_per + streamed template)
+
+Usage: python benchmarks/bench_view_memory.py [word_count]
+"""
+
+import os
+import sys
+import json
+import random
+import resource
+import subprocess
+import tempfile
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_COUNT = 50000
+MODES = ['buffered', 'streamed', 'print']
+
+
+def peak_rss_kb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss  # KB on Linux
+
+
+def seed(count):
+    from app import app, db, VocabularyWord, UserWordState, UserProfile
+
+    rng = random.Random(1)
+    today = date.today()
+    with app.app_context():
+        db.create_all()
+        db.session.execute(db.insert(VocabularyWord), [{
+            'word': f"word{i:06d}",
+            'definition': f"definition of word {i} " + "lorem ipsum " * rng.randint(2, 10),
+            'example_sentence': f"An example sentence using word{i:06d}.",
+            'synonyms': "alpha, beta",
+            'antonyms': "gamma",
+            'date_added': today - timedelta(days=rng.randint(0, 365)),
+        } for i in range(count)])
+        db.session.add(UserProfile())
+        db.session.flush()
+        db.session.execute(db.insert(UserWordState), [{
+            'user_id': 1,
+            'word_id': i + 1,
+            'mastery_level': rng.randint(0, 100),
+            'times_reviewed': rng.randint(0, 20),
+        } for i in range(count)])
+        db.session.commit()
+
+
+def measure(mode):
+    from flask import render_template
+    from app import app, words_query
+
+    client = app.test_client()
+    client.get('/vocabulary/words')  # Warm up: first-request setup and template compilation
+    app.jinja_env.get_template('vocabulary/print_words.html')
+    before = peak_rss_kb()
+
+    if mode == 'buffered':
+        with app.test_request_context('/vocabulary/words/all'):
+            words = words_query(1, 'date_desc').all()
+            html = render_template('vocabulary/view_words.html', words=words, sort_by='date_desc',
+                                   next_cursor=None, total_words=len(words))
+            size = len(html.encode())
+    else:
+        url = '/vocabulary/words/all' if mode == 'streamed' else '/vocabulary/words/print'
+        response = client.get(url, buffered=False)
+        size = 0
+        for chunk in response.response:
+            size += len(chunk)
+        response.close()
+
+    print(json.dumps({'mode': mode, 'growth_kb': peak_rss_kb() - before, 'peak_kb': peak_rss_kb(),
+                      'bytes': size}))
+
+
+def run(env, *args):
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), *args],
+                            env=env, cwd=ROOT, check=True, capture_output=True, text=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]) if result.stdout.strip() else None
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+                   SIMILARITY_INDEX_PATH=os.path.join(tmp, 'similarity.json'),
+                   WORD_SNAPSHOT_PATH=os.path.join(tmp, 'words.bin'))
+        run(env, '--seed', str(count))
+
+        print(f"{count} words")
+        print(f"{'mode':>10} {'peak growth MB':>15} {'peak RSS MB':>12} {'HTML MB':>9}")
+        for mode in MODES:
+            result = run(env, '--measure', mode)
+            print(f"{mode:>10} {result['growth_kb'] / 1024:>15.1f} {result['peak_kb'] / 1024:>12.1f} "
+                  f"{result['bytes'] / 1024 / 1024:>9.1f}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--seed':
+        seed(int(sys.argv[2]))
+    elif len(sys.argv) > 2 and sys.argv[1] == '--measure':
+        measure(sys.argv[2])
+    else:
+        main()
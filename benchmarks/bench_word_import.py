@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bulk word import vs adding words one form post at a time
+
+Writes a word list in each import format (CSV, JSON Lines, Anki-style TSV)
+and imports it into a temporary SQLite database that already holds some
+of the words, then imports it again (every word skipped). For comparison,
+a sample of the same words is added through POST /vocabulary/add_word,
+which runs an existence query and a commit per word.
+
+Usage: python benchmarks/bench_word_import.py [word_count] [--existing N] [--posts N]
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_COUNT = 10000
+
+
+def word_records(count):
+    """The same realistic word records for every format, so words already present match"""
+    for i in range(count):
+        yield {
+            'word': f"word{i:06d}",
+            'definition': f"definition of word {i}, lorem ipsum dolor sit amet",
+            'synonyms': f"syn{i % 997}, syn{i % 991}",
+            'antonyms': f"ant{i % 983}",
+            'example_sentence': f"An example sentence using word{i:06d}.",
+        }
+
+
+def write_list(path, file_format, count):
+    from word_import import FIELDS
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        if file_format == 'jsonl':
+            for record in word_records(count):
+                f.write(json.dumps(record) + '\n')
+            return
+        writer = csv.writer(f, delimiter=',' if file_format == 'csv' else '\t')
+        if file_format == 'csv':
+            writer.writerow(FIELDS)
+        else:
+            f.write('#separator:tab\n#html:false\n')
+        for record in word_records(count):
+            writer.writerow([record[field] for field in FIELDS])
+
+
+def reset(existing):
+    """Empty the tables, then add one learner and the first `existing` words"""
+    from app import db, VocabularyWord, add_learner, ensure_word_bank_version
+
+    db.drop_all()
+    db.create_all()
+    ensure_word_bank_version()
+    add_learner()
+    if existing:
+        db.session.execute(db.insert(VocabularyWord), list(word_records(existing)))
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('count', type=int, nargs='?', default=DEFAULT_COUNT)
+    parser.add_argument('--existing', type=int, default=500, help='words already in the database')
+    parser.add_argument('--posts', type=int, default=500, help='words added through the form for comparison')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['SIMILARITY_INDEX_PATH'] = os.path.join(tmp, 'similarity.json')
+        os.environ['WORD_SNAPSHOT_PATH'] = os.path.join(tmp, 'words.bin')
+        from app import app, import_words, initialize_database_once
+        from word_import import parse_words
+
+        app.logger.disabled = True
+        with app.app_context():
+            initialize_database_once()
+
+        print(f"{args.count} words, {args.existing} already present")
+        print(f"{'format':>7} {'import s':>9} {'words/s':>9} {'inserted':>9} {'skipped':>8} {'re-import s':>12}")
+        for file_format in ('csv', 'jsonl', 'tsv'):
+            path = os.path.join(tmp, f"words.{file_format}")
+            write_list(path, file_format, args.count)
+            with app.app_context():
+                reset(args.existing)
+                runs = []
+                for _ in range(2):  # The second import finds every word present
+                    start = time.perf_counter()
+                    with open(path, encoding='utf-8-sig', newline='') as stream:
+                        counts = import_words(parse_words(stream, file_format))
+                    runs.append((time.perf_counter() - start, counts))
+            (elapsed, counts), (again, _) = runs
+            print(f"{file_format:>7} {elapsed:>9.2f} {args.count / elapsed:>9.0f} {counts['inserted']:>9} "
+                  f"{counts['skipped']:>8} {again:>12.2f}")
+
+        with app.app_context():
+            reset(0)
+        client = app.test_client()
+        start = time.perf_counter()
+        for record in word_records(args.posts):
+            client.post('/vocabulary/add_word', data=record)
+        elapsed = time.perf_counter() - start
+        print()
+        print(f"add_word form posts: {args.posts} words in {elapsed:.2f} s ({args.posts / elapsed:.0f} words/s)")
+
+
+if __name__ == '__main__':
+    main()
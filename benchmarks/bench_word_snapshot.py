@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: memory and allocations of the word bank snapshot vs ORM rows
+
+Seeds a temporary SQLite database with words carrying realistic text
+(definition, synonyms, antonyms, example sentence) and reports:
+
+  per word    bytes still allocated after loading every word as VocabularyWord
+              objects, and after building the snapshot from (id, word, definition)
+  per request for /vocabulary/api/quiz/session with WORD_SNAPSHOT off and on:
+              mean time, peak bytes allocated (tracemalloc) and ORM objects loaded
+  cold start  time for a new process's first word_bank_snapshot(), querying every
+              word vs mapping the file an earlier process saved in /tmp
+
+Usage: python benchmarks/bench_word_snapshot.py [word_count] [--requests N]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_COUNT = 5000
+
+
+def seed(count):
+    from app import db, VocabularyWord, add_learner
+
+    rng = random.Random(1)
+    db.create_all()
+    db.session.execute(db.insert(VocabularyWord), [{
+        'word': f"word{i:06d}",
+        'definition': f"definition of word {i} " + "lorem ipsum " * rng.randint(2, 10),
+        'synonyms': ", ".join(f"syn{rng.randint(0, 999)}" for _ in range(rng.randint(1, 5))),
+        'antonyms': ", ".join(f"ant{rng.randint(0, 999)}" for _ in range(rng.randint(0, 3))),
+        'example_sentence': f"An example sentence using word{i:06d} " + "dolor sit amet " * rng.randint(1, 6),
+    } for i in range(count)])
+    add_learner()
+
+
+def retained_bytes(load):
+    """Bytes still allocated while the result of load() is alive"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = load()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return after - before
+
+
+def measure_requests(client, requests):
+    """Mean ms, mean peak KB allocated and ORM objects loaded per quiz session request"""
+    from sqlalchemy import event
+    from app import VocabularyWord, UserWordState
+
+    loaded = [0]
+
+    def count_load(target, context):
+        loaded[0] += 1
+
+    for model in (VocabularyWord, UserWordState):
+        event.listen(model, 'load', count_load)
+    elapsed = peak = 0
+    try:
+        for _ in range(requests):
+            tracemalloc.start()
+            start = time.perf_counter()
+            client.get('/vocabulary/api/quiz/session?count=10')
+            elapsed += time.perf_counter() - start
+            peak += tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    finally:
+        for model in (VocabularyWord, UserWordState):
+            event.remove(model, 'load', count_load)
+    return elapsed / requests * 1000, peak / requests / 1024, loaded[0] / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('count', type=int, nargs='?', default=DEFAULT_COUNT)
+    parser.add_argument('--requests', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        os.environ['SIMILARITY_INDEX_PATH'] = os.path.join(tmp, 'similarity.json')
+        os.environ['WORD_SNAPSHOT_PATH'] = os.path.join(tmp, 'words.bin')
+        import app as app_module
+        from app import app, db, VocabularyWord, WordBankSnapshot, ensure_word_bank_version
+
+        app.logger.disabled = True
+        with app.app_context():
+            seed(args.count)
+            ensure_word_bank_version()
+            db.session.commit()
+            orm = retained_bytes(lambda: VocabularyWord.query.all())
+            db.session.expunge_all()
+
+            def build_snapshot():
+                snapshot = WordBankSnapshot()
+                snapshot.rebuild(db.session.query(*(getattr(VocabularyWord, f) for f in WordBankSnapshot.FIELDS)))
+                return snapshot
+
+            snapshot = retained_bytes(build_snapshot)
+
+        print(f"{args.count} words")
+        print(f"bytes per word: {orm / args.count:.0f} as VocabularyWord objects, "
+              f"{snapshot / args.count:.0f} in the snapshot")
+        print()
+        print(f"{'snapshot':>9} {'ms/request':>11} {'peak KB':>8} {'ORM objects':>12}")
+        client = app.test_client()
+        for enabled in (False, True):
+            app.config['WORD_SNAPSHOT'] = enabled
+            client.get('/vocabulary/api/quiz/session')  # Warm up: builds the queue, indexes and snapshot
+            ms, peak_kb, objects = measure_requests(client, args.requests)
+            print(f"{'on' if enabled else 'off':>9} {ms:>11.2f} {peak_kb:>8.0f} {objects:>12.1f}")
+
+        print()
+        print(f"{'cold start':>10} {'ms':>8}")
+        for label, saved in (('query', False), ('mapped', True)):
+            if not saved:
+                os.remove(os.environ['WORD_SNAPSHOT_PATH'])
+            app_module.word_bank = WordBankSnapshot(os.environ['WORD_SNAPSHOT_PATH'], app_module.word_bank.identity)
+            with app.app_context():
+                start = time.perf_counter()
+                app_module.word_bank_snapshot()
+                print(f"{label:>10} {(time.perf_counter() - start) * 1000:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,18 @@
+"""
+Pytest setup - point the root app at throwaway storage before it is imported
+"""
+
+import os
+import sys
+import tempfile
+
+_db_file = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f'sqlite:///{_db_file.name}'
+_storage_dir = tempfile.mkdtemp()
+os.environ['SIMILARITY_INDEX_PATH'] = os.path.join(_storage_dir, 'similarity_index.json')
+os.environ['WORD_SNAPSHOT_PATH'] = os.path.join(_storage_dir, 'word_snapshot.bin')
+os.environ['WORD_SNAPSHOT_SAVE_DELAY'] = '0'  # Save in the request; tests that need the delay set it
+
+# Make sure `import app` resolves to the root app, not src/app.py
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import app  # noqa: E402,F401
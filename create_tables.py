@@ -36,7 +36,7 @@ def create_database_tables():
         id SERIAL PRIMARY KEY,
         word VARCHAR(100) NOT NULL UNIQUE,
         definition TEXT NOT NULL,
-        date_added DATE DEFAULT CURRENT_DATE,
+        date_added DATE NOT NULL DEFAULT CURRENT_DATE,
         times_reviewed INTEGER DEFAULT 0,
         times_correct INTEGER DEFAULT 0,
         last_reviewed TIMESTAMP,
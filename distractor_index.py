@@ -0,0 +1,139 @@
+"""
+Process-level distractor index bucketed by mastery level
+
+Easy and Medium questions draw distractors from the words ranked by mastery
+(highest mastery first, or closest to 50% first). Keeping word ids in one
+sorted bucket per mastery level (0-100) turns those rankings into a walk
+over at most 101 buckets instead of a sort of the whole word bank, and a
+mastery change is a move between two buckets.
+"""
+
+import bisect
+import heapq
+import random
+import threading
+import time
+from itertools import islice
+
+MAX_MASTERY = 100
+
+
+class DistractorIndex:
+    """Word ids bucketed by mastery level, for O(1)-ish distractor selection"""
+
+    def __init__(self):
+        self.built_at = None
+        self.versions = None  # (word bank version, learner state version) the contents reflect
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._buckets = [[] for _ in range(MAX_MASTERY + 1)]  # mastery level -> sorted word ids
+        self._mastery = {}  # word_id -> mastery level
+        self._ids = []  # all word ids, for random sampling
+        self._positions = {}  # word_id -> index in self._ids
+
+    def __len__(self):
+        return len(self._mastery)
+
+    def is_fresh(self, versions):
+        """True if the index reflects the given (word bank, learner state) versions"""
+        return self.built_at is not None and self.versions == versions
+
+    def advance(self, part, version):
+        """Note a write this process applied that took version `part` (0 word bank, 1 learner state) to `version`
+
+        A index that had missed an earlier write stays stale.
+        """
+        with self._lock:
+            if self.versions is not None and self.versions[part] == version - 1:
+                self.versions = self.versions[:part] + (version,) + self.versions[part + 1:]
+
+    def rebuild(self, rows, versions=None):
+        """Replace the index contents with (word_id, mastery_level) pairs"""
+        with self._lock:
+            self._reset()
+            self.versions = versions
+            for word_id, mastery_level in sorted(rows):
+                level = self._level(mastery_level)
+                self._buckets[level].append(word_id)
+                self._mastery[word_id] = level
+                self._positions[word_id] = len(self._ids)
+                self._ids.append(word_id)
+            self.built_at = time.monotonic()
+
+    def invalidate(self):
+        """Force a rebuild on next use"""
+        with self._lock:
+            self.built_at = None
+
+    def update(self, word_id, mastery_level):
+        """Insert a word or move it to its new mastery bucket"""
+        with self._lock:
+            if self.built_at is None:
+                return
+            level = self._level(mastery_level)
+            old_level = self._mastery.get(word_id)
+            if old_level == level:
+                return
+            if old_level is None:
+                self._positions[word_id] = len(self._ids)
+                self._ids.append(word_id)
+            else:
+                self._remove_from_bucket(word_id, old_level)
+            bisect.insort(self._buckets[level], word_id)
+            self._mastery[word_id] = level
+
+    def discard(self, word_id):
+        """Remove a word from the index"""
+        with self._lock:
+            level = self._mastery.pop(word_id, None)
+            if level is None:
+                return
+            self._remove_from_bucket(word_id, level)
+            # Swap-remove from the sampling list
+            position = self._positions.pop(word_id)
+            last = self._ids.pop()
+            if last != word_id:
+                self._ids[position] = last
+                self._positions[last] = position
+
+    def highest_mastery(self, limit):
+        """Word ids by mastery descending (ties by id), like sorted(key=-mastery_level)"""
+        with self._lock:
+            result = []
+            for level in range(MAX_MASTERY, -1, -1):
+                result.extend(self._buckets[level][:limit - len(result)])
+                if len(result) >= limit:
+                    break
+            return result
+
+    def closest_to(self, target, limit):
+        """Word ids by distance from a mastery level (ties by id), like sorted(key=abs(m - target))"""
+        with self._lock:
+            result = []
+            for distance in range(MAX_MASTERY + 1):
+                below = target - distance
+                above = target + distance
+                buckets = []
+                if 0 <= below <= MAX_MASTERY:
+                    buckets.append(self._buckets[below])
+                if distance and 0 <= above <= MAX_MASTERY:
+                    buckets.append(self._buckets[above])
+                result.extend(islice(heapq.merge(*buckets), limit - len(result)))
+                if len(result) >= limit:
+                    break
+            return result
+
+    def sample(self, count):
+        """Random word ids"""
+        with self._lock:
+            return random.sample(self._ids, min(count, len(self._ids)))
+
+    @staticmethod
+    def _level(mastery_level):
+        return max(0, min(MAX_MASTERY, int(mastery_level or 0)))
+
+    def _remove_from_bucket(self, word_id, level):
+        bucket = self._buckets[level]
+        del bucket[bisect.bisect_left(bucket, word_id)]
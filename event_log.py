@@ -0,0 +1,126 @@
+"""
+Write-behind buffer for the append-only review event log
+
+Request handlers only append to an in-memory list. A background thread
+bulk-inserts the buffered events when the buffer reaches flush_size or its
+oldest event is flush_interval seconds old, and whatever is left is flushed
+at interpreter shutdown.
+
+Durability: this trades the log's durability for answer latency. The
+answer itself (word state, profile deltas) is committed in the request;
+only its log row waits here. Rows not yet flushed are lost if the process
+is killed or, on serverless platforms, frozen and discarded: atexit does
+not run then, and the worker is a daemon thread. That is up to flush_size
+rows or flush_interval seconds of answers per process; callers that cannot
+accept it flush at the end of each request instead (the app does on the
+serverless pool profile). While writes fail, rows are kept for retry up to
+max_rows, after which the oldest are dropped and the count is logged.
+"""
+
+import atexit
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Thread-safe buffer that hands batches of rows to a bulk writer"""
+
+    def __init__(self, writer, flush_size=50, flush_interval=5.0, max_rows=10000):
+        self.writer = writer  # Callable taking a list of row dicts
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_rows = max_rows  # Oldest rows beyond this are dropped (e.g. while the database is down)
+        self.dropped = 0
+        self._rows = []
+        self._oldest = None
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock()
+        self._worker = None
+        self._closed = False
+        atexit.register(self.close)
+
+    def __len__(self):
+        with self._condition:
+            return len(self._rows)
+
+    def append(self, row):
+        """Buffer one row; never touches the database"""
+        self.extend([row])
+
+    def extend(self, rows):
+        """Buffer several rows; never touches the database"""
+        if not rows:
+            return
+        with self._condition:
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.extend(rows)
+            self._drop_oldest()
+            self._ensure_worker()
+            if len(self._rows) >= self.flush_size:
+                self._condition.notify()
+
+    def flush(self):
+        """Write everything buffered so far; returns the number of rows written"""
+        with self._flush_lock:
+            with self._condition:
+                rows, self._rows, self._oldest = self._rows, [], None
+            if not rows:
+                return 0
+            try:
+                self.writer(rows)
+            except Exception:
+                # Put the rows back so the next flush retries them
+                with self._condition:
+                    self._rows[:0] = rows
+                    self._oldest = self._oldest or time.monotonic()
+                    self._drop_oldest()
+                raise
+            return len(rows)
+
+    def close(self):
+        """Stop the background thread and flush what is left"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"Could not flush buffered rows on shutdown: {e}")
+
+    def _drop_oldest(self):
+        """Trim the buffer to max_rows, oldest first (called holding the condition)"""
+        excess = len(self._rows) - self.max_rows
+        if excess > 0:
+            del self._rows[:excess]
+            self.dropped += excess
+            logger.warning(f"Write-behind buffer full: dropped {excess} oldest rows ({self.dropped} in total)")
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            self._worker = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._worker.start()
+
+    def _due(self):
+        return bool(self._rows) and (
+            len(self._rows) >= self.flush_size
+            or time.monotonic() - self._oldest >= self.flush_interval)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._due():
+                    timeout = None
+                    if self._rows:
+                        timeout = max(0.0, self.flush_interval - (time.monotonic() - self._oldest))
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"Write-behind flush failed, will retry: {e}")
+                time.sleep(self.flush_interval)
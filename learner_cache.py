@@ -0,0 +1,50 @@
+"""
+Process-local caches kept per learner
+
+Each learner has their own quiz priority queue, distractor index and
+dashboard statistics, since all of them are built from that learner's word
+state. LearnerCaches creates a learner's cache on first use and keeps only
+the most recently used ones, so memory grows with the learners active in
+this process rather than with every learner in the database.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class LearnerCaches:
+    """Lazily created cache per learner id, least recently used evicted"""
+
+    def __init__(self, factory, max_learners=100):
+        self.factory = factory  # Callable taking a learner id and returning a new cache
+        self.max_learners = max_learners
+        self._caches = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getitem__(self, user_id):
+        with self._lock:
+            cache = self._caches.get(user_id)
+            if cache is None:
+                cache = self._caches[user_id] = self.factory(user_id)
+                if len(self._caches) > self.max_learners:
+                    self._caches.popitem(last=False)
+            else:
+                self._caches.move_to_end(user_id)
+            return cache
+
+    def __len__(self):
+        return len(self._caches)
+
+    def items(self):
+        """(learner id, cache) pairs for the learners cached right now"""
+        with self._lock:
+            return list(self._caches.items())
+
+    def values(self):
+        with self._lock:
+            return list(self._caches.values())
+
+    def invalidate(self):
+        """Force every cached learner's cache to rebuild on next use"""
+        for cache in self.values():
+            cache.invalidate()
@@ -0,0 +1,165 @@
+"""
+Process-level priority queue for quiz word selection
+
+Priority for a word is the same formula quiz() has always used:
+
+    priority = needs_review * 100
+             + (100 - |difficulty - user_difficulty|) * 0.5
+             + mastery_gap * 0.3
+             + mistake_boost
+
+Only the difficulty-match term depends on the learner, and word difficulty
+takes few distinct values, so words are kept in one max-heap per
+(due, difficulty) bucket ordered by the learner-independent part of the
+score. Answering a word pushes a new heap entry (O(log n)); older entries
+for that word are skipped lazily. Words that are not due yet also sit in a
+heap keyed by next_review_date and move to the due buckets once that date
+arrives.
+"""
+
+import heapq
+import threading
+import time
+
+
+class QuizPriorityQueue:
+    """Indexed priority queue of quiz candidates keyed by word id"""
+
+    def __init__(self):
+        self.built_at = None
+        self.versions = None  # (word bank version, learner state version) the contents reflect
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._entries = {}  # word_id -> (version, difficulty, static_score, next_due)
+        self._due = {}  # difficulty -> heap of (-static_score, word_id, version)
+        self._waiting = {}  # difficulty -> heap of (-static_score, word_id, version)
+        self._schedule = []  # heap of (next_due, word_id, version) for words not yet due
+        self._version = 0
+        self._stale = 0
+        self._today = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def is_fresh(self, versions):
+        """True if the queue reflects the given (word bank, learner state) versions"""
+        return self.built_at is not None and self.versions == versions
+
+    def advance(self, part, version):
+        """Note a write this process applied that took version `part` (0 word bank, 1 learner state) to `version`
+
+        A queue that had missed an earlier write stays stale.
+        """
+        with self._lock:
+            if self.versions is not None and self.versions[part] == version - 1:
+                self.versions = self.versions[:part] + (version,) + self.versions[part + 1:]
+
+    def rebuild(self, entries, today, versions=None):
+        """Replace the queue contents with (word_id, difficulty, static_score, next_due) tuples"""
+        with self._lock:
+            self._reset()
+            self.versions = versions
+            self._today = today
+            for word_id, difficulty, static_score, next_due in entries:
+                self._insert(word_id, difficulty, static_score, next_due)
+            self.built_at = time.monotonic()
+
+    def invalidate(self):
+        """Force a rebuild on next use"""
+        with self._lock:
+            self.built_at = None
+
+    def update(self, word_id, difficulty, static_score, next_due):
+        """Insert a word or replace its scoring inputs in O(log n)"""
+        with self._lock:
+            if self.built_at is None:
+                return
+            if word_id in self._entries:
+                self._stale += 1
+            self._insert(word_id, difficulty, static_score, next_due)
+            self._compact_if_needed()
+
+    def discard(self, word_id):
+        """Remove a word from the queue"""
+        with self._lock:
+            if self._entries.pop(word_id, None) is not None:
+                self._stale += 1
+                self._compact_if_needed()
+
+    def top(self, user_difficulty, today, k=20):
+        """Return up to k word ids in priority order for the given learner difficulty"""
+        with self._lock:
+            self._release_due(today)
+
+            # One cursor per non-empty bucket: best remaining entry of each heap
+            cursors = []
+            for is_due, buckets in ((True, self._due), (False, self._waiting)):
+                for difficulty, heap in buckets.items():
+                    offset = (100 if is_due else 0) + (100 - abs(difficulty - user_difficulty)) * 0.5
+                    head = self._next_valid(heap)
+                    if head is not None:
+                        cursors.append((-(offset - head[0]), head[1], offset, heap))
+            heapq.heapify(cursors)
+
+            result = []
+            popped = []
+            while cursors and len(result) < k:
+                _, word_id, offset, heap = heapq.heappop(cursors)
+                entry = heapq.heappop(heap)
+                popped.append((heap, entry))
+                result.append(word_id)
+                head = self._next_valid(heap)
+                if head is not None:
+                    heapq.heappush(cursors, (-(offset - head[0]), head[1], offset, heap))
+
+            # Put the consumed entries back so the queue is unchanged
+            for heap, entry in popped:
+                heapq.heappush(heap, entry)
+            return result
+
+    def _insert(self, word_id, difficulty, static_score, next_due):
+        self._version += 1
+        version = self._version
+        self._entries[word_id] = (version, difficulty, static_score, next_due)
+        item = (-static_score, word_id, version)
+        if next_due is None or next_due <= self._today:
+            heapq.heappush(self._due.setdefault(difficulty, []), item)
+        else:
+            heapq.heappush(self._waiting.setdefault(difficulty, []), item)
+            heapq.heappush(self._schedule, (next_due, word_id, version))
+
+    def _is_current(self, word_id, version):
+        entry = self._entries.get(word_id)
+        return entry is not None and entry[0] == version
+
+    def _next_valid(self, heap):
+        """Drop stale entries from the top of a heap and return the head, if any"""
+        while heap and not self._is_current(heap[0][1], heap[0][2]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _release_due(self, today):
+        """Move words whose next_review_date has arrived into the due buckets"""
+        if self._today is not None and today <= self._today:
+            return
+        self._today = today
+        while self._schedule and self._schedule[0][0] <= today:
+            _, word_id, version = heapq.heappop(self._schedule)
+            if self._is_current(word_id, version):
+                _, difficulty, static_score, next_due = self._entries[word_id]
+                self._stale += 1
+                self._insert(word_id, difficulty, static_score, next_due)
+
+    def _compact_if_needed(self):
+        """Rebuild the heaps when lazily deleted entries outnumber live ones"""
+        if self._stale <= max(64, 2 * len(self._entries)):
+            return
+        entries = [(word_id, difficulty, static_score, next_due)
+                   for word_id, (_, difficulty, static_score, next_due) in self._entries.items()]
+        today = self._today
+        self._reset()
+        self._today = today
+        for entry in entries:
+            self._insert(*entry)
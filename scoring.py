@@ -0,0 +1,86 @@
+"""
+Vectorized inputs for the quiz priority queue
+
+Loads the scoring columns of a learner's word states into NumPy arrays and
+computes every word's priority queue entry at once: the same
+(word_id, difficulty, static_score, next_due) tuples app.quiz_queue_entry()
+builds one row at a time. The learner-dependent part of the priority and
+the ranking stay in QuizPriorityQueue, so there is one definition of the
+score. NumPy is optional (requirements-extras.txt); callers should check
+HAVE_NUMPY and fall back to the per-row path.
+"""
+
+from operator import attrgetter
+
+try:
+    import numpy as np
+    HAVE_NUMPY = True
+except ImportError:  # NumPy is not bundled with the Vercel deployment
+    np = None
+    HAVE_NUMPY = False
+
+
+class ScoringColumns:
+    """Column arrays for the fields that drive quiz priority"""
+
+    FIELDS = ('word_id', 'times_reviewed', 'times_correct', 'last_response_time',
+              'mastery_level', 'streak', 'last_reviewed', 'next_review_date')
+
+    def __init__(self, ids, times_reviewed, times_correct, last_response_time,
+                 mastery_level, streak, next_due):
+        self.ids = ids
+        self.times_reviewed = times_reviewed
+        self.times_correct = times_correct
+        self.last_response_time = last_response_time  # NaN where unknown
+        self.mastery_level = mastery_level
+        self.streak = streak
+        self.next_due = next_due  # next_review_date, None where never reviewed (always due)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_rows(cls, rows):
+        """Build arrays from rows exposing the FIELDS attributes (ORM objects or query rows)"""
+        columns = list(zip(*map(attrgetter(*cls.FIELDS), rows))) or [()] * len(cls.FIELDS)
+        (ids, times_reviewed, times_correct, last_response_time, mastery_level,
+         streak, last_reviewed, next_review_date) = columns
+
+        def int_array(values):
+            return np.array([v or 0 for v in values], dtype=np.int64)
+
+        return cls(
+            ids=np.array(ids, dtype=np.int64),
+            times_reviewed=int_array(times_reviewed),
+            times_correct=int_array(times_correct),
+            last_response_time=np.array(last_response_time, dtype=np.float64),  # None becomes NaN
+            mastery_level=int_array(mastery_level),
+            streak=int_array(streak),
+            # Same due rule as UserWordState.due_condition(): never-reviewed words are always due
+            next_due=[due if reviewed else None for due, reviewed in zip(next_review_date, last_reviewed)],
+        )
+
+    def difficulty(self):
+        """Vectorized UserWordState.calculate_difficulty()"""
+        reviewed = self.times_reviewed
+        with np.errstate(divide='ignore', invalid='ignore'):
+            accuracy = np.trunc((self.times_correct / reviewed) * 100)
+        base_difficulty = 100 - accuracy
+
+        # Adjust based on response time (if available)
+        rt = self.last_response_time
+        has_rt = ~np.isnan(rt) & (rt != 0)
+        base_difficulty = base_difficulty + np.where(has_rt & (rt > 10), 10, 0)
+        base_difficulty = base_difficulty - np.where(has_rt & (rt < 3), 10, 0)
+
+        return np.where(reviewed < 3, 50.0, np.clip(base_difficulty, 10, 100))
+
+    def static_score(self):
+        """Learner-independent part of the priority: mastery gap and mistake boost"""
+        mastery_gap = 100 - self.mastery_level
+        mistake_boost = np.where((self.streak == 0) & (self.times_reviewed > 0), 50, 0)
+        return mastery_gap * 0.3 + mistake_boost
+
+    def queue_entries(self):
+        """(word_id, difficulty, static_score, next_due) for every word, as app.quiz_queue_entry()"""
+        return zip(self.ids.tolist(), self.difficulty().tolist(), self.static_score().tolist(), self.next_due)
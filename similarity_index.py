@@ -0,0 +1,222 @@
+"""
+Offline similarity index for picking confusable distractors
+
+Each word is turned into a TF-IDF vector built from its definition,
+synonyms and antonyms plus character trigrams of the word itself, so words
+with related meanings or similar spelling end up close together. Nearest
+neighbours come from an inverted index and are cached per word, so repeat
+lookups are a dictionary read. Everything runs locally; the index is saved
+to disk so a cold start can reload it instead of re-reading every
+definition.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+from collections import Counter, defaultdict
+
+STOPWORDS = frozenset("""
+    a an and are as at be been being by for from has have in into is it its
+    of on or that the this to was were which who with without not no one
+    something someone someones very so than too can do does done
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z]+")
+
+
+def tokenize(text):
+    """Lower-case word tokens with stopwords and trailing plural 's' removed"""
+    tokens = []
+    for token in TOKEN_RE.findall((text or '').lower()):
+        if token in STOPWORDS or len(token) < 3:
+            continue
+        if len(token) > 4 and token.endswith('s') and not token.endswith('ss'):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+def word_terms(word, definition, synonyms, antonyms):
+    """Term counts describing a word"""
+    terms = Counter(tokenize(definition))
+    # Synonyms and antonyms are strong hints about what a word gets confused with
+    for token in tokenize(synonyms) + tokenize(antonyms):
+        terms[token] += 2
+    # Character trigrams of the word catch look-alike spellings
+    padded = f"#{(word or '').lower()}#"
+    for i in range(len(padded) - 2):
+        terms['#' + padded[i:i + 3]] += 1
+    return terms
+
+
+class SimilarityIndex:
+    """TF-IDF nearest-neighbour index over word content"""
+
+    VERSION = 2
+
+    def __init__(self, path=None, refit_ratio=0.2):
+        self.path = path
+        self.refit_ratio = refit_ratio  # Refit IDF once this share of the words has changed
+        self.signature = None
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._terms = {}  # word_id -> {term: count}
+        self._postings = defaultdict(set)  # term -> word ids
+        self._idf = {}
+        self._vectors = {}  # word_id -> normalized {term: weight}
+        self._neighbours = {}  # word_id -> [word_id, ...] most similar first
+        self._changes = 0
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, word_id):
+        return word_id in self._terms
+
+    def fit(self, rows, signature=None):
+        """Index (id, word, definition, synonyms, antonyms) rows from scratch"""
+        with self._lock:
+            self._reset()
+            for word_id, word, definition, synonyms, antonyms in rows:
+                terms = word_terms(word, definition, synonyms, antonyms)
+                self._terms[word_id] = terms
+                for term in terms:
+                    self._postings[term].add(word_id)
+            self._refit()
+            self.signature = signature
+
+    def update(self, word_id, word, definition, synonyms, antonyms, signature=None):
+        """Add or re-index a single word"""
+        with self._lock:
+            old_terms = self._terms.get(word_id, {})
+            terms = word_terms(word, definition, synonyms, antonyms)
+            self._invalidate_neighbours(word_id, set(old_terms) | set(terms))
+            for term in old_terms:
+                self._postings[term].discard(word_id)
+            self._terms[word_id] = terms
+            for term in terms:
+                self._postings[term].add(word_id)
+            self._vectors[word_id] = self._vector(terms)
+            self.signature = signature
+            self._note_change()
+
+    def discard(self, word_id, signature=None):
+        """Remove a word from the index"""
+        with self._lock:
+            terms = self._terms.pop(word_id, None)
+            if terms is None:
+                return
+            self._invalidate_neighbours(word_id, terms)
+            for term in terms:
+                self._postings[term].discard(word_id)
+            self._vectors.pop(word_id, None)
+            self.signature = signature
+            self._note_change()
+
+    def similar(self, word_id, k=10):
+        """Ids of the k words most similar to word_id, most similar first"""
+        with self._lock:
+            neighbours = self._neighbours.get(word_id)
+            if neighbours is None or len(neighbours) < k <= len(self._terms) - 1:
+                neighbours = self._nearest(word_id, max(k, 10))
+                self._neighbours[word_id] = neighbours
+            return neighbours[:k]
+
+    def save(self, path=None):
+        """Write the index to disk atomically"""
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            data = {
+                'version': self.VERSION,
+                'signature': self.signature,
+                'terms': {str(word_id): terms for word_id, terms in self._terms.items()},
+                'idf': self._idf,
+                'neighbours': {str(word_id): ids for word_id, ids in self._neighbours.items()},
+                'changes': self._changes,
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, path=None):
+        """Load a saved index; returns False if there is no usable file"""
+        path = path or self.path
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get('version') != self.VERSION:
+            return False
+
+        with self._lock:
+            self._reset()
+            for key, terms in data['terms'].items():
+                word_id = int(key)
+                self._terms[word_id] = terms
+                for term in terms:
+                    self._postings[term].add(word_id)
+            self._idf = data['idf']
+            self._vectors = {word_id: self._vector(terms) for word_id, terms in self._terms.items()}
+            self._neighbours = {int(key): ids for key, ids in data['neighbours'].items()}
+            self._changes = data.get('changes', 0)
+            self.signature = data.get('signature')
+        return True
+
+    def _refit(self):
+        """Recompute IDF weights and every vector"""
+        total = len(self._terms)
+        self._idf = {term: math.log((1 + total) / (1 + len(ids))) + 1
+                     for term, ids in self._postings.items() if ids}
+        self._vectors = {word_id: self._vector(terms) for word_id, terms in self._terms.items()}
+        self._neighbours = {}
+        self._changes = 0
+
+    def _vector(self, terms):
+        # Terms unseen at fit time get the weight of a term that appears once
+        default_idf = math.log((1 + len(self._terms)) / 2) + 1
+        vector = {term: (1 + math.log(count)) * self._idf.get(term, default_idf)
+                  for term, count in terms.items()}
+        norm = math.sqrt(sum(weight * weight for weight in vector.values())) or 1.0
+        return {term: weight / norm for term, weight in vector.items()}
+
+    def _nearest(self, word_id, k):
+        vector = self._vectors.get(word_id)
+        if not vector:
+            return []
+        scores = defaultdict(float)
+        for term, weight in vector.items():
+            for other_id in self._postings.get(term, ()):
+                if other_id != word_id:
+                    scores[other_id] += weight * self._vectors[other_id][term]
+        best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [other_id for other_id, _ in best]
+
+    def _invalidate_neighbours(self, word_id, terms):
+        """Drop cached neighbour lists that a change to word_id could affect"""
+        self._neighbours.pop(word_id, None)
+        for term in terms:
+            for other_id in self._postings.get(term, ()):
+                self._neighbours.pop(other_id, None)
+
+    def _note_change(self):
+        self._changes += 1
+        if self._changes > self.refit_ratio * max(len(self._terms), 10):
+            self._refit()
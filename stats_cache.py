@@ -0,0 +1,133 @@
+"""
+Process-local cache of dashboard statistics with write-through updates
+
+The dashboard, goals and progress pages only need a handful of numbers
+about the word bank. They are loaded with one aggregate query, then kept
+current by the write paths (adding, deleting and answering words) applying
+small deltas, so page views don't touch the word table. Optionally the
+numbers are saved to a JSON file so a fresh process can start warm.
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date
+
+# Mastery distribution buckets: (label, lowest level, highest level)
+MASTERY_BUCKETS = [
+    ('Learning (0-25%)', 0, 25),
+    ('Practicing (26-50%)', 26, 50),
+    ('Good (51-75%)', 51, 75),
+    ('Mastered (76-100%)', 76, 100),
+]
+
+
+def mastery_bucket(mastery_level):
+    """Label of the distribution bucket a mastery level falls in"""
+    for label, _, highest in MASTERY_BUCKETS:
+        if mastery_level <= highest:
+            return label
+    return MASTERY_BUCKETS[-1][0]
+
+
+class DashboardStatsCache:
+    """Cached word bank statistics, kept current by write-through deltas"""
+
+    def __init__(self, loader, path=None, max_age=300):
+        self.loader = loader  # Callable returning a fresh stats dict from the database
+        self.path = path
+        self.max_age = max_age  # Seconds before a reload picks up writes from other processes
+        self._stats = None
+        self._loaded_at = None
+        self._lock = threading.RLock()
+
+    def get(self):
+        """Current statistics (loads them on first use, after max_age, or on a new day)"""
+        with self._lock:
+            if not self._is_fresh():
+                if not self._load_file():
+                    self._stats = self.loader()
+                    self._stats['day'] = date.today().isoformat()
+                    self._loaded_at = time.time()
+                    self._save()
+            stats = dict(self._stats)
+            stats['mastery_levels'] = dict(self._stats['mastery_levels'])
+            return stats
+
+    def invalidate(self):
+        """Force a reload on next use"""
+        with self._lock:
+            self._stats = None
+            self._loaded_at = None
+            if self.path and os.path.exists(self.path):
+                try:
+                    os.remove(self.path)
+                except OSError:
+                    pass
+
+    def word_added(self, mastery_level=0, added_today=True):
+        with self._lock:
+            if self._is_fresh():
+                self._stats['total_words'] += 1
+                self._stats['words_today'] += 1 if added_today else 0
+                self._stats['mastery_sum'] += mastery_level
+                self._stats['mastery_levels'][mastery_bucket(mastery_level)] += 1
+                self._save()
+
+    def word_deleted(self, mastery_level, times_reviewed, times_correct, added_today):
+        with self._lock:
+            if self._is_fresh():
+                self._stats['total_words'] -= 1
+                self._stats['words_today'] -= 1 if added_today else 0
+                self._stats['mastery_sum'] -= mastery_level
+                self._stats['mastery_levels'][mastery_bucket(mastery_level)] -= 1
+                self._stats['total_reviews'] -= times_reviewed
+                self._stats['total_correct'] -= times_correct
+                self._save()
+
+    def answers_recorded(self, answers):
+        """Apply (old_mastery, new_mastery, correct) tuples for answered words"""
+        with self._lock:
+            if not self._is_fresh():
+                return
+            for old_mastery, new_mastery, correct in answers:
+                self._stats['total_reviews'] += 1
+                self._stats['total_correct'] += 1 if correct else 0
+                self._stats['mastery_sum'] += new_mastery - old_mastery
+                self._stats['mastery_levels'][mastery_bucket(old_mastery)] -= 1
+                self._stats['mastery_levels'][mastery_bucket(new_mastery)] += 1
+            self._save()
+
+    def _is_fresh(self):
+        return (self._stats is not None
+                and time.time() - self._loaded_at < self.max_age
+                and self._stats['day'] == date.today().isoformat())
+
+    def _load_file(self):
+        """Adopt statistics saved by a recent process, if any"""
+        if not self.path or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        self._stats, self._loaded_at = data['stats'], data['saved_at']
+        if not self._is_fresh():
+            self._stats = self._loaded_at = None
+            return False
+        return True
+
+    def _save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'stats': self._stats, 'saved_at': self._loaded_at}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass  # Persistence is best-effort; the in-process copy is authoritative
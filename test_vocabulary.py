@@ -0,0 +1,1669 @@
+#!/usr/bin/env python3
+"""
+Tests for the root (Vercel) app - run with: python -m pytest -q
+"""
+
+import random
+from datetime import datetime, date, timedelta
+
+import pytest
+
+from app import app, db, VocabularyWord, UserWordState, UserProfile, ProfileDelta, profile_view, select_quiz_pool
+
+
+def reset_database():
+    """Drop and recreate all tables"""
+    from app import dashboard_stats, quiz_queues, distractor_indexes, word_bank, ensure_word_bank_version
+
+    db.drop_all()
+    db.create_all()
+    ensure_word_bank_version()
+    db.session.commit()
+    for caches in (dashboard_stats, quiz_queues, distractor_indexes, word_bank):
+        caches.invalidate()
+
+
+def add_sample_words(count, seed=42, **profile):
+    """Add words with a spread of review state for the first learner (created with profile if missing)"""
+    rng = random.Random(seed)
+    today = date.today()
+    user = UserProfile.query.order_by(UserProfile.id).first()
+    if user is None:
+        user = UserProfile(**profile)
+        db.session.add(user)
+    for i in range(count):
+        word = VocabularyWord(word=f"word{i}", definition=f"definition {i}")
+        db.session.add(word)
+        db.session.flush()
+        times_reviewed = rng.randint(0, 20)
+        last_reviewed = None
+        if times_reviewed:
+            last_reviewed = datetime.now() - timedelta(days=rng.randint(0, 30))
+        review_interval = rng.choice([1, 2, 3, 5, 8, 13])
+        db.session.add(UserWordState(
+            user_id=user.id,
+            word_id=word.id,
+            times_reviewed=times_reviewed,
+            times_correct=rng.randint(0, times_reviewed),
+            last_reviewed=last_reviewed,
+            last_response_time=rng.choice([None, 1.5, 5.0, 12.0]),
+            mastery_level=rng.randint(0, 100),
+            streak=rng.randint(0, 4),
+            review_interval=review_interval,
+            next_review_date=(last_reviewed.date() + timedelta(days=review_interval))
+            if last_reviewed else today + timedelta(days=1)
+        ))
+    db.session.commit()
+
+
+def learner_states(user_id=1):
+    """A learner's word states, by word id"""
+    return UserWordState.query.filter_by(user_id=user_id).order_by(UserWordState.word_id).all()
+
+
+def python_priority(state, current_difficulty):
+    """The original per-word scoring loop from quiz()"""
+    days_since_review = (date.today() - state.last_reviewed.date()).days if state.last_reviewed else 999
+    needs_review = days_since_review >= state.review_interval
+    difficulty_match = 100 - abs(state.calculate_difficulty() - current_difficulty)
+    mastery_gap = 100 - state.mastery_level
+    mistake_boost = 50 if state.streak == 0 and state.times_reviewed > 0 else 0
+    return (needs_review * 100) + (difficulty_match * 0.5) + (mastery_gap * 0.3) + mistake_boost
+
+
+def test_sql_priority_matches_python_scoring():
+    """SQL priority must agree with the original Python weights"""
+    with app.app_context():
+        reset_database()
+        add_sample_words(200)
+
+        priority = UserWordState.priority_expression(30.0).label('priority')
+        rows = db.session.query(UserWordState, priority).all()
+        for state, sql_priority in rows:
+            # int() truncation of float accuracy can differ by one point from integer division
+            assert abs(python_priority(state, 30.0) - sql_priority) <= 0.5 + 1e-9, state.word_id
+
+
+def test_quiz_pool_is_top_k_by_priority():
+    """select_quiz_pool returns the same top words as a full Python sort"""
+    with app.app_context():
+        reset_database()
+        add_sample_words(200, seed=7)
+
+        pool = select_quiz_pool(1, 55.0, limit=20)
+        assert len(pool) == 20
+
+        scores = sorted((python_priority(s, 55.0) for s in learner_states()), reverse=True)
+        pool_scores = [python_priority(state, 55.0) for _, state in pool]
+        for expected, actual in zip(scores, pool_scores):
+            assert abs(expected - actual) <= 0.5 + 1e-9
+
+
+def test_quiz_page_renders():
+    """The quiz page renders the quiz shell"""
+    with app.app_context():
+        reset_database()
+        add_sample_words(10)
+
+    client = app.test_client()
+    response = client.get('/vocabulary/quiz')
+    assert response.status_code == 200
+    assert b'/vocabulary/api/quiz/session' in response.data
+
+
+def test_quiz_session_bundle():
+    """The session API returns a whole quiz of distinct questions with four options each"""
+    with app.app_context():
+        reset_database()
+        add_sample_words(40, seed=9)
+
+    client = app.test_client()
+    for confidence in (20.0, 50.0, 70.0, 90.0):
+        with app.app_context():
+            user = UserProfile.query.first() or UserProfile()
+            user.confidence_score = confidence
+            db.session.add(user)
+            db.session.commit()
+
+        data = client.get('/vocabulary/api/quiz/session?count=10').get_json()
+        assert len(data['questions']) == 10
+        assert len({q['id'] for q in data['questions']}) == 10
+        for question in data['questions']:
+            option_ids = [o['id'] for o in question['options']]
+            assert len(option_ids) == 4
+            assert len(set(option_ids)) == 4
+            assert question['id'] in option_ids
+
+
+def test_quiz_session_needs_four_words():
+    """The session API refuses to build a quiz from fewer than four words"""
+    with app.app_context():
+        reset_database()
+        add_sample_words(3)
+
+    response = app.test_client().get('/vocabulary/api/quiz/session')
+    assert response.status_code == 400
+
+
+def test_priority_queue_matches_sql_pool():
+    """The in-process queue returns the same ranking as the SQL query"""
+    from app import get_quiz_pool, cache_versions
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(300, seed=3)
+
+        for difficulty in (10.0, 30.0, 50.0, 85.0):
+            queue_scores = [python_priority(s, difficulty) for _, s in get_quiz_pool(1, difficulty, cache_versions(1))]
+            sql_scores = [python_priority(s, difficulty) for _, s in select_quiz_pool(1, difficulty)]
+            assert len(queue_scores) == 20
+            for expected, actual in zip(sql_scores, queue_scores):
+                assert abs(expected - actual) <= 0.5 + 1e-9
+
+
+def test_priority_queue_tracks_answers_and_deletes():
+    """Answering and deleting words updates the queue without a rebuild"""
+    from app import get_quiz_pool, quiz_queues, cache_versions
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(50, seed=11)
+        top_id = get_quiz_pool(1, 30.0, cache_versions(1))[0][0].id
+        quiz_queue = quiz_queues[1]
+        built_at = quiz_queue.built_at
+
+    client = app.test_client()
+    client.post('/vocabulary/quiz/check', data={'word_id': top_id, 'answer_id': top_id, 'response_time': 2})
+
+    with app.app_context():
+        # A correct answer schedules the word for later, so it drops down the queue
+        pool_ids = [w.id for w, _ in get_quiz_pool(1, 30.0, cache_versions(1))]
+        assert quiz_queue.built_at == built_at
+        assert pool_ids[0] != top_id
+
+    other_id = pool_ids[0]
+    client.get(f'/vocabulary/delete_word/{other_id}')
+
+    with app.app_context():
+        assert other_id not in [w.id for w, _ in get_quiz_pool(1, 30.0, cache_versions(1))]
+        assert quiz_queue.built_at == built_at
+
+
+def test_quiz_indexes_follow_versions_instead_of_counting_words():
+    """A session reads two version counters, not COUNT(*); writes from another worker force a rebuild"""
+    from app import quiz_queues, distractor_indexes, bump_learner_state_version, UserWordState
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(30, seed=19)
+
+    client = app.test_client()
+    client.get('/vocabulary/api/quiz/session')
+    quiz_queue, distractor_index = quiz_queues[1], distractor_indexes[1]
+    built_at = quiz_queue.built_at
+
+    statements = []
+    from sqlalchemy import event
+    record = lambda conn, cursor, statement, *args: statements.append(statement.lower())
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        assert client.get('/vocabulary/api/quiz/session').status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert not any('count(' in statement for statement in statements)
+    assert quiz_queue.built_at == built_at
+
+    # Answers and word writes in this process keep the indexes current
+    client.post('/vocabulary/quiz/check', data={'word_id': 1, 'answer_id': 1, 'response_time': 2})
+    client.post('/vocabulary/edit_word/2', data={'word': 'renamed', 'definition': 'd'})
+    client.get('/vocabulary/api/quiz/session')
+    assert quiz_queue.built_at == built_at
+
+    # Another worker answers: this process's heap no longer matches, so it is rebuilt
+    with app.app_context():
+        db.session.execute(db.update(UserWordState).where(UserWordState.word_id == 3)
+                           .values(mastery_level=100, next_review_date=date.today() + timedelta(days=30)))
+        bump_learner_state_version(1)
+        db.session.commit()
+    distractor_built_at = distractor_index.built_at
+    client.get('/vocabulary/api/quiz/session')
+    assert quiz_queue.built_at != built_at and distractor_index.built_at != distractor_built_at
+    assert quiz_queue._entries[3][3] == date.today() + timedelta(days=30)
+
+
+def test_vectorized_queue_entries_match_per_row_entries():
+    """NumPy scoring builds exactly the priority queue entries quiz_queue_entry() does"""
+    from app import quiz_queue_entry
+    from scoring import HAVE_NUMPY, ScoringColumns
+    if not HAVE_NUMPY:
+        pytest.skip("NumPy is not installed")
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(300, seed=5)
+        # Due by next_review_date even though review_interval alone says it is not
+        state = db.session.get(UserWordState, (1, 1))
+        state.last_reviewed, state.review_interval = datetime.now(), 13
+        state.next_review_date = date.today()
+        db.session.commit()
+        states = learner_states()
+
+        columns = ScoringColumns.from_rows(states)
+        assert columns.difficulty().tolist() == [s.calculate_difficulty() for s in states]
+        entries = list(columns.queue_entries())
+        assert entries == [quiz_queue_entry(s) for s in states]
+        assert entries[0][3] == date.today()
+
+
+def test_distractor_index_matches_sorted_rankings():
+    """Mastery buckets reproduce the Easy/Medium sort orders and follow updates"""
+    from distractor_index import DistractorIndex
+
+    rng = random.Random(13)
+    mastery = {word_id: rng.randint(0, 100) for word_id in range(1, 301)}
+    index = DistractorIndex()
+    index.rebuild(mastery.items())
+
+    def check():
+        ids = sorted(mastery)
+        assert index.highest_mastery(15) == sorted(ids, key=lambda i: -mastery[i])[:15]
+        assert index.closest_to(50, 15) == sorted(ids, key=lambda i: abs(mastery[i] - 50))[:15]
+
+    check()
+    for word_id in rng.sample(sorted(mastery), 50):
+        mastery[word_id] = rng.randint(0, 100)
+        index.update(word_id, mastery[word_id])
+    for word_id in rng.sample(sorted(mastery), 20):
+        del mastery[word_id]
+        index.discard(word_id)
+    check()
+    assert len(index) == len(mastery)
+    assert set(index.sample(500)) == set(mastery)
+
+
+SIMILARITY_WORDS = [
+    ("happy", "Feeling or showing pleasure or contentment", "joyful, cheerful, glad", "sad, unhappy"),
+    ("joyful", "Feeling, expressing, or causing great pleasure and happiness", "happy, cheerful, glad", "sad"),
+    ("melancholy", "A feeling of pensive sadness", "sorrow, gloom, sadness", "happiness, joy"),
+    ("sorrowful", "Feeling or showing grief and sadness", "sad, mournful, melancholy", "happy, joyful"),
+    ("ubiquitous", "Present, appearing, or found everywhere", "omnipresent, universal", "rare, scarce"),
+    ("scarce", "Insufficient for the demand; rare", "rare, sparse, meager", "plentiful, ubiquitous"),
+    ("meticulous", "Showing great attention to detail; very careful and precise", "careful, thorough", "careless"),
+    ("negligent", "Failing to take proper care in doing something", "careless, lax", "careful, meticulous"),
+]
+
+
+def add_similarity_words():
+    from app import add_word_states
+
+    for word, definition, synonyms, antonyms in SIMILARITY_WORDS:
+        db.session.add(VocabularyWord(word=word, definition=definition, synonyms=synonyms, antonyms=antonyms))
+    db.session.flush()
+    add_word_states()
+    db.session.commit()
+
+
+def test_similarity_index_finds_confusable_words(tmp_path):
+    """Nearest neighbours come from shared meaning, and the index survives a save/load"""
+    from similarity_index import SimilarityIndex
+
+    index = SimilarityIndex(str(tmp_path / 'index.json'))
+    index.fit([(i, *row) for i, row in enumerate(SIMILARITY_WORDS, start=1)], signature=8)
+    assert index.similar(1, 1) == [2]  # happy -> joyful
+    assert set(index.similar(3, 2)) == {4, 1} or index.similar(3, 1) == [4]  # melancholy -> sorrowful
+    assert index.similar(5, 1) == [6]  # ubiquitous -> scarce
+
+    index.save()
+    reloaded = SimilarityIndex(str(tmp_path / 'index.json'))
+    assert reloaded.load()
+    assert reloaded.signature == 8
+    assert reloaded.similar(1, 3) == index.similar(1, 3)
+
+    # Incremental edit: make "negligent" about happiness and it becomes a neighbour of "happy"
+    reloaded.update(8, "negligent", "Feeling pleasure and happiness", "joyful, glad, cheerful", "")
+    assert 8 in reloaded.similar(1, 2)
+    reloaded.discard(2)
+    assert 2 not in reloaded.similar(1, 5)
+
+
+def test_expert_session_uses_similar_distractors():
+    """Expert questions draw distractors from the similarity index"""
+    from app import similarity_index
+
+    with app.app_context():
+        reset_database()
+        db.session.add(UserProfile(confidence_score=95.0))
+        add_similarity_words()
+        similarity_index.signature = None
+
+    data = app.test_client().get('/vocabulary/api/quiz/session?count=8').get_json()
+    assert data['difficulty'] == 'Expert'
+    with app.app_context():
+        for question in data['questions']:
+            similar = set(similarity_index.similar(question['id'], 5))
+            distractors = {o['id'] for o in question['options']} - {question['id']}
+            assert len(distractors) == 3
+            # Words with few neighbours are topped up with random distractors
+            assert len(distractors & similar) == min(3, len(similar))
+
+
+def test_similarity_index_follows_text_edits_from_another_process():
+    """An edit that keeps the word count and highest id still rebuilds the similarity index"""
+    from app import similarity_index, ensure_similarity_index, bump_word_bank_version, word_bank_version
+
+    with app.app_context():
+        reset_database()
+        add_similarity_words()
+        similarity_index.signature = None
+        ensure_similarity_index()
+        happy = VocabularyWord.query.filter_by(word="happy").one()
+        negligent = VocabularyWord.query.filter_by(word="negligent").one()
+        assert negligent.id not in similarity_index.similar(happy.id, 2)
+
+        # Written by another process: this one's index never saw the edit
+        negligent.definition = "Feeling pleasure and happiness"
+        negligent.synonyms = "joyful, glad, cheerful"
+        bump_word_bank_version()
+        db.session.commit()
+        ensure_similarity_index()
+        assert similarity_index.signature == word_bank_version()
+        assert negligent.id in similarity_index.similar(happy.id, 2)
+
+        # An in-process edit that follows a missed write leaves the index to be rebuilt
+        bump_word_bank_version()
+        db.session.commit()
+        client = app.test_client()
+        client.post(f'/vocabulary/edit_word/{happy.id}', data={'word': 'happy', 'definition': 'Glad'})
+        assert similarity_index.signature is None
+
+
+def test_session_tops_up_distractors_that_no_longer_exist(monkeypatch):
+    """Distractors chosen from a stale index are replaced, so every question keeps four options"""
+    from app import similarity_index
+
+    with app.app_context():
+        reset_database()
+        db.session.add(UserProfile(confidence_score=95.0))
+        add_similarity_words()
+    monkeypatch.setattr(similarity_index, 'similar', lambda word_id, k=10: [900001, 900002, 900003])
+
+    for snapshot in (True, False):
+        monkeypatch.setitem(app.config, 'WORD_SNAPSHOT', snapshot)
+        data = app.test_client().get('/vocabulary/api/quiz/session?count=8').get_json()
+        assert data['difficulty'] == 'Expert'
+        for question in data['questions']:
+            ids = [o['id'] for o in question['options']]
+            assert len(ids) == 4 and len(set(ids)) == 4 and question['id'] in ids
+
+
+def test_batch_answers_match_one_by_one():
+    """The batch endpoint produces the same per-answer results and final state as check_quiz"""
+    answers = [(1, 1, 2.0), (2, 3, 6.0), (1, 1, 4.0), (3, 3, 1.0), (1, 1, 8.0), (1, 1, 2.5), (1, 1, 2.5)]
+    client = app.test_client()
+
+    def setup():
+        with app.app_context():
+            reset_database()
+            add_sample_words(5, seed=21)
+
+    def state():
+        with app.app_context():
+            user = UserProfile.query.first()
+            words = [(s.times_reviewed, s.times_correct, s.streak, s.mastery_level, s.review_interval)
+                     for s in learner_states()]
+            return words, (user.experience_points, user.level, user.confidence_score, user.current_difficulty)
+
+    setup()
+    single = [client.post('/vocabulary/quiz/check', data={
+        'word_id': w, 'answer_id': a, 'response_time': t}).get_json() for w, a, t in answers]
+    single_state = state()
+
+    setup()
+    response = client.post('/vocabulary/api/quiz/answers', json={'answers': [
+        {'word_id': w, 'answer_id': a, 'response_time': t} for w, a, t in answers] + [
+        {'word_id': 999, 'answer_id': 1, 'response_time': 1.0}]})
+    results = response.get_json()['results']
+
+    assert [dict(r, word_id=None) for r in results[:-1]] == [dict(r, word_id=None) for r in single]
+    assert results[-1] == {'word_id': 999, 'error': 'Word not found'}
+    assert state() == single_state
+
+
+def test_quiz_page_shows_the_feedback_the_server_returns():
+    """Feedback and achievement wording comes only from record_answer, not copies in the page"""
+    with app.app_context():
+        reset_database()
+        add_sample_words(5, seed=21)
+
+    client = app.test_client()
+    results = client.post('/vocabulary/api/quiz/answers', json={'answers': [
+        {'word_id': 1, 'answer_id': 1, 'response_time': 8.0}] * 5 + [
+        {'word_id': 2, 'answer_id': 3, 'response_time': 1.0}]}).get_json()['results']
+    for result in results[:5]:
+        streak = f" (🔥 {result['streak']} streak!)" if result['streak'] >= 3 else ""
+        assert result['message'] == "Correct! Well done! ✨" + streak
+    streak_5 = [a for r in results for a in r['achievements'] if a['type'] == 'streak_5']
+    assert streak_5 and streak_5[0]['message'] == f'5 streak on "{streak_5[0]["word"]}"!'
+    assert results[5]['message'] == f"Not quite. The answer was: {results[5]['correct_definition']}"
+    assert all(a['message'] for r in results for a in r['achievements'])
+
+    # The page shows only right/wrong and the answer at once, then the server's messages
+    page = client.get('/vocabulary/quiz').get_data(as_text=True)
+    assert 'result.message' in page and 'achievement.message' in page
+    for wording in ("Lightning fast", "Well done", "You reached Level", "streak on"):
+        assert wording not in page, wording
+
+
+def test_batch_answers_rejects_bad_payload():
+    client = app.test_client()
+    assert client.post('/vocabulary/api/quiz/answers', json={}).status_code == 400
+    assert client.post('/vocabulary/api/quiz/answers', json={'answers': [{'word_id': 1}]}).status_code == 400
+    for payload in ([1], "answers", 3, None, {'answers': [1]}, {'answers': ["x"]}):
+        response = client.post('/vocabulary/api/quiz/answers', json=payload)
+        assert response.status_code == 400 and 'error' in response.get_json(), payload
+    for response_time in ('NaN', 'Infinity', '-Infinity'):
+        body = '{"answers": [{"word_id": 1, "answer_id": 1, "response_time": %s}]}' % response_time
+        response = client.post('/vocabulary/api/quiz/answers', data=body, content_type='application/json')
+        assert response.status_code == 400, response_time
+
+
+def test_answers_are_logged_through_write_behind_buffer():
+    """Answers are buffered in memory and land in review_event on flush"""
+    from app import ReviewEvent, review_events
+
+    with app.app_context():
+        review_events.flush()  # Events left over from earlier tests
+        reset_database()
+        add_sample_words(5, seed=2)
+
+    client = app.test_client()
+    client.post('/vocabulary/quiz/check', data={'word_id': 1, 'answer_id': 2, 'response_time': 4.0})
+    client.post('/vocabulary/api/quiz/answers', json={'answers': [
+        {'word_id': 2, 'answer_id': 2, 'response_time': 1.0},
+        {'word_id': 3, 'answer_id': 3, 'response_time': 2.0}]})
+
+    with app.app_context():
+        assert ReviewEvent.query.count() == 0
+        assert review_events.flush() == 3
+        events = ReviewEvent.query.order_by(ReviewEvent.id).all()
+        assert [(e.word_id, e.answer_id, e.correct) for e in events] == [(1, 2, False), (2, 2, True), (3, 3, True)]
+        assert all(e.difficulty_level == 'Medium' and e.timestamp for e in events[:1])
+
+
+def test_write_behind_buffer_flushes_on_size_in_background():
+    import time
+    from event_log import WriteBehindBuffer
+
+    written = []
+    buffer = WriteBehindBuffer(written.extend, flush_size=3, flush_interval=60)
+    buffer.extend([{'n': 1}, {'n': 2}])
+    time.sleep(0.05)
+    assert written == []
+    buffer.append({'n': 3})
+    for _ in range(100):
+        if written:
+            break
+        time.sleep(0.01)
+    assert written == [{'n': 1}, {'n': 2}, {'n': 3}]
+    buffer.append({'n': 4})
+    buffer.close()
+    assert written[-1] == {'n': 4}
+
+
+def test_write_behind_buffer_is_capped_while_writes_fail(caplog):
+    """While the database is down the buffer keeps the newest max_rows rows and logs what it drops"""
+    from event_log import WriteBehindBuffer
+
+    written = []
+
+    def writer(rows):
+        if down:
+            raise OSError("database is down")
+        written.extend(rows)
+
+    down = True
+    buffer = WriteBehindBuffer(writer, flush_size=1000, flush_interval=60, max_rows=5)
+    buffer.extend([{'n': n} for n in range(4)])
+    with pytest.raises(OSError):
+        buffer.flush()
+    buffer.extend([{'n': n} for n in range(4, 8)])
+    assert len(buffer) == 5 and buffer.dropped == 3
+    assert 'dropped 3 oldest rows' in caplog.text
+
+    down = False
+    assert buffer.flush() == 5
+    assert [row['n'] for row in written] == [3, 4, 5, 6, 7]
+    buffer.close()
+
+
+def test_answers_flush_in_the_request_when_configured(monkeypatch):
+    """With REVIEW_EVENT_FLUSH_PER_REQUEST (the serverless default) the event is written before the response"""
+    from app import ReviewEvent, review_events
+
+    with app.app_context():
+        review_events.flush()
+        reset_database()
+        add_sample_words(5, seed=2)
+    monkeypatch.setitem(app.config, 'REVIEW_EVENT_FLUSH_PER_REQUEST', True)
+
+    app.test_client().post('/vocabulary/quiz/check', data={'word_id': 1, 'answer_id': 1, 'response_time': 2.0})
+    assert len(review_events) == 0
+    with app.app_context():
+        assert [(e.word_id, e.correct) for e in ReviewEvent.query] == [(1, True)]
+
+
+def count_queries(func):
+    """Run func and return how many SQL statements it executed"""
+    from sqlalchemy import event
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        func()
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+    return len(statements)
+
+
+def test_progress_uses_constant_number_of_queries():
+    """progress() cost in queries does not grow with the word bank"""
+    client = app.test_client()
+    counts = []
+    for size in (10, 300):
+        with app.app_context():
+            reset_database()
+            add_sample_words(size, seed=size)
+        client.get('/vocabulary/progress')  # Warm up one-time initialization
+        counts.append(count_queries(lambda: client.get('/vocabulary/progress')))
+    assert counts[0] == counts[1]
+
+
+def test_progress_stats_match_python_totals():
+    """The aggregate query returns the same numbers as summing in Python"""
+    from app import word_bank_stats
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(150, seed=4)
+        words = learner_states()
+        stats = word_bank_stats(1)
+        assert stats['total_words'] == len(words)
+        assert stats['total_reviews'] == sum(w.times_reviewed for w in words)
+        assert stats['total_correct'] == sum(w.times_correct for w in words)
+        assert stats['mastery_levels'] == {
+            'Learning (0-25%)': len([w for w in words if w.mastery_level <= 25]),
+            'Practicing (26-50%)': len([w for w in words if 25 < w.mastery_level <= 50]),
+            'Good (51-75%)': len([w for w in words if 50 < w.mastery_level <= 75]),
+            'Mastered (76-100%)': len([w for w in words if w.mastery_level > 75])
+        }
+    assert app.test_client().get('/vocabulary/progress').status_code == 200
+
+
+def test_dashboard_stats_cache_tracks_writes():
+    """Cached statistics follow adds, answers and deletes without reloading"""
+    from app import dashboard_stats, word_bank_stats
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(30, seed=8)
+
+    client = app.test_client()
+    client.get('/vocabulary')  # Loads the cache
+    client.post('/vocabulary/add_word', data={'word': 'laconic', 'definition': 'Using very few words'})
+    client.post('/vocabulary/quiz/check', data={'word_id': 3, 'answer_id': 3, 'response_time': 2})
+    client.post('/vocabulary/api/quiz/answers', json={'answers': [
+        {'word_id': 4, 'answer_id': 5, 'response_time': 6},
+        {'word_id': 31, 'answer_id': 31, 'response_time': 1}]})
+    client.get('/vocabulary/delete_word/7')
+
+    with app.app_context():
+        cached = dashboard_stats[1].get()
+        cached.pop('day')
+        assert cached == word_bank_stats(1)
+
+    word_table_queries = []
+
+    def record(conn, cursor, statement, *args):
+        if 'vocabulary_word' in statement or 'user_word_state' in statement:
+            word_table_queries.append(statement)
+
+    from sqlalchemy import event
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        for page in ('/vocabulary', '/vocabulary/milestones', '/vocabulary/progress'):
+            assert client.get(page).status_code == 200
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+    assert word_table_queries == []
+
+
+def test_keyset_pagination_covers_every_sort_mode():
+    """Walking the cursors returns every word once, in the full-sort order"""
+    from app import words_page
+
+    with app.app_context():
+        reset_database()
+        rng = random.Random(17)
+        db.session.add(UserProfile())
+        for i in range(137):
+            db.session.add(VocabularyWord(
+                word=f"w{rng.randint(0, 10 ** 6):07d}-{i}", definition="d",
+                date_added=date.today() - timedelta(days=rng.randint(0, 5))))  # Lots of ties
+        db.session.flush()
+        for word_id in range(1, 138):
+            db.session.add(UserWordState(user_id=1, word_id=word_id, mastery_level=rng.choice([0, 25, 50, 100])))
+        db.session.commit()
+        words = VocabularyWord.query.all()
+        mastery = {s.word_id: s.mastery_level for s in learner_states()}
+
+        expected = {
+            'date_desc': sorted(words, key=lambda w: (w.date_added, w.id), reverse=True),
+            'date_asc': sorted(words, key=lambda w: (w.date_added, w.id)),
+            'alpha': sorted(words, key=lambda w: w.word),
+            'mastery': sorted(words, key=lambda w: (-mastery[w.id], w.id)),
+        }
+        for sort_by, ordered in expected.items():
+            seen, cursor = [], None
+            while True:
+                page, cursor = words_page(1, sort_by, cursor, limit=20)
+                seen.extend(w.id for w, _ in page)
+                if not cursor:
+                    break
+            assert seen == [w.id for w in ordered], sort_by
+
+
+def test_words_json_api_pages():
+    with app.app_context():
+        reset_database()
+        add_sample_words(75)
+
+    client = app.test_client()
+    first = client.get('/vocabulary/api/words?sort=alpha&limit=50').get_json()
+    assert len(first['words']) == 50 and first['next_cursor']
+    assert first['html'].count('class="word-card') == 50
+    second = client.get(f"/vocabulary/api/words?sort=alpha&cursor={first['next_cursor']}").get_json()
+    assert len(second['words']) == 25 and second['next_cursor'] is None
+    assert {w['id'] for w in first['words']}.isdisjoint(w['id'] for w in second['words'])
+
+    page = client.get('/vocabulary/words?sort=alpha')
+    assert page.data.count(b'class="word-card') == 50
+    assert b'My Words (75)' in page.data
+
+
+def test_bad_cursors_are_rejected_instead_of_restarting_the_list():
+    """A tampered, truncated or other-sort cursor is a 400, not page 1 served again"""
+    import base64
+    import json
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(75)
+
+    client = app.test_client()
+    cursor = client.get('/vocabulary/api/words?sort=date_desc&limit=10').get_json()['next_cursor']
+    forged = lambda values: base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+    for bad in (cursor[:-3], cursor + 'x!', 'not a cursor', forged([None, 5]), forged(['2025-01-01']),
+                forged({'id': 5}), forged(['2025-01-01', '5']), forged(['2025-01-01', True])):
+        response = client.get(f'/vocabulary/api/words?sort=date_desc&cursor={bad}')
+        assert response.status_code == 400 and response.get_json()['error'] == 'Invalid cursor', bad
+        assert client.get(f'/vocabulary/words?sort=date_desc&cursor={bad}').status_code == 400, bad
+    # A date cursor is not a mastery one
+    assert client.get(f'/vocabulary/api/words?sort=mastery&cursor={cursor}').status_code == 400
+    assert client.get(f'/vocabulary/api/words?sort=date_desc&cursor={cursor}').status_code == 200
+    assert client.get('/vocabulary/api/words?sort=bogus').status_code == 400
+
+
+def test_show_all_and_print_views_stream_every_word():
+    with app.app_context():
+        reset_database()
+        add_sample_words(120)
+        expected = [w.word for w in VocabularyWord.query.order_by(VocabularyWord.word, VocabularyWord.id)]
+
+    client = app.test_client()
+    for url in ('/vocabulary/words/all?sort=alpha', '/vocabulary/words/print?sort=alpha'):
+        response = client.get(url, buffered=False)
+        assert response.is_streamed
+        chunks = list(response.response)
+        response.close()
+        assert len(chunks) > 1  # Sent incrementally, not as one rendered string
+        html = b''.join(c if isinstance(c, bytes) else c.encode() for c in chunks).decode()
+        positions = [html.index(f">{word}<") for word in expected]
+        assert positions == sorted(positions), url
+
+
+def query_plan(query):
+    """SQLite EXPLAIN QUERY PLAN detail lines for a query"""
+    statement = getattr(query, 'statement', query)
+    compiled = statement.compile(dialect=db.engine.dialect)
+    params = tuple(v.isoformat(' ') if isinstance(v, datetime) else v.isoformat() if isinstance(v, date) else v
+                   for v in (compiled.params[name] for name in compiled.positiontup))
+    with db.engine.connect() as conn:
+        return [row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}", params)]
+
+
+def test_hot_queries_use_their_indexes():
+    from app import QuizHistory, words_query, encode_cursor
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(200)
+        # Spread the words over a few months, as in a real word bank
+        for word in VocabularyWord.query:
+            word.date_added = date.today() - timedelta(days=word.id % 120)
+        db.session.commit()
+        db.session.execute(db.text("ANALYZE"))
+        today = date.today()
+        some_row = (VocabularyWord.query.first(), db.session.get(UserWordState, (1, 1)))
+
+        def assert_uses(query, index):
+            plan = query_plan(query)
+            assert any(f"USING INDEX {index}" in line or f"USING COVERING INDEX {index}" in line
+                       for line in plan), plan
+            assert not any("TEMP B-TREE" in line for line in plan), plan
+
+        # Word list pages, first and later (keyset) pages
+        assert_uses(words_query(1, 'date_desc').limit(51), 'ix_vocabulary_word_date_added_id')
+        assert_uses(words_query(1, 'date_asc').limit(51), 'ix_vocabulary_word_date_added_id')
+        assert_uses(words_query(1, 'mastery').limit(51), 'ix_user_word_state_user_id_mastery_level')
+        for sort_by, index in (('date_desc', 'ix_vocabulary_word_date_added_id'),
+                               ('mastery', 'ix_user_word_state_user_id_mastery_level')):
+            after = words_query(1, sort_by, encode_cursor(some_row, sort_by)).limit(51)
+            assert_uses(after, index)
+            assert any(line.startswith("SEARCH") for line in query_plan(after))  # Seeks, not a full scan
+
+        # Words added today (dashboard)
+        assert_uses(VocabularyWord.query.filter(VocabularyWord.date_added == today),
+                    'ix_vocabulary_word_date_added_id')
+        # Review scheduling: a learner's due words, and words they reviewed recently
+        mine = UserWordState.query.filter(UserWordState.user_id == 1)
+        due_plan = query_plan(mine.filter(UserWordState.due_condition(today)))
+        assert due_plan and all(line.startswith("SEARCH user_word_state USING INDEX ix_user_word_state_user_id_")
+                                for line in due_plan), due_plan  # Only this learner's rows are read
+        assert_uses(mine.filter(UserWordState.last_reviewed >= datetime.now() - timedelta(days=1)),
+                    'ix_user_word_state_user_id_last_reviewed')
+        # A learner's recent quizzes (progress)
+        assert_uses(QuizHistory.query.filter(QuizHistory.user_id == 1)
+                    .order_by(QuizHistory.date_taken.desc()).limit(10),
+                    'ix_quiz_history_user_id_date_taken')
+
+
+def test_ensure_indexes_adds_missing_indexes_to_existing_tables():
+    from app import ensure_indexes
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(10)
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_vocabulary_word_date_added_id")
+            conn.exec_driver_sql("DROP INDEX ix_quiz_history_user_id_date_taken")
+
+        created = ensure_indexes()
+        names = {i['name'] for i in db.inspect(db.engine).get_indexes('vocabulary_word')}
+        assert 'ix_vocabulary_word_date_added_id' in names
+        assert {i['name'] for i in db.inspect(db.engine).get_indexes('quiz_history')} == {'ix_quiz_history_user_id_date_taken'}
+        assert 'ix_vocabulary_word_date_added_id' in created
+        ensure_indexes()  # Idempotent
+        assert VocabularyWord.query.count() == 10
+
+
+def test_failed_migration_step_leaves_schema_unstamped():
+    """A failed index build is retried on the next start instead of being stamped over"""
+    from app import ensure_indexes, initialize_database, schema_is_current, SchemaVersion
+
+    with app.app_context():
+        reset_database()
+        SchemaVersion.query.delete()
+        db.session.commit()
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP INDEX ix_vocabulary_word_date_added_id")
+            conn.exec_driver_sql("DROP INDEX ix_quiz_history_user_id_date_taken")
+            conn.exec_driver_sql("CREATE TABLE ix_vocabulary_word_date_added_id (id INTEGER)")  # Takes the name
+
+        with pytest.raises(RuntimeError, match='ix_vocabulary_word_date_added_id'):
+            ensure_indexes()
+        # The other index was still built
+        assert {i['name'] for i in db.inspect(db.engine).get_indexes('quiz_history')} == {'ix_quiz_history_user_id_date_taken'}
+
+        initialize_database()
+        assert not schema_is_current()
+
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql("DROP TABLE ix_vocabulary_word_date_added_id")
+        initialize_database()
+        assert schema_is_current()
+        assert 'ix_vocabulary_word_date_added_id' in {i['name'] for i in db.inspect(db.engine).get_indexes('vocabulary_word')}
+
+
+def test_cold_start_fast_path_reads_only_the_schema_version(monkeypatch):
+    import sys
+    from app import ensure_database, SchemaVersion, SCHEMA_VERSION, Milestone
+
+    app_module = sys.modules['app']
+
+    def cold_start():
+        monkeypatch.setattr(app_module, '_db_initialized', False)
+        with app.test_request_context('/vocabulary'):
+            return count_queries(ensure_database)
+
+    with app.app_context():
+        reset_database()
+        SchemaVersion.query.delete()
+        db.session.commit()
+
+    # Behind: the full migration runs, creates the defaults and stamps the version
+    assert cold_start() > 5
+    with app.app_context():
+        assert db.session.get(SchemaVersion, 1).version == SCHEMA_VERSION
+        assert UserProfile.query.count() == 1
+        assert Milestone.query.count() == 3
+
+    # Current: one indexed read and nothing else
+    assert cold_start() == 1
+    assert app_module._db_initialized
+
+
+def test_concurrent_first_requests_initialize_once(monkeypatch):
+    import sys
+    import threading
+    import time
+    from app import SchemaVersion, Milestone
+
+    app_module = sys.modules['app']
+    with app.app_context():
+        reset_database()
+        SchemaVersion.query.delete()
+        db.session.commit()
+    monkeypatch.setattr(app_module, '_db_initialized', False)
+
+    calls = []
+    original = app_module.initialize_database
+
+    def slow_initialize():
+        calls.append(threading.get_ident())
+        time.sleep(0.1)  # Keep the window open for the other threads
+        original()
+
+    monkeypatch.setattr(app_module, 'initialize_database', slow_initialize)
+
+    barrier = threading.Barrier(8)
+    statuses = []
+
+    def first_request():
+        client = app.test_client()
+        barrier.wait()
+        statuses.append(client.get('/vocabulary').status_code)
+
+    threads = [threading.Thread(target=first_request) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert statuses == [200] * 8
+    with app.app_context():
+        assert UserProfile.query.count() == 1
+        assert Milestone.query.count() == 3
+
+
+def test_database_init_lock_excludes_other_holders():
+    import threading
+    from app import database_init_lock
+
+    events = []
+    with app.app_context():
+        def other_process():
+            with app.app_context(), database_init_lock():
+                events.append('other acquired')
+
+        with database_init_lock():
+            other = threading.Thread(target=other_process)
+            other.start()
+            other.join(0.2)
+            events.append('first released')
+        other.join()
+
+    assert events == ['first released', 'other acquired']
+
+
+def test_advisory_lock_waiters_poll_without_holding_a_statement_open():
+    """The migration's concurrent index builds are not held up by a second process waiting for the lock
+
+    CREATE INDEX CONCURRENTLY waits until no other session is inside a
+    statement; a waiter blocked in pg_advisory_lock() would be, until the
+    holder (stuck in the build) released the lock.
+    """
+    import threading
+    from app import polled_advisory_lock
+
+    class FakeServer:
+        """Advisory locks shared by fake PostgreSQL sessions, tracking statements in flight"""
+
+        def __init__(self):
+            self.holder = None
+            self.in_flight = 0
+            self.attempts = []
+            self.changed = threading.Condition()
+
+        def create_index_concurrently(self, timeout):
+            with self.changed:
+                return self.changed.wait_for(lambda: self.in_flight == 0, timeout)
+
+    class FakeConnection:
+        def __init__(self, server, name):
+            self.server, self.name = server, name
+
+        def execute(self, clause, params):
+            sql, server = str(clause), self.server
+            with server.changed:
+                server.in_flight += 1
+                try:
+                    if 'advisory_lock' in sql:
+                        server.attempts.append(self.name)
+                    if 'pg_try_advisory_lock' in sql:
+                        acquired = server.holder in (None, self.name)
+                    elif 'pg_advisory_lock' in sql:  # Blocks inside the statement
+                        acquired = server.changed.wait_for(lambda: server.holder is None, 2)
+                    else:
+                        assert 'pg_advisory_unlock' in sql and server.holder == self.name
+                        server.holder, acquired = None, True
+                    if acquired and 'unlock' not in sql:
+                        server.holder = self.name
+                    return type('Result', (), {'scalar': lambda _: acquired})()
+                finally:
+                    server.in_flight -= 1
+                    server.changed.notify_all()
+
+    server = FakeServer()
+    events = []
+
+    def second_process():
+        with polled_advisory_lock(FakeConnection(server, 'second'), 1, poll_interval=0.01):
+            events.append('second acquired')
+
+    with app.app_context():
+        with polled_advisory_lock(FakeConnection(server, 'first'), 1, poll_interval=0.01):
+            second = threading.Thread(target=second_process)
+            second.start()
+            with server.changed:
+                assert server.changed.wait_for(lambda: 'second' in server.attempts, 2)
+            assert server.create_index_concurrently(timeout=1)
+            events.append('first released')
+        second.join(2)
+
+    assert events == ['first released', 'second acquired']
+    assert server.attempts.count('second') >= 2  # Polled while the first held it
+    assert server.holder is None
+
+
+def test_lazy_engines_come_from_their_own_app_and_support_recorded_queries(tmp_path):
+    from flask import Flask
+    from flask_sqlalchemy.record_queries import get_recorded_queries
+    from app import LazySQLAlchemy, PendingEngine
+
+    def make_app(name, **config):
+        other = Flask(name)
+        other.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / name}.db",
+                            SQLITE_PRAGMAS=app.config['SQLITE_PRAGMAS'], **config)
+        return other
+
+    # Nothing is created before first use, and the engine is configured from the app it belongs to
+    untuned = make_app('untuned', SQLITE_TUNED=False)
+    lazy_db = LazySQLAlchemy(untuned)
+    assert isinstance(lazy_db._app_engines[untuned][None], PendingEngine)
+    with untuned.app_context():
+        assert lazy_db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'delete'
+
+    recording = make_app('recording', SQLITE_TUNED=True, SQLALCHEMY_RECORD_QUERIES=True)
+    recording_db = LazySQLAlchemy(recording)
+    with recording.app_context():
+        assert recording_db.session.execute(db.text('PRAGMA journal_mode')).scalar() == 'wal'
+        assert [query.statement for query in get_recorded_queries()] == ['PRAGMA journal_mode']
+
+
+def test_engine_profile_selection(monkeypatch):
+    from sqlalchemy.pool import NullPool
+    from app import engine_profile, engine_options
+
+    monkeypatch.delenv('DATABASE_POOL_PROFILE', raising=False)
+    monkeypatch.delenv('VERCEL', raising=False)
+    monkeypatch.delenv('AWS_LAMBDA_FUNCTION_NAME', raising=False)
+    assert engine_profile('sqlite:////tmp/vocab.db') == 'sqlite'
+    assert engine_profile('postgresql://db/vocab') == 'server'
+    monkeypatch.setenv('VERCEL', '1')
+    assert engine_profile('postgresql://db/vocab') == 'serverless'
+    monkeypatch.setenv('DATABASE_POOL_PROFILE', 'server')
+    assert engine_profile('postgresql://db/vocab') == 'server'
+
+    assert engine_options('serverless') == {'poolclass': NullPool}
+    assert engine_options('server')['pool_pre_ping'] and engine_options('server')['pool_size'] == 5
+    assert engine_options('sqlite') == {}
+    with pytest.raises(ValueError):
+        engine_options('bogus')
+
+
+def test_sqlite_connections_are_tuned():
+    from sqlalchemy import event
+    from app import begin_write
+
+    with app.app_context():
+        with db.engine.connect() as conn:
+            pragma = lambda name: conn.exec_driver_sql(f"PRAGMA {name}").scalar()
+            assert pragma('journal_mode') == 'wal'
+            assert pragma('synchronous') == 1  # NORMAL
+            assert pragma('busy_timeout') == 5000
+            assert pragma('mmap_size') == 256 * 1024 * 1024
+            assert pragma('cache_size') == -20000
+
+        # Answer transactions take the write lock before reading
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            begin_write()
+            VocabularyWord.query.first()
+            db.session.rollback()
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert statements[0] == 'BEGIN IMMEDIATE'
+
+
+def test_concurrent_answers_lose_no_updates():
+    import threading
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(5, seed=4)
+        before = db.session.get(UserWordState, (1, 1))
+        reviewed, correct = before.times_reviewed, before.times_correct
+        xp = UserProfile.query.first().experience_points
+
+    threads, per_thread = 6, 10
+    gained = []
+
+    def answer(thread_index):
+        client = app.test_client()
+        for i in range(per_thread):
+            answer_id = 1 if (thread_index + i) % 2 else 2
+            response = client.post('/vocabulary/quiz/check',
+                                   data={'word_id': 1, 'answer_id': answer_id, 'response_time': 4.0})
+            assert response.status_code == 200
+            gained.append(response.get_json()['xp_gained'])
+
+    workers = [threading.Thread(target=answer, args=(n,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+    with app.app_context():
+        state = db.session.get(UserWordState, (1, 1))
+        assert state.times_reviewed == reviewed + threads * per_thread
+        assert state.times_correct == correct + threads * per_thread // 2
+        assert profile_view().experience_points == xp + sum(gained)
+
+
+def test_check_quiz_appends_a_delta_instead_of_updating_the_profile():
+    with app.app_context():
+        reset_database()
+        add_sample_words(4, seed=5)
+
+    client = app.test_client()
+    client.get('/vocabulary')  # First-request setup out of the way
+    from sqlalchemy import event
+
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(' '.join(statement.split()[:3]))
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        response = client.post('/vocabulary/quiz/check', data={'word_id': 2, 'answer_id': 2, 'response_time': 2.0})
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+    assert response.get_json()['correct']
+    # Only the learner lookup runs before the write transaction starts
+    begin = statements.index('BEGIN IMMEDIATE')
+    assert all(s.startswith('SELECT') for s in statements[:begin])
+    writes = [s for s in statements if s.split()[0] in ('INSERT', 'UPDATE', 'DELETE')]
+    # The learner's first answer also creates their state version row
+    assert writes == ['UPDATE user_word_state SET', 'INSERT INTO profile_delta',
+                      'UPDATE learner_state_version SET', 'INSERT INTO learner_state_version']
+
+
+def test_first_learner_is_created_before_the_answer_write_transaction():
+    """Creating the first learner commits, so it must not end the answer's BEGIN IMMEDIATE transaction early"""
+    from sqlalchemy import event
+
+    with app.app_context():
+        reset_database()
+        UserProfile.query.delete()
+        db.session.add_all([VocabularyWord(word=f"w{i}", definition=f"d{i}") for i in range(4)])
+        db.session.commit()
+        engine = db.engine
+
+    events = []
+    record = lambda conn, cursor, statement, *args: events.append(' '.join(statement.split()[:3]))
+    commit = lambda conn: events.append('COMMIT')
+    event.listen(engine, 'before_cursor_execute', record)
+    event.listen(engine, 'commit', commit)
+    try:
+        response = app.test_client().post('/vocabulary/quiz/check',
+                                          data={'word_id': 1, 'answer_id': 1, 'response_time': 2.0})
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+        event.remove(engine, 'commit', commit)
+
+    assert response.status_code == 200 and response.get_json()['correct']
+    begin = events.index('BEGIN IMMEDIATE')
+    assert 'INSERT INTO user_profile' in events[:begin]  # The learner came first
+    answer = events.index('UPDATE user_word_state SET')
+    assert begin < answer < events.index('INSERT INTO profile_delta') < events.index('COMMIT', begin)
+
+
+def test_word_writes_do_not_reload_the_word_after_commit():
+    """add_word and edit_word update the caches from the objects they wrote, not a fresh SELECT"""
+    from sqlalchemy import event
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(4, seed=6)
+        engine = db.engine
+
+    client = app.test_client()
+    client.get('/vocabulary')  # First-request setup out of the way
+    for url, data in (('/vocabulary/add_word', {'word': 'lucid', 'definition': 'Clear', 'synonyms': 'clear'}),
+                      ('/vocabulary/edit_word/2', {'word': 'limpid', 'definition': 'Transparent'})):
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(' '.join(statement.split()))
+        commit = lambda conn: statements.append('COMMIT')
+        event.listen(engine, 'before_cursor_execute', record)
+        event.listen(engine, 'commit', commit)
+        try:
+            assert client.post(url, data=data).status_code == 302
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+            event.remove(engine, 'commit', commit)
+        after_commit = statements[statements.index('COMMIT') + 1:]
+        assert not any('FROM vocabulary_word' in statement for statement in after_commit), url
+
+    with app.app_context():
+        assert VocabularyWord.query.filter_by(word='lucid').one().synonyms == 'clear'
+        assert db.session.get(VocabularyWord, 2).definition == 'Transparent'
+
+
+def test_atomic_answer_matches_python_rules():
+    """The SQL answer update and profile deltas give the same state as the model's Python methods"""
+    from app import record_answer
+
+    rng = random.Random(9)
+    with app.app_context():
+        reset_database()
+        add_sample_words(40, seed=9, confidence_score=68.0, current_difficulty=99.0)
+
+        for state in learner_states():
+            user = profile_view()
+            correct = rng.random() < 0.6
+            response_time = rng.choice([1.0, 4.0, 12.0])
+            word_id = state.word_id
+            expected = {c: getattr(state, c) for c in ('times_reviewed', 'times_correct', 'streak', 'mastery_level')}
+            confidence, difficulty, xp = user.confidence_score, user.current_difficulty, user.experience_points
+            db.session.expunge_all()
+
+            # Python reference: the rules apply_answer used to run on ORM objects
+            expected['times_reviewed'] += 1
+            if correct:
+                expected['times_correct'] += 1
+                expected['streak'] += 1
+                expected['mastery_level'] = min(expected['mastery_level'] + 10 + expected['streak'] * 2, 100)
+                new_confidence = max(0, min(100, 0.3 * min(100, confidence + 5) + 0.7 * confidence))
+                new_difficulty = min(100, difficulty + 2) if new_confidence > 70 else difficulty
+                intervals = UserWordState.REVIEW_INTERVALS
+                interval = intervals[min(expected['streak'], len(intervals) - 1)]
+            else:
+                expected['streak'] = 0
+                expected['mastery_level'] = max(expected['mastery_level'] - 5, 0)
+                new_confidence = max(0, min(100, 0.3 * max(0, confidence - 10) + 0.7 * confidence))
+                new_difficulty = max(10, difficulty - (5 if new_confidence < 30 else 2))
+                interval = 1
+
+            answer_id = word_id if correct else word_id + 1000
+            updated, result = record_answer(word_id, answer_id, response_time)
+            db.session.commit()
+
+            updated = db.session.get(UserWordState, (1, word_id))
+            assert {c: getattr(updated, c) for c in expected} == expected
+            assert updated.review_interval == interval
+            assert updated.next_review_date == date.today() + timedelta(days=interval)
+            assert updated.difficulty_score == UserWordState.difficulty_for(
+                expected['times_reviewed'], expected['times_correct'], response_time)
+            user = profile_view()
+            assert user.confidence_score == pytest.approx(new_confidence)
+            assert user.current_difficulty == pytest.approx(new_difficulty)
+            assert user.experience_points == xp + result['xp_gained']
+            assert user.level == user.calculate_level()
+
+
+def test_profile_deltas_fold_into_the_profile():
+    from app import fold_profile_deltas
+
+    old_fold_size = app.config['PROFILE_FOLD_SIZE']
+    app.config['PROFILE_FOLD_SIZE'] = 5
+    try:
+        with app.app_context():
+            reset_database()
+            add_sample_words(6, seed=12)
+
+        client = app.test_client()
+        gained = []
+        for i in range(12):
+            response = client.post('/vocabulary/quiz/check',
+                                   data={'word_id': 1 + i % 6, 'answer_id': 1 + i % 6 if i % 3 else 6 - i % 6,
+                                         'response_time': 4.0})
+            gained.append(response.get_json()['xp_gained'])
+
+        with app.app_context():
+            # Folded at 5 and 10 pending answers; the last two are still deltas
+            assert ProfileDelta.query.count() == 2
+            row = UserProfile.query.first()
+            assert row.experience_points == sum(gained[:10])
+            view = profile_view()
+            assert view.experience_points == sum(gained)
+            assert view.pending_deltas == 2
+
+            # Reading never writes: the row is unchanged by profile_view()
+            db.session.expire_all()
+            assert UserProfile.query.first().experience_points == sum(gained[:10])
+
+            assert fold_profile_deltas(view.id) == 2
+            row = UserProfile.query.first()
+            assert ProfileDelta.query.count() == 0
+            assert row.experience_points == view.experience_points
+            assert row.confidence_score == pytest.approx(view.confidence_score)
+            assert row.current_difficulty == pytest.approx(view.current_difficulty)
+            assert row.level == view.level
+    finally:
+        app.config['PROFILE_FOLD_SIZE'] = old_fold_size
+
+
+def test_fold_keeps_deltas_committed_after_it_read_them(monkeypatch):
+    """A delta that lands between the fold's read and its delete (even with a lower id) is kept for the next fold"""
+    from app import fold_profile_deltas
+
+    with app.app_context():
+        reset_database()
+        db.session.add(UserProfile())
+        db.session.add_all([ProfileDelta(id=i, profile_id=1, correct=True, xp=10) for i in (5, 6)])
+        db.session.commit()
+
+        apply_answer = UserProfile.apply_answer
+
+        def apply_and_let_another_writer_in(self, correct, xp):
+            if not ProfileDelta.query.filter_by(id=3).count():
+                db.session.execute(db.insert(ProfileDelta).values(id=3, profile_id=1, correct=True, xp=7,
+                                                                  created_at=datetime.now()))
+            return apply_answer(self, correct, xp)
+
+        monkeypatch.setattr(UserProfile, 'apply_answer', apply_and_let_another_writer_in)
+        assert fold_profile_deltas(1) == 2
+        assert [d.id for d in ProfileDelta.query] == [3]
+        assert UserProfile.query.first().experience_points == 20
+        monkeypatch.undo()
+
+        assert fold_profile_deltas(1) == 1
+        assert UserProfile.query.first().experience_points == 27
+
+
+def test_learners_keep_separate_word_state():
+    """Answers, quiz pools, word lists and progress are scoped to the current learner"""
+    from app import add_learner, get_quiz_pool, word_bank_stats, cache_versions
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(12, seed=6)
+        second = add_learner("Max")
+        assert second.id == 2
+        fresh = learner_states(2)
+        assert len(fresh) == 12 and all(s.times_reviewed == 0 and s.mastery_level == 0 for s in fresh)
+        first_before = [(s.times_reviewed, s.mastery_level) for s in learner_states(1)]
+
+    sophia, max_ = app.test_client(), app.test_client()
+    assert max_.get('/vocabulary/learners/2').status_code == 302
+    for word_id in (1, 2, 3):
+        max_.post('/vocabulary/quiz/check', data={'word_id': word_id, 'answer_id': word_id, 'response_time': 2})
+    sophia.post('/vocabulary/add_word', data={'word': 'laconic', 'definition': 'Using very few words'})
+
+    with app.app_context():
+        assert [(s.times_reviewed, s.mastery_level) for s in learner_states(1)][:12] == first_before
+        assert [s.times_reviewed for s in learner_states(2)] == [1, 1, 1] + [0] * 10  # Got the new word too
+        assert word_bank_stats(2)['total_reviews'] == 3
+        assert profile_view(db.session.get(UserProfile, 2)).experience_points > 0
+        assert db.session.get(UserProfile, 1).experience_points == 0
+        assert {w.id for w, _ in get_quiz_pool(2, 30.0, cache_versions(2), limit=13)} == set(range(1, 14))
+
+    page = max_.get('/vocabulary/words?sort=mastery').data.decode()
+    assert page.index('>word0<') < page.index('>word5<')  # Max mastered word0, not word5
+    assert b'Max' in max_.get('/vocabulary/learners').data
+    assert max_.get('/vocabulary/progress').status_code == 200
+
+
+def test_migration_moves_legacy_word_state_to_the_first_learner():
+    """Review state stored on vocabulary_word before multi-learner support is copied, not lost"""
+    from app import migrate_word_state
+
+    with app.app_context():
+        reset_database()
+        with db.engine.begin() as conn:
+            for column in ('times_reviewed INTEGER', 'mastery_level INTEGER', 'next_review_date DATE'):
+                conn.exec_driver_sql(f"ALTER TABLE vocabulary_word ADD COLUMN {column}")
+            conn.exec_driver_sql(
+                "INSERT INTO vocabulary_word (word, definition, times_reviewed, mastery_level, next_review_date) "
+                "VALUES ('terse', 'Brief', 7, 80, '2024-05-01'), ('verbose', 'Wordy', NULL, NULL, NULL)")
+        db.session.add_all([UserProfile(), UserProfile(username="Max")])
+        db.session.commit()
+
+        migrate_word_state()
+        migrate_word_state()  # Idempotent
+
+        first, second = learner_states(1), learner_states(2)
+        assert [(s.times_reviewed, s.mastery_level, s.next_review_date) for s in first] == [
+            (7, 80, date(2024, 5, 1)), (0, 0, None)]
+        assert [(s.times_reviewed, s.mastery_level) for s in second] == [(0, 0), (0, 0)]
+        assert first[0].streak == 0 and first[0].difficulty_score == 50.0
+
+
+def test_word_snapshot_tracks_writes(tmp_path):
+    from word_snapshot import WordBankSnapshot
+
+    snapshot = WordBankSnapshot(str(tmp_path / 'words.bin'), identity=41)
+    snapshot.update([(1, "ignored", "not built yet")], 1)
+    assert len(snapshot) == 0 and not snapshot.is_current(None)
+
+    snapshot.rebuild([(5, "e", "five"), (2, "b", "two"), (9, "i", "nine")], version=10)
+    assert snapshot.is_current(10) and not snapshot.is_current(11)
+    snapshot.update([(7, "g", "seven"), (2, "b", "two, edited")], 11)
+    snapshot.discard(9, 12)
+    assert list(snapshot._ids) == [2, 5, 7] and snapshot.version == 12
+    assert snapshot.get(2).definition == "two, edited"
+    assert snapshot.get(9) is None
+    assert {i: r.word for i, r in snapshot.lookup([7, 5, 8]).items()} == {7: "g", 5: "e"}
+    assert not hasattr(snapshot.get(5), '__dict__')
+
+    # Saved and mapped by another process at the same version; a different version or database is refused
+    snapshot.update([(3, "c", "thrée ✓")], 13)
+    snapshot.save()
+    assert not WordBankSnapshot(snapshot.path, identity=42).load(13)
+    mapped = WordBankSnapshot(snapshot.path, identity=41)
+    assert not mapped.load(12)
+    assert mapped.load(13) and mapped.mapped and mapped.is_current(13)
+    assert [(r.id, r.word, r.definition) for r in mapped.lookup([2, 3, 5, 7]).values()] == [
+        (2, "b", "two, edited"), (3, "c", "thrée ✓"), (5, "e", "five"), (7, "g", "seven")]
+    mapped.discard(5, 14)  # Writes copy the mapped contents into memory first
+    assert not mapped.mapped and list(mapped._ids) == [2, 3, 7]
+
+    # A write that skipped a version (another process wrote in between) invalidates
+    mapped.update([(8, "h", "eight")], 16)
+    assert not mapped.is_current(16) and mapped.get(8) is None
+
+    (tmp_path / 'words.bin').write_bytes(b'VWBS')  # Truncated
+    assert not WordBankSnapshot(snapshot.path, identity=41).load(13)
+
+
+def test_database_identity_tells_databases_apart(tmp_path, monkeypatch):
+    from app import database_identity
+
+    monkeypatch.chdir(tmp_path)
+    sqlite = database_identity('sqlite:///vocab.db')
+    assert sqlite == database_identity(f"sqlite:///{tmp_path / 'vocab.db'}")  # Relative paths are made absolute
+    assert sqlite != database_identity('sqlite:///other.db')
+    assert database_identity('postgresql://app:one@db/vocab') == database_identity('postgresql://app:two@db/vocab')
+    assert database_identity('postgresql://app@db/vocab') != database_identity('postgresql://app@db/staging')
+    assert 0 <= sqlite < 2 ** 64
+
+
+def test_cold_start_maps_the_saved_snapshot_with_one_query(monkeypatch):
+    """A new process with a current snapshot file only reads the word bank version"""
+    import sys
+    from word_snapshot import WordBankSnapshot
+    from app import word_bank_snapshot, word_bank_version
+
+    app_module = sys.modules['app']
+    with app.app_context():
+        reset_database()
+        add_sample_words(40, seed=15)
+        built = word_bank_snapshot()  # Built from the word table and saved
+        version = word_bank_version()
+        assert built.is_current(version) and not built.mapped
+
+    statements = []
+
+    def cold_start():
+        monkeypatch.setattr(app_module, 'word_bank', WordBankSnapshot(app.config['WORD_SNAPSHOT_PATH'], app_module.word_bank.identity))
+        from sqlalchemy import event
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        with app.app_context():
+            event.listen(db.engine, 'before_cursor_execute', record)
+            try:
+                snapshot = word_bank_snapshot()
+            finally:
+                event.remove(db.engine, 'before_cursor_execute', record)
+            words = {w.id: (w.word, w.definition) for w in VocabularyWord.query}
+        return snapshot, words
+
+    snapshot, words = cold_start()
+    assert len(statements) == 1 and 'word_bank_version' in statements[0]
+    assert snapshot.mapped and len(snapshot) == 40
+    assert {i: (r.word, r.definition) for i, r in snapshot.lookup(words).items()} == words
+
+    # After a word changes the saved file is rewritten, so the next cold start is warm again
+    monkeypatch.setitem(app.config, 'WORD_SNAPSHOT_SAVE_DELAY', 0)
+    client = app.test_client()
+    client.post('/vocabulary/edit_word/3', data={'word': 'word2', 'definition': 'edited elsewhere'})
+    statements.clear()
+    snapshot, words = cold_start()
+    assert len(statements) == 1 and snapshot.get(3).definition == 'edited elsewhere'
+
+    # A stale file (the database moved on without it) falls back to the word query
+    with app.app_context():
+        bump = app_module.bump_word_bank_version()
+        db.session.commit()
+    statements.clear()
+    snapshot, _ = cold_start()
+    assert len(statements) == 2 and not snapshot.mapped and snapshot.version == bump
+
+
+def test_word_writes_share_one_delayed_snapshot_save(monkeypatch):
+    """A burst of word writes rewrites the snapshot file once, after the delay, with every write in it"""
+    import sys
+    from word_snapshot import WordBankSnapshot
+    from app import word_bank_snapshot, word_bank_version
+
+    app_module = sys.modules['app']
+    with app.app_context():
+        reset_database()
+        add_sample_words(10, seed=16)
+        word_bank_snapshot()  # Cold start: built and saved in the request
+
+    saves = []
+    save = app_module.word_bank.save
+    monkeypatch.setattr(app_module.word_bank, 'save', lambda: saves.append(1) or save())
+    monkeypatch.setitem(app.config, 'WORD_SNAPSHOT_SAVE_DELAY', 0.5)
+    client = app.test_client()
+    for word_id in (2, 4, 6):
+        client.post(f'/vocabulary/edit_word/{word_id}', data={'word': f'edited{word_id}', 'definition': 'new'})
+    client.get('/vocabulary/delete_word/8')
+    assert saves == []  # Nothing written in the requests
+
+    app_module._word_bank_save_timer.join()
+    assert len(saves) == 1 and app_module._word_bank_save_timer is None
+    with app.app_context():
+        version = word_bank_version()
+    mapped = WordBankSnapshot(app.config['WORD_SNAPSHOT_PATH'], app_module.word_bank.identity)
+    assert mapped.load(version) and len(mapped) == 9
+    assert mapped.get(6).word == 'edited6' and mapped.get(8) is None
+
+
+def test_quiz_session_reads_words_from_the_snapshot():
+    """With the snapshot warm, a quiz session hydrates no VocabularyWord objects and sees edits"""
+    from sqlalchemy import event
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(30, seed=14)
+
+    client = app.test_client()
+    client.get('/vocabulary/api/quiz/session')  # Builds the queue, distractor index and snapshot
+    client.post('/vocabulary/edit_word/1', data={'word': 'word0', 'definition': 'edited definition'})
+
+    loaded, definitions = [], {}
+    record = lambda target, context: loaded.append(type(target).__name__)
+    event.listen(VocabularyWord, 'load', record)
+    try:
+        for _ in range(5):
+            data = client.get('/vocabulary/api/quiz/session?count=20').get_json()
+            definitions.update((o['id'], o['definition']) for q in data['questions'] for o in q['options'])
+    finally:
+        event.remove(VocabularyWord, 'load', record)
+
+    assert loaded == []
+    assert definitions[1] == 'edited definition'
+    with app.app_context():
+        assert all(db.session.get(VocabularyWord, i).definition == d for i, d in definitions.items())
+
+
+def test_routes_load_only_the_text_they_render():
+    """Text columns are deferred; quiz routes fetch definitions only, word pages fetch all text up front"""
+    from sqlalchemy import event
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(30, seed=16)
+
+    client = app.test_client()
+    client.get('/vocabulary')  # First-request setup out of the way
+    statements = []
+    record = lambda conn, cursor, statement, *args: statements.append(' '.join(statement.split()))
+    with app.app_context():
+        engine = db.engine
+
+    def run(request):
+        statements.clear()
+        event.listen(engine, 'before_cursor_execute', record)
+        try:
+            assert request().status_code == 200
+        finally:
+            event.remove(engine, 'before_cursor_execute', record)
+        return [s for s in statements if 'vocabulary_word' in s]
+
+    old_snapshot = app.config['WORD_SNAPSHOT']
+    app.config['WORD_SNAPSHOT'] = False  # Exercise the word queries rather than the snapshot
+    try:
+        for request in (lambda: client.get('/vocabulary/api/quiz/session?count=10'),
+                        lambda: client.post('/vocabulary/quiz/check',
+                                            data={'word_id': 2, 'answer_id': 3, 'response_time': 4.0})):
+            queries = run(request)
+            assert queries and not any('vocabulary_word.synonyms' in q or 'example_sentence' in q for q in queries)
+            assert any('vocabulary_word.definition' in q for q in queries)
+    finally:
+        app.config['WORD_SNAPSHOT'] = old_snapshot
+
+    for url in ('/vocabulary/words', '/vocabulary/words/all', '/vocabulary/words/print',
+                '/vocabulary/api/words', '/vocabulary/edit_word/4'):
+        queries = run(lambda: client.get(url))
+        # All text comes with the word rows: no per-word deferred loads afterwards
+        assert len(queries) == 1 and 'vocabulary_word.example_sentence' in queries[0], (url, queries)
+
+    for url in ('/vocabulary', '/vocabulary/progress', '/vocabulary/quiz'):
+        assert not any('vocabulary_word.definition' in q for q in run(lambda: client.get(url))), url
+
+
+def test_word_import_parses_csv_jsonl_and_anki_tsv():
+    import io
+    from word_import import chunked, detect_format, parse_words
+
+    csv_text = ('Word,Definition,Example_Sentence,Notes\n'
+                'laconic, Using very few words ,"Short, laconic reply",x\n'
+                '\n'
+                'terse,"Sparing in\nwords",,\n')
+    assert list(parse_words(io.StringIO(csv_text, newline=''), 'csv')) == [
+        {'word': 'laconic', 'definition': 'Using very few words', 'synonyms': '', 'antonyms': '',
+         'example_sentence': 'Short, laconic reply'},
+        {'word': 'terse', 'definition': 'Sparing in\nwords', 'synonyms': '', 'antonyms': '', 'example_sentence': ''},
+    ]
+    jsonl_text = '{"word": "laconic", "definition": "Using very few words", "synonyms": null}\n\n{"word": "terse"}\n'
+    assert [r['word'] for r in parse_words(io.StringIO(jsonl_text), 'jsonl')] == ['laconic', 'terse']
+    anki_text = '#separator:tab\n#html:false\nlaconic\tUsing very few words\tterse, brief\tverbose\n"#hashtag"\t"a\n#b"\n'
+    assert list(parse_words(io.StringIO(anki_text, newline=''), 'tsv')) == [
+        {'word': 'laconic', 'definition': 'Using very few words', 'synonyms': 'terse, brief', 'antonyms': 'verbose',
+         'example_sentence': ''},
+        {'word': '#hashtag', 'definition': 'a\n#b', 'synonyms': '', 'antonyms': '', 'example_sentence': ''},
+    ]
+
+    assert [detect_format(name) for name in ('a.CSV', 'b.jsonl', 'c.ndjson', 'deck.txt')] == ['csv', 'jsonl', 'jsonl', 'tsv']
+    assert [len(chunk) for chunk in chunked(range(7), 3)] == [3, 3, 1]
+    for text, file_format in (('word,meaning\nx,y\n', 'csv'), ('{"word": "x"}\n[1]\n', 'jsonl'),
+                              ('{"word": \n', 'jsonl'), ('x\ty\n', 'xml')):
+        with pytest.raises(ValueError):
+            list(parse_words(io.StringIO(text), file_format))
+    with pytest.raises(ValueError):
+        detect_format('words.xlsx')
+
+
+def test_bulk_import_dedupes_with_one_query_per_chunk(tmp_path):
+    """Imports skip existing and repeated words, give every learner state rows and refresh the caches"""
+    import io
+    from app import add_learner, dashboard_stats, import_words, word_bank_snapshot
+    from word_import import parse_words
+
+    with app.app_context():
+        reset_database()
+        add_sample_words(4, seed=9)
+        add_learner("Max")
+        assert dashboard_stats[1].get()['total_words'] == 4
+        version = word_bank_snapshot().version
+
+        lines = ['word,definition'] + [f"new{i},meaning {i}" for i in range(8)]
+        lines += ['word1,already added', 'new3,repeated in the file', 'nodefinition,', 'x' * 101 + ',too long']
+        statements = []
+        from sqlalchemy import event
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            counts = import_words(parse_words(io.StringIO('\n'.join(lines)), 'csv'), chunk_size=4)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+
+        assert counts == {'inserted': 8, 'skipped': 2, 'invalid': 2}
+        chunks = 3  # 12 records in chunks of 4
+        assert sum(s.startswith('SELECT vocabulary_word.word') for s in statements) == chunks
+        assert sum(s.startswith('INSERT INTO vocabulary_word') for s in statements) == chunks - 1  # Last chunk: nothing new
+        assert VocabularyWord.query.filter_by(word='new3').one().definition == 'meaning 3'
+        assert len(learner_states(1)) == len(learner_states(2)) == 12
+        assert dashboard_stats[1].get()['total_words'] == 12
+        snapshot = word_bank_snapshot()
+        assert len(snapshot) == 12 and snapshot.version == version + 2
+
+    client = app.test_client()
+    upload = io.BytesIO(b'{"word": "new0", "definition": "again"}\n{"word": "laconic", "definition": "brief"}\n')
+    response = client.post('/vocabulary/import_words', data={'file': (upload, 'words.jsonl')})
+    assert response.status_code == 302 and response.location.endswith('/vocabulary/words')
+    assert b'Imported 1 words from words.jsonl (1 already added or repeated, 0 invalid)' in client.get('/vocabulary/words').data
+    response = client.post('/vocabulary/import_words', data={'file': (io.BytesIO(b'x'), 'words.xlsx')})
+    assert response.location.endswith('/vocabulary/add_word')
+
+    deck = tmp_path / 'deck.txt'
+    deck.write_text('#separator:tab\nlaconic\tbrief\nterse\tSparing in words\tconcise\n', encoding='utf-8')
+    result = app.test_cli_runner().invoke(args=['import-words', str(deck)])
+    assert result.exit_code == 0
+    assert result.output == 'Inserted 1, skipped 1 (already added or repeated), 0 invalid\n'
@@ -0,0 +1,99 @@
+"""
+Streaming parsers for bulk word imports
+
+Word lists come as CSV with a header row, JSON Lines (one object per
+line), or tab-separated text as Anki exports it ("Notes in Plain Text":
+fields in order, '#' lines are export settings). Each parser reads its
+text stream a line at a time and yields dicts of the word fields, and
+chunked() groups them, so an import holds one chunk of words in memory
+however long the file is.
+"""
+
+import csv
+import json
+import os
+from itertools import dropwhile, islice
+
+FIELDS = ('word', 'definition', 'synonyms', 'antonyms', 'example_sentence')
+
+# File extension -> format
+EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.tsv': 'tsv',
+    '.txt': 'tsv',  # Anki's plain text export
+}
+
+
+def detect_format(filename):
+    """The import format for a file name, from its extension"""
+    extension = os.path.splitext(filename or '')[1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Cannot tell the format of {filename!r} (expected one of {', '.join(sorted(EXTENSIONS))})")
+    return EXTENSIONS[extension]
+
+
+def clean(record):
+    """Word fields of a parsed record as stripped strings ('' when missing)"""
+    return {field: str(record.get(field) or '').strip() for field in FIELDS}
+
+
+def parse_csv(stream):
+    """Records from CSV with a header row naming the fields (other columns are ignored)"""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    header = [name.strip().lower() for name in header]
+    if 'word' not in header or 'definition' not in header:
+        raise ValueError("CSV header must name at least the word and definition columns")
+    for row in reader:
+        if any(row):
+            yield clean(dict(zip(header, row)))
+
+
+def parse_jsonl(stream):
+    """Records from JSON Lines, one object with the word fields per line"""
+    for line_number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Line {line_number}: {e}") from None
+        if not isinstance(record, dict):
+            raise ValueError(f"Line {line_number}: expected a JSON object")
+        yield clean(record)
+
+
+def parse_tsv(stream):
+    """Records from Anki-style tab-separated notes: word, definition, synonyms, antonyms, example"""
+    # Anki quotes fields that contain tabs or newlines the way CSV does
+    for row in csv.reader(dropwhile(lambda line: line.startswith('#'), stream), delimiter='\t'):
+        if any(row):
+            yield clean(dict(zip(FIELDS, row)))
+
+
+PARSERS = {
+    'csv': parse_csv,
+    'jsonl': parse_jsonl,
+    'tsv': parse_tsv,
+}
+
+
+def parse_words(stream, file_format):
+    """Records from a text stream in the given format ('csv', 'jsonl' or 'tsv')"""
+    if file_format not in PARSERS:
+        raise ValueError(f"Unknown import format {file_format!r} (expected {', '.join(PARSERS)})")
+    return PARSERS[file_format](stream)
+
+
+def chunked(records, size):
+    """Lists of up to size records"""
+    records = iter(records)
+    while True:
+        chunk = list(islice(records, size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,249 @@
+"""
+Process-level snapshot of the word bank for read-heavy paths
+
+A quiz session only shows each word's text and definition, but loading
+VocabularyWord objects hydrates every column (synonyms, antonyms, example
+sentence) plus SQLAlchemy's per-instance bookkeeping. The snapshot keeps
+word ids in a sorted machine-integer array and the display fields in a
+parallel list of __slots__ records, built from a column-projected query.
+Lookups are a binary search over the id array.
+
+The snapshot carries the word bank version it was built at (a counter the
+app bumps with every word change), and can be saved to a file. A new
+process memory-maps that file instead of querying every word: the id
+array is used in place and records are decoded from the file only when
+looked up. The file also records which database it was built from (an
+identity the app derives from the database URL), so a file another
+database left at the same path is never mapped, whatever its version.
+The file layout is
+
+    header   magic, format, word bank version, word count, database identity
+    ids      count native int64s, ascending
+    offsets  2 * count + 1 native int64s into the text blob
+             (word i is blob[offsets[2i]:offsets[2i+1]], its definition runs to offsets[2i+2])
+    blob     UTF-8 text
+
+in native byte order, since the file never leaves the machine (/tmp).
+"""
+
+import bisect
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from array import array
+
+HEADER = struct.Struct('=4sIqqQ')  # 32 bytes, so the int64 arrays after it stay aligned
+MAGIC = b'VWBS'
+FORMAT = 2
+
+
+class WordRecord:
+    """Display fields of one word; stands in for a VocabularyWord on read paths"""
+
+    __slots__ = ('id', 'word', 'definition')
+
+    def __init__(self, id, word, definition):
+        self.id = id
+        self.word = word
+        self.definition = definition
+
+    def __repr__(self):
+        return f"WordRecord({self.id!r}, {self.word!r})"
+
+
+class MappedRecords:
+    """Read-only sequence of WordRecords decoded on access from a mapped snapshot file"""
+
+    def __init__(self, ids, offsets, blob):
+        self._ids = ids
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __getitem__(self, position):
+        start, middle, end = self._offsets[2 * position:2 * position + 3]
+        return WordRecord(self._ids[position],
+                          str(self._blob[start:middle], 'utf-8'),
+                          str(self._blob[middle:end], 'utf-8'))
+
+
+class WordBankSnapshot:
+    """Word ids in an int64 array and their display records, ordered by id"""
+
+    FIELDS = WordRecord.__slots__
+
+    def __init__(self, path=None, identity=0):
+        self.path = path
+        self.identity = identity  # Unsigned 64-bit id of the database the snapshot belongs to
+        self.version = None  # Word bank version the contents match
+        self.built_at = None
+        self.mapped = False  # Contents are read from the mapped file, not yet copied into memory
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self._ids = array('q')
+        self._records = []
+        self.mapped = False
+
+    def __len__(self):
+        return len(self._ids)
+
+    def is_current(self, version):
+        """True if the snapshot is built and matches the database's word bank version"""
+        return self.built_at is not None and version is not None and self.version == version
+
+    def rebuild(self, rows, version=None):
+        """Replace the contents with (id, word, definition) rows at the given version"""
+        with self._lock:
+            self._reset()
+            for word_id, word, definition in sorted(rows):
+                self._ids.append(word_id)
+                self._records.append(WordRecord(word_id, word, definition))
+            self.version = version
+            self.built_at = time.monotonic()
+
+    def invalidate(self):
+        """Force a rebuild on next use"""
+        with self._lock:
+            self.built_at = None
+
+    def update(self, rows, version):
+        """Insert words or replace their display fields, as the write that made `version`
+
+        rows are (id, word, definition). If the snapshot was not at the
+        version just before this write, another process wrote in between and
+        the snapshot is invalidated instead.
+        """
+        with self._lock:
+            if not self._follows(version):
+                return
+            self._materialize()
+            for word_id, word, definition in rows:
+                position = bisect.bisect_left(self._ids, word_id)
+                record = WordRecord(word_id, word, definition)
+                if position < len(self._ids) and self._ids[position] == word_id:
+                    self._records[position] = record
+                else:
+                    self._ids.insert(position, word_id)
+                    self._records.insert(position, record)
+            self.version = version
+
+    def discard(self, word_id, version):
+        """Remove a word, as the write that made `version`"""
+        with self._lock:
+            if not self._follows(version):
+                return
+            self._materialize()
+            position = bisect.bisect_left(self._ids, word_id)
+            if position < len(self._ids) and self._ids[position] == word_id:
+                del self._ids[position]
+                del self._records[position]
+            self.version = version
+
+    def get(self, word_id):
+        """The word's record, or None if it is not in the snapshot"""
+        with self._lock:
+            position = bisect.bisect_left(self._ids, word_id)
+            if position < len(self._ids) and self._ids[position] == word_id:
+                return self._records[position]
+            return None
+
+    def lookup(self, word_ids):
+        """{word_id: record} for the ids present in the snapshot"""
+        with self._lock:
+            found = {}
+            for word_id in word_ids:
+                record = self.get(word_id)
+                if record is not None:
+                    found[word_id] = record
+            return found
+
+    def save(self, path=None):
+        """Write the snapshot to disk atomically (the whole file, so O(words) however little changed)"""
+        path = path or self.path
+        if not path or self.built_at is None or self.version is None:
+            return
+        with self._lock:
+            offsets = array('q', [0])
+            blob = bytearray()
+            for position in range(len(self._records)):
+                record = self._records[position]
+                blob += record.word.encode('utf-8')
+                offsets.append(len(blob))
+                blob += record.definition.encode('utf-8')
+                offsets.append(len(blob))
+            ids = array('q', self._ids)
+            header = HEADER.pack(MAGIC, FORMAT, self.version, len(ids), self.identity)
+
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(header)
+                f.write(ids.tobytes())
+                f.write(offsets.tobytes())
+                f.write(blob)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def load(self, version, path=None):
+        """Map a saved snapshot if it was saved for this database at `version`; returns False otherwise
+
+        Only the header is read here; ids and records are paged in from the
+        file as lookups touch them.
+        """
+        path = path or self.path
+        if not path or version is None or not os.path.exists(path):
+            return False
+        try:
+            with open(path, 'rb') as f:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            magic, file_format, file_version, count, identity = HEADER.unpack_from(view)
+        except (OSError, ValueError, struct.error):
+            return False  # Missing, empty or truncated file
+        if magic != MAGIC or file_format != FORMAT or identity != self.identity or file_version != version:
+            return False
+
+        ids_end = HEADER.size + 8 * count
+        offsets_end = ids_end + 8 * (2 * count + 1)
+        if len(view) < offsets_end:
+            return False
+        ids = view[HEADER.size:ids_end].cast('q')
+        offsets = view[ids_end:offsets_end].cast('q')
+        blob = view[offsets_end:]
+        if offsets[-1] != len(blob):
+            return False
+
+        with self._lock:
+            self._ids = ids
+            self._records = MappedRecords(ids, offsets, blob)
+            self.mapped = True
+            self.version = version
+            self.built_at = time.monotonic()
+        return True
+
+    def _follows(self, version):
+        """True if a write producing `version` applies directly on top of the snapshot"""
+        if self.built_at is None:
+            return False
+        if self.version is None or version != self.version + 1:
+            self.built_at = None  # Missed a write from another process
+            return False
+        return True
+
+    def _materialize(self):
+        """Copy mapped contents into memory before they are changed"""
+        if self.mapped:
+            records = self._records
+            self._ids = array('q', self._ids)
+            self._records = [records[position] for position in range(len(records))]
+            self.mapped = False